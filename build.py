@@ -0,0 +1,296 @@
+# Incremental build for the Smarty-Chef.PCS deployment
+# Runs what script.py, script_1.py, build_corpus.py and build_assets.py do,
+# but only the parts whose inputs changed. Each target lists the files it
+# reads and writes; a target that reads a file another target writes depends
+# on it, so the targets form a graph that is built in dependency order. A
+# target is skipped when the content hash of its inputs and of its
+# dependencies' outputs matches the last build and its outputs are untouched
+# on disk. CPU-heavy targets (corpus index, minification, compression) run in
+# a process pool. Build state lives in the cache directory.
+#
+# Usage: python build.py [--corpus recipes.jsonl] [--zip] [--watch] [--jobs N]
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import build_assets
+
+STATE_VERSION = 1
+STATE_FILE = 'build-state.json'
+WATCH_INTERVAL = 0.5
+
+
+class Target:
+    def __init__(self, name, action, args=(), inputs=(), outputs=(), after=(), pooled=False):
+        self.name = name
+        self.action = action    # module-level function, so it can run in a worker process
+        self.args = tuple(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)  # extra dependencies that share no file with this target
+        self.pooled = pooled
+        self.deps = []
+
+
+# Write only when the content differs, so unchanged files keep their mtime
+def write_if_changed(path, data):
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+    return True
+
+
+# Import a build module, reloading it (and the shared vocabulary) if it was
+# loaded before, so watch mode always runs the code currently on disk
+def fresh_import(module_name):
+    for name in ('recipe_vocab', module_name):
+        if name in sys.modules:
+            importlib.reload(sys.modules[name])
+    return importlib.import_module(module_name)
+
+
+def generate(module_name, deps):
+    module = fresh_import(module_name)
+    files = []
+    for filename, content in module.render_outputs().items():
+        if write_if_changed(filename, content.encode('utf-8')):
+            print(f"✅ Generated {filename}")
+        files.append(filename)
+    return {'files': files}
+
+
+def corpus(input_path, out_dir, cache_dir, deps):
+    fresh_import('build_corpus').build_corpus(input_path, out_dir, cache_dir)
+    return {'files': [os.path.join(out_dir, name) for name in ('local-recipes.json', 'recipe-index.json')]}
+
+
+def asset(name, out_dir, deps):
+    names = {result['name']: result['output'] for result in deps.values() if 'output' in result}
+    entry = fresh_import('build_assets').build_asset(name, '.', out_dir, names)
+    return {**entry, 'files': [os.path.join(out_dir, filename) for filename in entry['files']]}
+
+
+def asset_manifest(out_dir, deps):
+    entries = [{**result, 'files': [os.path.basename(path) for path in result['files']]}
+               for result in deps.values()]
+    fresh_import('build_assets').write_manifest(out_dir, entries)
+    return {'files': [os.path.join(out_dir, build_assets.MANIFEST_NAME)]}
+
+
+def package(out_dir, budget_kb, deps):
+    return {'files': [fresh_import('script_1').build_zip(dist_dir=out_dir, budget_kb=budget_kb)]}
+
+
+def make_targets(out_dir='dist', corpus_path=None, cache_dir='.build-cache', make_zip=False, budget_kb=None):
+    targets = [
+        Target('generate:script', generate, ('script',), inputs=['script.py', 'recipe_vocab.py'],
+               outputs=['app.js', 'server.js', 'recipe-engine.js']),
+        Target('generate:script_1', generate, ('script_1',), inputs=['script_1.py'],
+               outputs=['package.json', 'service-worker.js', 'manifest.json', 'README.md', '.env']),
+    ]
+    if corpus_path:
+        targets.append(Target('corpus', corpus, (corpus_path, '.', cache_dir),
+                              inputs=[corpus_path, 'build_corpus.py', 'recipe_vocab.py'],
+                              outputs=['local-recipes.json', 'recipe-index.json'], pooled=True))
+
+    produced = {output for target in targets for output in target.outputs}
+    assets = []
+    for name in build_assets.HASHED_ASSETS + build_assets.PLAIN_ASSETS:
+        if name not in produced and not os.path.exists(name):
+            continue
+        references = ['asset:' + ref for ref in build_assets.ASSET_REFERENCES.get(name, [])]
+        assets.append(Target('asset:' + name, asset, (name, out_dir), inputs=[name, 'build_assets.py'],
+                             after=[ref for ref in references if ref in {t.name for t in assets}],
+                             pooled=True))
+    targets += assets
+    targets.append(Target('asset-manifest', asset_manifest, (out_dir,), inputs=['build_assets.py'],
+                          after=[target.name for target in assets]))
+    if make_zip:
+        targets.append(Target('zip', package, (out_dir, budget_kb), inputs=['script_1.py'],
+                              after=[target.name for target in targets]))
+
+    # A target depends on whichever targets write the files it reads
+    writers = {output: target.name for target in targets for output in target.outputs}
+    for target in targets:
+        target.deps = sorted({writers[path] for path in target.inputs if path in writers} | set(target.after))
+    return targets
+
+
+# Source files: inputs no target writes. Watch mode polls these.
+def source_files(targets):
+    produced = {output for target in targets for output in target.outputs}
+    return sorted({path for target in targets for path in target.inputs if path not in produced})
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BuildState:
+    def __init__(self, cache_dir):
+        self.path = os.path.join(cache_dir, STATE_FILE)
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        if data.get('version') != STATE_VERSION:
+            data = {}
+        self.hashes = data.get('hashes', {})
+        self.targets = data.get('targets', {})
+
+    # Content hash, recomputed only when size or mtime changed
+    def file_hash(self, path):
+        stamp = file_stamp(path)
+        if stamp is None:
+            return 'missing'
+        cached = self.hashes.get(path)
+        if cached and cached[:2] == stamp:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self.hashes[path] = stamp + [digest.hexdigest()]
+        return digest.hexdigest()
+
+    def key(self, target, deps):
+        digest = hashlib.sha256(json.dumps([target.name, target.args]).encode('utf-8'))
+        for path in target.inputs:
+            digest.update(f"{path}:{self.file_hash(path)}".encode('utf-8'))
+        # Files written by other targets are inputs already; only results used
+        # without a file in between (hashed asset names) are added here
+        for name in target.after:
+            digest.update(f"{name}:{deps[name]['hash']}".encode('utf-8'))
+        return digest.hexdigest()
+
+    # Previous result if the target is up to date
+    def cached(self, target, key):
+        entry = self.targets.get(target.name)
+        if not entry or entry['key'] != key:
+            return None
+        result = entry['result']
+        if any(file_stamp(path) != stamp for path, stamp in result['stamps'].items()):
+            return None
+        return result
+
+    def record(self, target, key, result):
+        files = result['files']
+        result['hash'] = hashlib.sha256(''.join(self.file_hash(path) for path in files).encode('utf-8')).hexdigest()
+        result['stamps'] = {path: file_stamp(path) for path in files}
+        self.targets[target.name] = {'key': key, 'result': result}
+        return result
+
+    def save(self):
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'version': STATE_VERSION, 'hashes': self.hashes, 'targets': self.targets}, f)
+        os.replace(self.path + '.tmp', self.path)
+
+
+def run_build(targets, state, jobs):
+    started = time.time()
+    pending = {target.name: target for target in targets}
+    results = {}
+    running = {}
+    rebuilt = []
+    pool = None
+    try:
+        while pending or running:
+            for name, target in list(pending.items()):
+                if any(dep not in results for dep in target.deps):
+                    continue
+                del pending[name]
+                deps = {dep: results[dep] for dep in target.deps}
+                key = state.key(target, deps)
+                cached = state.cached(target, key)
+                if cached is not None:
+                    results[name] = cached
+                elif target.pooled and jobs > 1:
+                    pool = pool or ProcessPoolExecutor(max_workers=jobs)
+                    running[pool.submit(target.action, *target.args, deps)] = (target, key)
+                else:
+                    results[name] = state.record(target, key, target.action(*target.args, deps))
+                    rebuilt.append(name)
+
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    target, key = running.pop(future)
+                    results[target.name] = state.record(target, key, future.result())
+                    rebuilt.append(target.name)
+            elif pending and all(any(dep not in results for dep in t.deps) for t in pending.values()):
+                raise RuntimeError(f"Dependency cycle between {', '.join(sorted(pending))}")
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        state.save()
+
+    skipped = len(targets) - len(rebuilt)
+    print(f"🔨 {len(rebuilt)} rebuilt, ⏭️ {skipped} up to date in {time.time() - started:.2f}s")
+    return rebuilt
+
+
+def build(args):
+    targets = make_targets(args.out_dir, args.corpus, args.cache_dir, args.zip, args.budget_kb)
+    return run_build(targets, BuildState(args.cache_dir), args.jobs), targets
+
+
+# Poll the source files and rebuild whatever their changes reach
+def watch(args):
+    _, targets = build(args)
+    stamps = {path: file_stamp(path) for path in source_files(targets)}
+    print("👀 Watching for changes (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            current = {path: file_stamp(path) for path in stamps}
+            if current == stamps:
+                continue
+            changed = sorted(path for path in stamps if current[path] != stamps[path])
+            print(f"\n✏️ Changed: {', '.join(changed)}")
+            try:
+                _, targets = build(args)
+            except Exception as error:
+                print(f"❌ Build failed: {error}")
+            stamps = {path: file_stamp(path) for path in source_files(targets)}
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Incremental build of the Smarty-Chef.PCS app')
+    parser.add_argument('--corpus', help='recipe dataset to index with build_corpus.py (.jsonl/.ndjson or .csv)')
+    parser.add_argument('--out-dir', default='dist', help='where to write the built static assets')
+    parser.add_argument('--cache-dir', default='.build-cache', help='build state and corpus cache directory')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='worker processes (1 builds serially)')
+    parser.add_argument('--zip', action='store_true', help='also package the deployment ZIP')
+    parser.add_argument('--budget-kb', type=int, help='fail when the ZIP is bigger than this (default: script_1.ZIP_BUDGET_KB)')
+    parser.add_argument('--watch', action='store_true', help='rebuild whenever a source file changes')
+    args = parser.parse_args()
+    if args.budget_kb is None:
+        args.budget_kb = fresh_import('script_1').ZIP_BUDGET_KB
+    if build_assets.brotli is None:
+        print("⚠️ brotli not installed, writing .gz files only (pip install brotli)")
+    if args.watch:
+        watch(args)
+    else:
+        try:
+            build(args)
+        except RuntimeError as error:
+            raise SystemExit(f"❌ {error}")
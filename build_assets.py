@@ -0,0 +1,288 @@
+# Build the static assets the server ships to browsers
+# Minifies app.js, recipe-engine.js and style.css, gives them content-hashed
+# names (app.3f9c2a1b7d.js) so they can be cached forever, rewrites the
+# references to them in index.html, app.js and service-worker.js, and writes
+# .gz and .br siblings next to every text asset. asset-manifest.json records
+# the hashed names and available encodings for server.js, which then serves
+# the precompressed files with no per-request compression.
+#
+# Brotli needs the optional `brotli` package (pip install brotli); without it
+# only .gz files are written.
+#
+# Usage: python build_assets.py [--src-dir .] [--out-dir dist]
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Build order matters: a file's references are rewritten before it is hashed,
+# so app.js comes after recipe-engine.js, and the unhashed files come last.
+HASHED_ASSETS = ['recipe-engine.js', 'style.css', 'app.js']
+PLAIN_ASSETS = ['index.html', 'service-worker.js', 'manifest.json', 'local-recipes.json', 'recipe-index.json']
+# Hashed assets each file refers to by name; they are built first
+ASSET_REFERENCES = {
+    'app.js': ['recipe-engine.js'],
+    'index.html': ['style.css', 'app.js'],
+    'service-worker.js': ['style.css', 'app.js', 'recipe-engine.js'],
+}
+COMPRESSIBLE = {'.js', '.css', '.html', '.json', '.svg', '.txt'}
+MANIFEST_NAME = 'asset-manifest.json'
+HASH_LENGTH = 10
+
+_WORD_CHAR = re.compile(r'[A-Za-z0-9_$\\]')
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                   'void', 'throw', 'yield', 'await'}
+_WHITESPACE = ' \t\r\n\f\v'
+
+
+def _is_word(char):
+    return bool(char) and (ord(char) > 127 or bool(_WORD_CHAR.match(char)))
+
+
+# Index just past the closing quote of the string literal starting at start
+def _skip_string(source, start):
+    quote = source[start]
+    i = start + 1
+    while i < len(source) and source[i] != quote:
+        i += 2 if source[i] == '\\' else 1
+    return i + 1
+
+
+# Index just past the regex literal (and its flags) starting at start
+def _skip_regex(source, start):
+    i = start + 1
+    in_class = False
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            break
+        i += 1
+    i += 1
+    while i < len(source) and _is_word(source[i]):
+        i += 1
+    return i
+
+
+# Scan template literal text from start; returns (end, opens_placeholder)
+def _skip_template(source, start):
+    i = start
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+        elif char == '`':
+            return i + 1, False
+        elif char == '$' and source.startswith('${', i):
+            return i + 2, True
+        else:
+            i += 1
+    return i, False
+
+
+# Conservative minifier: drops comments and indentation and squeezes
+# whitespace, but keeps line breaks so automatic semicolon insertion behaves
+# exactly as in the source. Strings, template literals and regexes are copied
+# verbatim.
+def minify_js(source):
+    out = []
+    templates = []  # brace depth at which each open ${...} placeholder closes
+    depth = 0
+    last = ''
+    last_word = ''
+    space = ''
+    i, n = 0, len(source)
+
+    while i < n:
+        char = source[i]
+        if char in _WHITESPACE:
+            start = i
+            while i < n and source[i] in _WHITESPACE:
+                i += 1
+            space = '\n' if '\n' in source[start:i] or space == '\n' else ' '
+            continue
+        if source.startswith('//', i):
+            while i < n and source[i] != '\n':
+                i += 1
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            space = '\n' if '\n' in source[i:end] or space == '\n' else ' '
+            i = end
+            continue
+
+        if space and out:
+            if space == '\n' and last not in '{;,':
+                out.append('\n')
+            elif _is_word(last) and _is_word(char) or last == char and char in '+-':
+                out.append(' ')
+        space = ''
+
+        if char in '\'"':
+            end = _skip_string(source, i)
+        elif char == '`' or (char == '}' and templates and templates[-1] == depth):
+            if char == '}':
+                templates.pop()
+            end, opens = _skip_template(source, i + 1)
+            if opens:
+                templates.append(depth)
+        elif char == '/' and (not last or last in _REGEX_PRECEDERS or last_word in _REGEX_KEYWORDS):
+            end = _skip_regex(source, i)
+        elif _is_word(char):
+            end = i
+            while end < n and _is_word(source[end]):
+                end += 1
+            out.append(source[i:end])
+            last, last_word = source[end - 1], source[i:end]
+            i = end
+            continue
+        else:
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            end = i + 1
+        out.append(source[i:end])
+        last, last_word = source[end - 1], ''
+        i = end
+
+    return ''.join(out).strip() + '\n'
+
+
+_CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+
+
+# Drops comments and whitespace around CSS punctuation; strings are left alone
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    parts = _CSS_STRING.split(source)
+    for index in range(0, len(parts), 2):
+        part = re.sub(r'\s+', ' ', parts[index])
+        part = re.sub(r'\s*([{};,>])\s*', r'\1', part)
+        part = re.sub(r'([:(])\s+', r'\1', part)
+        parts[index] = part.replace(';}', '}')
+    return ''.join(parts).strip() + '\n'
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name, data):
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{content_hash(data)}{extension}"
+
+
+# Point quoted/attribute references such as 'app.js' or "./style.css" at the hashed names
+def rewrite_references(text, names):
+    for name, hashed in names.items():
+        text = re.sub(r'''(["'(]\.?/?)%s(["')?#])''' % re.escape(name), r'\g<1>%s\g<2>' % hashed, text)
+    return text
+
+
+# {encoding: bytes} for every encoding that actually makes the file smaller.
+# gzip's header timestamp is zeroed so identical input gives identical output.
+def compress(data):
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def _write(path, data):
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+
+# Build one asset into out_dir. names maps the assets built so far to their
+# output names, for the references this file makes. Returns its manifest entry.
+def build_asset(name, src_dir, out_dir, names):
+    with open(os.path.join(src_dir, name), 'rb') as f:
+        data = f.read()
+
+    if name in ASSET_REFERENCES:
+        data = rewrite_references(data.decode('utf-8'), names).encode('utf-8')
+    if name.endswith('.js') and name != 'service-worker.js':
+        data = minify_js(data.decode('utf-8')).encode('utf-8')
+    elif name.endswith('.css'):
+        data = minify_css(data.decode('utf-8')).encode('utf-8')
+
+    os.makedirs(out_dir, exist_ok=True)
+    output_name = hashed_name(name, data) if name in HASHED_ASSETS else name
+    _write(os.path.join(out_dir, output_name), data)
+
+    variants = compress(data) if os.path.splitext(name)[1] in COMPRESSIBLE else {}
+    files = [output_name]
+    for encoding, body in variants.items():
+        suffix = '.br' if encoding == 'br' else '.gz'
+        _write(os.path.join(out_dir, output_name + suffix), body)
+        files.append(output_name + suffix)
+
+    sizes = ', '.join(f"{encoding} {len(body) / 1024:.1f} KB" for encoding, body in variants.items())
+    print(f"✅ {name} → {output_name} ({len(data) / 1024:.1f} KB{', ' + sizes if sizes else ''})")
+    return {
+        'name': name,
+        'output': output_name,
+        # Best encoding first; the server offers them in this order
+        'encodings': sorted(variants, key=lambda encoding: len(variants[encoding])),
+        'files': files,
+    }
+
+
+# Write asset-manifest.json for the given entries and remove files left over
+# from earlier builds
+def write_manifest(out_dir, entries):
+    entries = sorted(entries, key=lambda entry: entry['name'])
+    manifest = {
+        'files': {entry['name']: entry['output'] for entry in entries},
+        'immutable': sorted(entry['output'] for entry in entries if entry['name'] in HASHED_ASSETS),
+        'encodings': {entry['output']: entry['encodings'] for entry in sorted(entries, key=lambda e: e['output'])
+                      if entry['encodings']},
+    }
+    _write(os.path.join(out_dir, MANIFEST_NAME), (json.dumps(manifest, indent=2) + '\n').encode('utf-8'))
+
+    written = {MANIFEST_NAME}.union(*(entry['files'] for entry in entries))
+    for stale in sorted(set(os.listdir(out_dir)) - written):
+        os.remove(os.path.join(out_dir, stale))
+    return manifest
+
+
+def build_assets(src_dir='.', out_dir='dist'):
+    os.makedirs(out_dir, exist_ok=True)
+    if brotli is None:
+        print("⚠️ brotli not installed, writing .gz files only (pip install brotli)")
+
+    names = {}
+    entries = []
+    for name in HASHED_ASSETS + PLAIN_ASSETS:
+        if not os.path.exists(os.path.join(src_dir, name)):
+            print(f"⚠️ Skipping {name}: not found")
+            continue
+        entry = build_asset(name, src_dir, out_dir, names)
+        names[name] = entry['output']
+        entries.append(entry)
+    return write_manifest(out_dir, entries)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Minify, hash and precompress the Smarty-Chef.PCS static assets')
+    parser.add_argument('--src-dir', default='.', help='directory with the generated app files')
+    parser.add_argument('--out-dir', default='dist', help='where to write the built assets')
+    args = parser.parse_args()
+    build_assets(args.src_dir, args.out_dir)
@@ -0,0 +1,299 @@
+# Build the offline recipe corpus for the local recipe engine
+# Streams a large recipe dataset (JSON Lines or CSV), normalizes every record
+# into the same shape transformRecipe() produces in server.js, and writes:
+#   local-recipes.json  - the recipes, in index order
+#   recipe-index.json   - ID table, delta-encoded posting lists and diet/allergen bitmasks
+# Normalized records are kept in a SQLite build cache keyed by recipe ID and
+# content hash, so re-runs only reprocess records that changed.
+#
+# Usage: python build_corpus.py recipes.jsonl [--out-dir .] [--cache-dir .build-cache]
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from array import array
+from datetime import datetime, timezone
+
+from recipe_vocab import ALLERGEN_CLASSES, DIET_CLASSES, allergen_mask, diet_mask, tokenize
+
+INDEX_FORMAT = 'smarty-chef-recipe-index'
+INDEX_VERSION = 2
+# Bump when the cached columns or the recipe_vocab.py rules behind them change,
+# so the next run reprocesses every record
+CACHE_VERSION = 2
+COMMIT_EVERY = 5000
+
+
+# Yield raw recipe dicts one at a time from a .jsonl/.ndjson or .csv file.
+def read_records(input_path):
+    extension = os.path.splitext(input_path)[1].lower()
+    with open(input_path, 'r', encoding='utf-8', newline='') as f:
+        if extension == '.csv':
+            csv.field_size_limit(sys.maxsize)
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as error:
+                    print(f"⚠️ Skipping line {line_number}: {error}")
+
+
+# Accept real lists, JSON-encoded lists (common in CSV dumps) or '|'/newline separated text.
+def as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    text = str(value).strip()
+    if text.startswith('['):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    return [part for part in re.split(r'\s*(?:\||\r?\n)\s*', text) if part]
+
+
+# Mirror of transformRecipe() in server.js, tolerant of plain dataset columns.
+def transform_record(raw):
+    ingredients = []
+    for ingredient in as_list(raw.get('extendedIngredients') or raw.get('ingredients')):
+        if isinstance(ingredient, dict):
+            ingredient = ingredient.get('original') or ingredient.get('name') or ''
+        ingredient = str(ingredient).strip()
+        if ingredient:
+            ingredients.append(ingredient)
+
+    instructions = []
+    analyzed = raw.get('analyzedInstructions')
+    if isinstance(analyzed, list) and analyzed and isinstance(analyzed[0], dict):
+        instructions = [step.get('step', '') for step in analyzed[0].get('steps', [])]
+    else:
+        instructions = as_list(raw.get('instructions') or raw.get('directions') or raw.get('steps'))
+    instructions = [str(step).strip() for step in instructions if str(step).strip()]
+
+    summary = raw.get('summary') or raw.get('description') or ''
+    description = re.sub(r'<[^>]*>', '', str(summary))[:200] if summary else \
+        'A delicious recipe made with your selected ingredients.'
+
+    labels = [
+        'Vegetarian' if is_true(raw.get('vegetarian')) else None,
+        'Vegan' if is_true(raw.get('vegan')) else None,
+        'Gluten-Free' if is_true(raw.get('glutenFree')) else None,
+        'Dairy-Free' if is_true(raw.get('dairyFree')) else None,
+        'Healthy' if is_true(raw.get('veryHealthy')) else None,
+    ]
+    labels += as_list(raw.get('dietary_labels') or raw.get('diets'))
+    labels += as_list(raw.get('dishTypes'))
+    labels += as_list(raw.get('cuisines'))
+    dietary_labels = []
+    for label in labels:
+        if label and str(label) not in dietary_labels:
+            dietary_labels.append(str(label))
+
+    ready = raw.get('readyInMinutes') or raw.get('time') or ''
+    dish_types = as_list(raw.get('dishTypes'))
+    return {
+        'id': raw.get('id'),
+        'title': str(raw.get('title') or raw.get('name') or 'Delicious Recipe'),
+        'description': description,
+        'ingredients': ingredients,
+        'instructions': instructions,
+        'time': f"{ready} minutes" if str(ready).isdigit() else str(ready),
+        'dietary_labels': dietary_labels,
+        'category': str(raw.get('category') or (dish_types[0] if dish_types else 'Main Course')),
+        'servings': str(raw.get('servings') or ''),
+        'image': str(raw.get('image') or ''),
+        'sourceUrl': str(raw.get('sourceUrl') or raw.get('link') or raw.get('url') or ''),
+    }
+
+
+def is_true(value):
+    return value is True or str(value).strip().lower() in ('true', '1', 'yes')
+
+
+# Same token set RecipeIndex.build() derives from a recipe in recipe-engine.js.
+def record_tokens(record):
+    tokens = []
+    for text in record['ingredients'] + [record['title']]:
+        for token in tokenize(text):
+            if token not in tokens:
+                tokens.append(token)
+    return tokens
+
+
+def open_cache(cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    db = sqlite3.connect(os.path.join(cache_dir, 'corpus.sqlite'))
+    db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+    row = db.execute("SELECT value FROM meta WHERE key = 'cache_version'").fetchone()
+    if row is None or row[0] != str(CACHE_VERSION):
+        db.execute('DROP TABLE IF EXISTS records')
+    db.execute('''CREATE TABLE IF NOT EXISTS records (
+        id TEXT PRIMARY KEY,
+        hash TEXT NOT NULL,
+        generation INTEGER NOT NULL,
+        record TEXT NOT NULL,
+        tokens TEXT NOT NULL,
+        diet_mask INTEGER NOT NULL,
+        allergen_mask INTEGER NOT NULL
+    )''')
+    db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cache_version', ?)", (str(CACHE_VERSION),))
+    db.commit()
+    return db
+
+
+# Stream the input into the cache; only new or changed records get normalized.
+# A record ID seen twice in one run keeps its first record; the rest are skipped.
+def sync_cache(db, input_path):
+    row = db.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+    generation = int(row[0]) + 1 if row else 1
+    counts = {'unchanged': 0, 'changed': 0, 'removed': 0, 'duplicates': 0}
+    duplicate_ids = []
+
+    for position, raw in enumerate(read_records(input_path), 1):
+        if position % COMMIT_EVERY == 0:
+            db.commit()
+            print(f"   … {position} records read")
+
+        content_hash = hashlib.sha1(json.dumps(raw, sort_keys=True).encode('utf-8')).hexdigest()
+        # The dataset's own id, else the content hash (an edit then reads as remove + add)
+        key = str(raw['id']) if raw.get('id') not in (None, '') else 'h' + content_hash[:16]
+        cached = db.execute('SELECT hash, generation FROM records WHERE id = ?', (key,)).fetchone()
+        if cached and cached[1] == generation:
+            counts['duplicates'] += 1
+            if len(duplicate_ids) < 10:
+                duplicate_ids.append(key)
+            continue
+        if cached and cached[0] == content_hash:
+            db.execute('UPDATE records SET generation = ? WHERE id = ?', (generation, key))
+            counts['unchanged'] += 1
+            continue
+
+        record = transform_record(raw)
+        record['id'] = record['id'] if record['id'] not in (None, '') else key
+        db.execute(
+            'INSERT OR REPLACE INTO records (id, hash, generation, record, tokens, diet_mask, allergen_mask) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, content_hash, generation, json.dumps(record, ensure_ascii=False, separators=(',', ':')),
+             ' '.join(record_tokens(record)), diet_mask(record['dietary_labels']), allergen_mask(record['ingredients']))
+        )
+        counts['changed'] += 1
+
+    if counts['duplicates']:
+        more = ', …' if counts['duplicates'] > len(duplicate_ids) else ''
+        print(f"⚠️ {counts['duplicates']} records reuse an earlier record's ID and were skipped: "
+              f"{', '.join(duplicate_ids)}{more}")
+
+    counts['removed'] = db.execute('DELETE FROM records WHERE generation != ?', (generation,)).rowcount
+    db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(generation),))
+    db.commit()
+    return counts
+
+
+# Stream recipes out of the cache and assemble the packed index in index order.
+def write_outputs(db, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    recipes_path = os.path.join(out_dir, 'local-recipes.json')
+    index_path = os.path.join(out_dir, 'recipe-index.json')
+
+    token_ids = {}
+    postings = []
+    ids = []
+    ingredient_counts = array('H')
+    diet_masks = array('I')
+    allergen_masks = array('I')
+
+    with open(recipes_path + '.tmp', 'w', encoding='utf-8') as recipes_file:
+        recipes_file.write('[')
+        for position, (record_json, tokens, diet_bits, allergen_bits) in enumerate(
+                db.execute('SELECT record, tokens, diet_mask, allergen_mask FROM records ORDER BY id')):
+            record = json.loads(record_json)
+            recipes_file.write((',\n' if position else '\n') + record_json)
+
+            ids.append(record['id'])
+            ingredient_counts.append(min(len(record['ingredients']), 65535))
+            diet_masks.append(diet_bits)
+            allergen_masks.append(allergen_bits)
+
+            for token in tokens.split():
+                token_id = token_ids.get(token)
+                if token_id is None:
+                    token_id = token_ids[token] = len(postings)
+                    postings.append(array('I'))
+                postings[token_id].append(position)
+        recipes_file.write('\n]\n')
+
+    index = {
+        'format': INDEX_FORMAT,
+        'version': INDEX_VERSION,
+        'builtAt': datetime.now(timezone.utc).isoformat(),
+        'count': len(ids),
+        'ids': ids,
+        'ingredientCounts': ingredient_counts.tolist(),
+        'diets': [diet['name'] for diet in DIET_CLASSES],
+        'dietMasks': diet_masks.tolist(),
+        'allergens': [allergen['name'] for allergen in ALLERGEN_CLASSES],
+        'allergenMasks': allergen_masks.tolist(),
+        'tokens': list(token_ids),
+        'postings': [delta_encode(posting) for posting in postings],
+    }
+    with open(index_path + '.tmp', 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, separators=(',', ':'), ensure_ascii=False)
+
+    os.replace(recipes_path + '.tmp', recipes_path)
+    os.replace(index_path + '.tmp', index_path)
+    return recipes_path, index_path, len(ids), len(token_ids)
+
+
+def delta_encode(posting):
+    previous = 0
+    deltas = []
+    for recipe_id in posting:
+        deltas.append(recipe_id - previous)
+        previous = recipe_id
+    return deltas
+
+
+def build_corpus(input_path, out_dir='.', cache_dir='.build-cache'):
+    db = open_cache(cache_dir)
+    try:
+        print(f"📚 Reading recipes from {input_path}")
+        counts = sync_cache(db, input_path)
+        print(f"   {counts['changed']} new/changed, {counts['unchanged']} unchanged, {counts['removed']} removed")
+
+        outputs_exist = all(os.path.exists(os.path.join(out_dir, name))
+                            for name in ('local-recipes.json', 'recipe-index.json'))
+        # An index written by an older build_corpus.py is rebuilt even if no record changed
+        row = db.execute("SELECT value FROM meta WHERE key = 'index_version'").fetchone()
+        index_current = row is not None and row[0] == str(INDEX_VERSION)
+        if outputs_exist and index_current and counts['changed'] == 0 and counts['removed'] == 0:
+            print("✅ Corpus unchanged, index is up to date")
+            return False
+
+        recipes_path, index_path, recipe_count, token_count = write_outputs(db, out_dir)
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('index_version', ?)", (str(INDEX_VERSION),))
+        db.commit()
+        print(f"✅ Indexed {recipe_count} recipes, {token_count} ingredient tokens")
+        print(f"📦 {recipes_path} ({os.path.getsize(recipes_path) // 1024} KB)")
+        print(f"📦 {index_path} ({os.path.getsize(index_path) // 1024} KB)")
+        return True
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the Smarty-Chef.PCS offline recipe index')
+    parser.add_argument('input', help='recipe dataset (.jsonl/.ndjson or .csv)')
+    parser.add_argument('--out-dir', default='.', help='where to write local-recipes.json and recipe-index.json')
+    parser.add_argument('--cache-dir', default='.build-cache', help='incremental build cache directory')
+    args = parser.parse_args()
+    build_corpus(args.input, args.out_dir, args.cache_dir)
@@ -0,0 +1,239 @@
+# Shared ingredient vocabulary for the recipe engine
+# script.py injects these into recipe-engine.js and app.js, and build_corpus.py
+# uses them directly, so the offline index and the JS engine always tokenize the
+# same way.
+import json
+import re
+
+# Quantities, units and preparation words that say nothing about the ingredient
+STOP_WORDS = [
+    'a', 'an', 'and', 'or', 'of', 'for', 'the', 'to', 'in', 'into', 'with', 'as', 'per', 'about',
+    'g', 'kg', 'mg', 'ml', 'l', 'oz', 'lb', 'lbs', 'cup', 'tbsp', 'tsp', 'tablespoon', 'teaspoon',
+    'inch', 'pinch', 'dash', 'handful', 'piece', 'stick', 'bunch', 'can', 'pack', 'packet',
+    'large', 'small', 'medium', 'big', 'fresh', 'finely', 'roughly', 'thinly', 'chopped', 'minced',
+    'sliced', 'diced', 'grated', 'cubed', 'crushed', 'ground', 'pureed', 'peeled', 'cut', 'cube',
+    'soaked', 'warm', 'hot', 'cold', 'whole', 'optional', 'taste', 'needed', 'required', 'some'
+]
+
+# Diet classes, one bit each in a recipe's diet mask (order is the bit position).
+# A recipe gets the bit when one of its dietary labels, normalized, is listed.
+DIET_CLASSES = [
+    {'name': 'vegetarian', 'labels': ['vegetarian', 'lacto ovo vegetarian', 'vegan']},
+    {'name': 'vegan', 'labels': ['vegan']},
+    {'name': 'gluten-free', 'labels': ['gluten free']},
+    {'name': 'dairy-free', 'labels': ['dairy free']},
+    {'name': 'keto', 'labels': ['keto', 'ketogenic']},
+    {'name': 'paleo', 'labels': ['paleo', 'paleolithic', 'primal']},
+    {'name': 'low-carb', 'labels': ['low carb', 'keto', 'ketogenic']},
+    {'name': 'pescatarian', 'labels': ['pescatarian']},
+    {'name': 'healthy', 'labels': ['healthy']},
+    {'name': 'indian', 'labels': ['indian']},
+]
+
+# Allergen classes, one bit each in a recipe's allergen mask (order is the bit
+# position). Terms match whole tokens of an ingredient line, so "nut" never
+# matches "nutmeg"; the words of an exception phrase found in a line are set
+# aside first, so "peanut butter" is not dairy. Aliases are the words users
+# type in the allergies field.
+ALLERGEN_CLASSES = [
+    {'name': 'peanut', 'aliases': ['peanut', 'groundnut', 'nut'],
+     'terms': ['peanut', 'groundnut', 'monkey nut'], 'except': []},
+    {'name': 'tree-nut', 'aliases': ['tree nut', 'nut'],
+     'terms': ['nut', 'almond', 'cashew', 'walnut', 'pecan', 'pistachio', 'hazelnut', 'macadamia',
+               'chestnut', 'praline', 'marzipan', 'badam', 'kaju'],
+     'except': ['water chestnut']},
+    {'name': 'dairy', 'aliases': ['dairy', 'milk', 'lactose'],
+     'terms': ['milk', 'butter', 'ghee', 'cream', 'cheese', 'yogurt', 'yoghurt', 'curd', 'paneer',
+               'whey', 'casein', 'mozzarella', 'cheddar', 'parmesan', 'ricotta', 'khoya', 'buttermilk'],
+     'except': ['coconut milk', 'coconut cream', 'almond milk', 'soy milk', 'oat milk', 'rice milk',
+                'peanut butter', 'almond butter', 'cocoa butter', 'cream of tartar']},
+    {'name': 'egg', 'aliases': ['egg'], 'terms': ['egg', 'mayonnaise', 'meringue'], 'except': ['eggplant']},
+    {'name': 'gluten', 'aliases': ['gluten', 'wheat', 'celiac', 'coeliac'],
+     'terms': ['wheat', 'flour', 'bread', 'pasta', 'noodle', 'semolina', 'barley', 'rye', 'naan', 'roti',
+               'chapati', 'bulgur', 'couscous', 'seitan', 'maida', 'atta', 'rava', 'breadcrumb'],
+     'except': ['rice flour', 'gram flour', 'chickpea flour', 'almond flour', 'coconut flour',
+                'corn flour', 'rice noodle', 'gluten free flour', 'gluten free bread', 'gluten free pasta']},
+    {'name': 'soy', 'aliases': ['soy', 'soya'], 'terms': ['soy', 'soya', 'tofu', 'edamame', 'tempeh', 'miso'],
+     'except': []},
+    {'name': 'fish', 'aliases': ['fish', 'seafood'],
+     'terms': ['fish', 'salmon', 'tuna', 'cod', 'anchovy', 'sardine', 'mackerel', 'tilapia', 'trout',
+               'haddock', 'pomfret', 'hilsa'],
+     'except': []},
+    {'name': 'shellfish', 'aliases': ['shellfish', 'seafood', 'crustacean'],
+     'terms': ['shrimp', 'prawn', 'crab', 'lobster', 'shellfish', 'scallop', 'mussel', 'clam', 'oyster',
+               'squid', 'calamari'],
+     'except': []},
+    {'name': 'sesame', 'aliases': ['sesame', 'til'], 'terms': ['sesame', 'tahini', 'til'], 'except': []},
+    {'name': 'mustard', 'aliases': ['mustard'], 'terms': ['mustard'], 'except': []},
+]
+
+# Other names people type for the ingredient picker's entries: Hindi and
+# regional names plus British/American variants. Keys are picker names.
+INGREDIENT_SYNONYMS = {
+    'Chicken': ['murgh', 'murg'],
+    'Mutton': ['goat meat', 'gosht'],
+    'Fish': ['machli', 'machhi'],
+    'Prawns': ['jhinga', 'shrimp'],
+    'Eggs': ['anda', 'ande'],
+    'Paneer': ['cottage cheese'],
+    'Basmati Rice': ['chawal'],
+    'Wheat Flour': ['atta', 'gehun'],
+    'All-Purpose Flour': ['maida', 'plain flour'],
+    'Semolina': ['suji', 'sooji', 'rava'],
+    'Onions': ['pyaz', 'pyaaz', 'kanda'],
+    'Garlic': ['lehsun', 'lahsun'],
+    'Ginger': ['adrak'],
+    'Tomatoes': ['tamatar'],
+    'Bell Peppers': ['capsicum', 'shimla mirch'],
+    'Green Chilies': ['hari mirch'],
+    'Potatoes': ['aloo', 'alu'],
+    'Sweet Potatoes': ['shakarkandi'],
+    'Carrots': ['gajar'],
+    'Cucumber': ['kheera', 'khira'],
+    'Okra': ['bhindi', 'ladyfinger'],
+    'Eggplant': ['baingan', 'brinjal', 'aubergine'],
+    'Bitter Gourd': ['karela'],
+    'Bottle Gourd': ['lauki', 'doodhi', 'ghiya'],
+    'Drumsticks': ['moringa', 'sahjan'],
+    'Curry Leaves': ['kadi patta', 'curry patta'],
+    'Coriander Leaves': ['dhania', 'cilantro', 'kothmir'],
+    'Mint Leaves': ['pudina'],
+    'Spinach': ['palak'],
+    'Fenugreek Leaves': ['methi', 'kasuri methi'],
+    'Cauliflower': ['gobi', 'phool gobi'],
+    'Peas': ['matar'],
+    'Corn': ['makai', 'maize'],
+    'Mushrooms': ['khumb'],
+    'Zucchini': ['courgette'],
+    'Chickpeas': ['chana', 'chole', 'garbanzo'],
+    'Black Lentils': ['urad dal'],
+    'Red Lentils': ['masoor dal'],
+    'Yellow Lentils': ['moong dal', 'toor dal'],
+    'Kidney Beans': ['rajma'],
+    'Green Moong': ['sabut moong'],
+    'Pigeon Peas': ['toor', 'arhar'],
+    'Turmeric': ['haldi'],
+    'Cumin': ['jeera', 'zeera'],
+    'Coriander Seeds': ['sabut dhania'],
+    'Mustard Seeds': ['rai', 'sarson'],
+    'Fennel Seeds': ['saunf'],
+    'Cardamom': ['elaichi'],
+    'Cinnamon': ['dalchini'],
+    'Cloves': ['laung', 'lavang'],
+    'Bay Leaves': ['tej patta'],
+    'Asafoetida': ['hing'],
+    'Red Chili Powder': ['lal mirch'],
+    'Black Pepper': ['kali mirch'],
+    'Saffron': ['kesar'],
+    'Nutmeg': ['jaiphal'],
+    'Yogurt': ['dahi', 'curd'],
+    'Heavy Cream': ['malai', 'double cream'],
+    'Ghee': ['clarified butter'],
+    'Mustard Oil': ['sarson ka tel'],
+    'Lemons': ['nimbu'],
+    'Coconut': ['nariyal'],
+    'Mango': ['aam'],
+    'Banana': ['kela'],
+    'Almonds': ['badam'],
+    'Cashews': ['kaju'],
+    'Peanuts': ['moongphali', 'groundnut'],
+    'Sesame Seeds': ['til'],
+    'Poppy Seeds': ['khus khus'],
+    'Sugar': ['cheeni', 'shakkar'],
+    'Jaggery': ['gur'],
+    'Honey': ['shahad'],
+    'Salt': ['namak'],
+    'Vinegar': ['sirka'],
+    'Tamarind': ['imli'],
+}
+
+_STOP_WORDS = frozenset(STOP_WORDS)
+_WORD_SPLIT = re.compile(r'[^a-z]+')
+_ES_ENDING = re.compile(r'(oes|ches|shes|xes)$')
+_KEEP_S_ENDING = re.compile(r'(ss|us|is)$')
+
+
+# Same rules as normalizeToken() in recipe-engine.js
+def normalize_token(word):
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and _ES_ENDING.search(word):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not _KEEP_S_ENDING.search(word):
+        return word[:-1]
+    return word
+
+
+# Same rules as tokenize() in recipe-engine.js: unique tokens in first-seen order
+def tokenize(text):
+    tokens = []
+    for word in _WORD_SPLIT.split(str(text or '').lower()):
+        if len(word) < 2 or word in _STOP_WORDS:
+            continue
+        token = normalize_token(word)
+        if token not in _STOP_WORDS and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+# Same rules as tokenSequence() in recipe-engine.js: every token in reading
+# order, repeats kept, so phrases can be found in place
+def token_sequence(text):
+    tokens = []
+    for word in _WORD_SPLIT.split(str(text or '').lower()):
+        if len(word) < 2 or word in _STOP_WORDS:
+            continue
+        token = normalize_token(word)
+        if token not in _STOP_WORDS:
+            tokens.append(token)
+    return tokens
+
+
+def normalize_label(label):
+    return ' '.join(re.split(r'[\s_-]+', str(label).lower())).strip()
+
+
+# Same rules as dietMaskFor() in recipe-engine.js
+def diet_mask(labels):
+    normalized = {normalize_label(label) for label in labels}
+    mask = 0
+    for bit, diet in enumerate(DIET_CLASSES):
+        if normalized.intersection(diet['labels']):
+            mask |= 1 << bit
+    return mask
+
+
+def _phrase_at(tokens, phrase_tokens, start):
+    end = start + len(phrase_tokens)
+    return bool(phrase_tokens) and end <= len(tokens) and tokens[start:end] == phrase_tokens
+
+
+def _phrase_in(tokens, phrase_tokens):
+    return any(_phrase_at(tokens, phrase_tokens, start) for start in range(len(tokens)))
+
+
+# Same rules as allergenMaskFor() in recipe-engine.js: exception phrases are
+# blanked out where they occur, in order, before the class terms are checked
+def allergen_mask(lines):
+    mask = 0
+    for line in lines:
+        line_tokens = token_sequence(line)
+        for bit, allergen in enumerate(ALLERGEN_CLASSES):
+            if mask & (1 << bit):
+                continue
+            tokens = list(line_tokens)
+            for phrase in allergen['except']:
+                phrase_tokens = tokenize(phrase)
+                for start in range(len(tokens)):
+                    if _phrase_at(tokens, phrase_tokens, start):
+                        tokens[start:start + len(phrase_tokens)] = [None] * len(phrase_tokens)
+            if any(_phrase_in(tokens, tokenize(term)) for term in allergen['terms']):
+                mask |= 1 << bit
+    return mask
+
+
+# Fill the __NAME__ placeholders of a JS template with JSON literals
+def render_js(template, **values):
+    for name, value in values.items():
+        template = template.replace('__%s__' % name, json.dumps(value))
+    return template
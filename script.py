@@ -1,5 +1,6 @@
 # I'll combine the best UI interface you provided with the Spoonacular API integration
 # This will create the ultimate recipe app with both great UI and powerful API
+from recipe_vocab import ALLERGEN_CLASSES, DIET_CLASSES, INGREDIENT_SYNONYMS, STOP_WORDS, render_js
 
 # First, let me create the enhanced app.js with the new UI design
 enhanced_app_js = '''// Smarty-Chef.PCS v2.0 - Enhanced with Spoonacular API and Best UI
@@ -104,63 +105,521 @@ document.addEventListener('DOMContentLoaded', () => {
     "Sugar", "Jaggery", "Honey", "Salt", "Vinegar", "Soy Sauce", "Tamarind"
   ];
   
+  // Hindi/regional and British/American names for the entries above
+  // (generated from recipe_vocab.py)
+  const ingredientSynonyms = __INGREDIENT_SYNONYMS__;
+
+  // Quantities, units and preparation words (generated from recipe_vocab.py)
+  const STOP_WORDS = new Set(__STOP_WORDS__);
+
+  function foldText(text) {
+    return String(text).toLowerCase().replace(/[^a-z0-9]+/g, ' ').trim();
+  }
+
+  // Loose singular form so "peanut" and "Peanuts" compare equal
+  function stemWord(word) {
+    return word.length > 3 ? word.replace(/(es|s)$/, '') : word;
+  }
+
+  // Edit distance (with transpositions) between a typed word and the start of
+  // a vocabulary word, so "tumer" is one edit away from "turmeric"
+  function prefixDistance(typed, word) {
+    let best = Infinity;
+    for (let length = typed.length - 1; length <= typed.length + 1; length++) {
+      if (length < 1 || length > word.length) continue;
+      const target = word.slice(0, length);
+      const rows = [];
+      for (let i = 0; i <= typed.length; i++) {
+        rows.push([i]);
+        for (let j = 1; j <= target.length; j++) {
+          if (i === 0) {
+            rows[0].push(j);
+            continue;
+          }
+          const cost = typed[i - 1] === target[j - 1] ? 0 : 1;
+          let value = Math.min(rows[i - 1][j] + 1, rows[i][j - 1] + 1, rows[i - 1][j - 1] + cost);
+          if (i > 1 && j > 1 && typed[i - 1] === target[j - 2] && typed[i - 2] === target[j - 1]) {
+            value = Math.min(value, rows[i - 2][j - 2] + 1);
+          }
+          rows[i].push(value);
+        }
+      }
+      best = Math.min(best, rows[typed.length][target.length]);
+    }
+    return best;
+  }
+
+  // Typeahead index over the ingredient vocabulary, built once. Names and
+  // synonyms are folded to lowercase words up front; every word prefix maps
+  // straight to its entries, and start-anchored trigrams find candidates for
+  // typos. A keystroke costs a few map lookups instead of a scan of the list.
+  class IngredientIndex {
+    constructor(names, synonyms) {
+      this.names = [];
+      this.phrases = [];
+      this.prefixes = new Map();
+      this.trigrams = new Map();
+
+      const seen = new Set();
+      names.forEach(name => {
+        if (seen.has(name)) return;
+        seen.add(name);
+        const id = this.names.length;
+        this.names.push(name);
+        this.phrases.push([name, ...(synonyms[name] || [])].map((text, position) => {
+          const folded = foldText(text);
+          return { text: folded, words: folded.split(' '), alias: position === 0 ? null : text };
+        }));
+        this.phrases[id].forEach(phrase => phrase.words.forEach(word => {
+          for (let length = 1; length <= word.length; length++) {
+            this.addPosting(this.prefixes, word.slice(0, length), id);
+          }
+          const padded = '  ' + word;
+          for (let i = 0; i + 3 <= padded.length; i++) {
+            this.addPosting(this.trigrams, padded.slice(i, i + 3), id);
+          }
+        }));
+      });
+    }
+
+    addPosting(map, key, id) {
+      const list = map.get(key);
+      if (!list) {
+        map.set(key, [id]);
+      } else if (list[list.length - 1] !== id) {
+        list.push(id);
+      }
+    }
+
+    get size() {
+      return this.names.length;
+    }
+
+    // Best phrase match for one entry: exact name, name prefix, word prefixes,
+    // then typo-tolerant word prefixes. Synonym hits rank just below.
+    score(id, text, words, fuzzy) {
+      let best = null;
+      this.phrases[id].forEach(phrase => {
+        let score = 0;
+        if (phrase.text === text) {
+          score = 400;
+        } else if (phrase.text.startsWith(text)) {
+          score = 300;
+        } else if (words.every(word => phrase.words.some(candidate => candidate.startsWith(word)))) {
+          score = 200;
+        } else if (fuzzy) {
+          let distance = 0;
+          for (const word of words) {
+            const allowed = word.length <= 3 ? 0 : word.length <= 5 ? 1 : 2;
+            const closest = Math.min(...phrase.words.map(candidate => prefixDistance(word, candidate)));
+            if (closest > allowed) return;
+            distance += closest;
+          }
+          score = 100 - distance * 10;
+        }
+        if (score === 0) return;
+        if (phrase.alias) score -= 5;
+        if (!best || score > best.score) {
+          best = { id, name: this.names[id], alias: phrase.alias, score };
+        }
+      });
+      return best;
+    }
+
+    // Ranked matches for the search box; an empty query lists everything in order
+    search(query, { exclude = null, limit = Infinity } = {}) {
+      const text = foldText(query || '');
+      const allowed = id => !exclude || !exclude.has(id);
+      if (!text) {
+        return this.names
+          .map((name, id) => ({ id, name, alias: null, score: 0 }))
+          .filter(entry => allowed(entry.id))
+          .slice(0, limit);
+      }
+
+      const words = text.split(' ');
+      const results = new Map();
+      const lists = words.map(word => this.prefixes.get(word) || []);
+      lists.sort((a, b) => a.length - b.length);
+      // Posting lists are ascending, so each one is walked once
+      const cursors = lists.map(() => 0);
+      lists[0].forEach(id => {
+        for (let i = 1; i < lists.length; i++) {
+          while (cursors[i] < lists[i].length && lists[i][cursors[i]] < id) cursors[i]++;
+          if (lists[i][cursors[i]] !== id) return;
+        }
+        if (!allowed(id)) return;
+        const match = this.score(id, text, words, false);
+        if (match) results.set(id, match);
+      });
+
+      // Typo tolerance only when the prefix matches are thin
+      if (results.size < 10 && text.replace(/ /g, '').length >= 4) {
+        const overlaps = new Map();
+        words.forEach(word => {
+          const padded = '  ' + word;
+          for (let i = 0; i + 3 <= padded.length; i++) {
+            (this.trigrams.get(padded.slice(i, i + 3)) || []).forEach(id => {
+              overlaps.set(id, (overlaps.get(id) || 0) + 1);
+            });
+          }
+        });
+        const needed = Math.max(2, Math.ceil(words.reduce((sum, word) => sum + word.length, 0) / 3));
+        overlaps.forEach((overlap, id) => {
+          if (overlap < needed || results.has(id) || !allowed(id)) return;
+          const match = this.score(id, text, words, true);
+          if (match) results.set(id, match);
+        });
+      }
+
+      return [...results.values()]
+        .sort((a, b) => (b.score - a.score) || (a.name.length - b.name.length) || (a.id - b.id))
+        .slice(0, limit);
+    }
+
+    // Entries hidden by the allergies field: every word of an allergy has to
+    // be a whole word of the name or a synonym ("nut" hides neither "Nutmeg"
+    // nor "Coconut"). Computed once per allergies change, not per keystroke.
+    blockedBy(allergies) {
+      const blocked = new Set();
+      const terms = allergies
+        .map(allergy => foldText(allergy).split(' ').filter(Boolean).map(stemWord))
+        .filter(term => term.length > 0);
+      if (terms.length === 0) return blocked;
+      this.phrases.forEach((phrases, id) => {
+        const hit = phrases.some(phrase => {
+          const stems = phrase.words.map(stemWord);
+          return terms.some(term => term.every(word => stems.indexOf(word) !== -1));
+        });
+        if (hit) blocked.add(id);
+      });
+      return blocked;
+    }
+  }
+
+  function debounce(fn, wait) {
+    let timer = null;
+    const debounced = (...args) => {
+      clearTimeout(timer);
+      timer = setTimeout(() => fn(...args), wait);
+    };
+    debounced.cancel = () => clearTimeout(timer);
+    return debounced;
+  }
+
+  // Windowed rendering for CSS grids: only the rows near the viewport are in
+  // the DOM, and the container's padding stands in for the rows above and
+  // below. Row heights are measured once a row has been on screen and
+  // estimated until then. Scrolls and resizes re-render at most once a frame.
+  class VirtualGrid {
+    constructor(container, { renderItem, estimateHeight = 80, overscan = 600 }) {
+      this.container = container;
+      this.renderItem = renderItem;
+      this.estimateHeight = estimateHeight;
+      this.overscan = overscan;
+      this.items = [];
+      this.heights = [];
+      this.columns = 1;
+      this.gap = 0;
+      this.range = null;
+      this.rendered = [];
+      this.frame = null;
+
+      const style = getComputedStyle(container);
+      this.basePadding = {
+        top: parseFloat(style.paddingTop) || 0,
+        bottom: parseFloat(style.paddingBottom) || 0
+      };
+
+      this.schedule = this.schedule.bind(this);
+      window.addEventListener('scroll', this.schedule, { passive: true });
+      window.addEventListener('resize', this.schedule);
+      // Also catches the grid's page being shown and cards changing height
+      this.observer = typeof ResizeObserver !== 'undefined' ? new ResizeObserver(this.schedule) : null;
+      if (this.observer) this.observer.observe(container);
+    }
+
+    setItems(items) {
+      this.items = [...items];
+      this.heights = [];
+      this.range = null;
+      this.update();
+    }
+
+    // Measured heights stay valid when items are only added at the end
+    appendItems(items) {
+      this.items.push(...items);
+      this.range = null;
+      this.update();
+    }
+
+    schedule() {
+      if (this.frame !== null) return;
+      this.frame = requestAnimationFrame(() => {
+        this.frame = null;
+        this.update();
+      });
+    }
+
+    readLayout() {
+      const style = getComputedStyle(this.container);
+      const tracks = style.gridTemplateColumns;
+      const columns = tracks && tracks !== 'none' ? tracks.split(' ').filter(Boolean).length : 1;
+      if (columns !== this.columns) {
+        this.columns = columns;
+        this.heights = [];
+        this.range = null;
+      }
+      this.gap = parseFloat(style.rowGap) || 0;
+    }
+
+    // Heights include the row gap below, so offsets are plain sums
+    rowHeight(row) {
+      return this.heights[row] || this.estimateHeight + this.gap;
+    }
+
+    update() {
+      this.readLayout();
+      const rowCount = Math.ceil(this.items.length / this.columns);
+      const origin = this.container.getBoundingClientRect().top + this.basePadding.top;
+      const viewTop = -origin - this.overscan;
+      const viewBottom = -origin + window.innerHeight + this.overscan;
+
+      let start = 0;
+      let offset = 0;
+      while (start < rowCount && offset + this.rowHeight(start) <= viewTop) {
+        offset += this.rowHeight(start);
+        start++;
+      }
+      const above = offset;
+      let end = start;
+      while (end < rowCount && (end === start || offset < viewBottom)) {
+        offset += this.rowHeight(end);
+        end++;
+      }
+      let below = 0;
+      for (let row = end; row < rowCount; row++) {
+        below += this.rowHeight(row);
+      }
+
+      if (!this.range || this.range.start !== start || this.range.end !== end) {
+        this.range = { start, end };
+        this.rendered = [];
+        const last = Math.min(this.items.length, end * this.columns);
+        for (let i = start * this.columns; i < last; i++) {
+          this.rendered.push(this.renderItem(this.items[i], i));
+        }
+        reconcileChildren(this.container, this.rendered);
+      }
+      this.setPadding('paddingTop', this.basePadding.top + above);
+      this.setPadding('paddingBottom', this.basePadding.bottom + below);
+      this.measure();
+    }
+
+    setPadding(side, pixels) {
+      const value = `${Math.round(pixels)}px`;
+      if (this.container.style[side] !== value) this.container.style[side] = value;
+    }
+
+    // Rows stretch to their tallest cell, so a row's first cell gives its height
+    measure() {
+      let changed = false;
+      for (let i = 0; i < this.rendered.length; i += this.columns) {
+        const height = this.rendered[i].offsetHeight;
+        if (!height) continue;
+        const row = this.range.start + i / this.columns;
+        if (this.heights[row] !== height + this.gap) {
+          this.heights[row] = height + this.gap;
+          this.estimateHeight = height;
+          changed = true;
+        }
+      }
+      if (changed) this.schedule();
+    }
+
+    destroy() {
+      window.removeEventListener('scroll', this.schedule);
+      window.removeEventListener('resize', this.schedule);
+      if (this.observer) this.observer.disconnect();
+      if (this.frame !== null) cancelAnimationFrame(this.frame);
+    }
+  }
+
+  const ingredientIndex = new IngredientIndex(allIngredients, ingredientSynonyms);
+
   let selectedIngredients = [];
   let userAllergies = [];
+  let blockedIngredients = new Set();
+  let ingredientMatches = [];
   
   const ingredientOptions = document.getElementById('ingredientOptions');
   const selectedPills = document.getElementById('selectedIngredients');
   const searchInput = document.getElementById('ingredientSearch');
 
-  function renderIngredients(filterText = '') {
-    if (!ingredientOptions) return;
-    
-    ingredientOptions.innerHTML = '';
-    const filtered = allIngredients.filter(ingredient => 
-      ingredient.toLowerCase().includes(filterText.toLowerCase()) &&
-      !userAllergies.some(allergy => ingredient.toLowerCase().includes(allergy.toLowerCase()))
-    );
-    
-    filtered.forEach(ingredient => {
-      const div = document.createElement('div');
-      div.className = 'ingredient-option';
-      if (selectedIngredients.includes(ingredient)) {
-        div.classList.add('selected');
+  // Keyed rendering: one DOM node per ingredient and per pill, created once
+  // and reused. Renders move, add or drop only the nodes that changed, and a
+  // toggle touches just the clicked option and its pill.
+  const ingredientNodes = new Map();
+  const pillNodes = new Map();
+  let emptyPillsMessage = null;
+
+  function ingredientNode(ingredient) {
+    let node = ingredientNodes.get(ingredient);
+    if (!node) {
+      node = document.createElement('div');
+      node.className = 'ingredient-option';
+      node.dataset.ingredient = ingredient;
+      node.appendChild(document.createTextNode(ingredient));
+      ingredientNodes.set(ingredient, node);
+    }
+    return node;
+  }
+
+  // Synonym hint ("jeera" under Cumin), only while the query matched through it
+  function setAliasHint(node, alias) {
+    let hint = node.querySelector('.ingredient-alias');
+    if (!alias) {
+      if (hint) hint.remove();
+      return;
+    }
+    if (!hint) {
+      hint = document.createElement('span');
+      hint.className = 'ingredient-alias';
+      node.appendChild(hint);
+    }
+    if (hint.textContent !== alias) hint.textContent = alias;
+  }
+
+  // Make container's children exactly `nodes`, in order, reusing what is there
+  function reconcileChildren(container, nodes) {
+    let cursor = container.firstChild;
+    nodes.forEach(node => {
+      if (node === cursor) {
+        cursor = cursor.nextSibling;
+      } else {
+        container.insertBefore(node, cursor);
       }
-      div.textContent = ingredient;
-      div.addEventListener('click', () => toggleIngredient(ingredient));
-      ingredientOptions.appendChild(div);
     });
+    while (cursor) {
+      const next = cursor.nextSibling;
+      container.removeChild(cursor);
+      cursor = next;
+    }
+  }
+
+  // Only the options near the viewport are in the DOM, however long the list
+  const ingredientGrid = ingredientOptions ? new VirtualGrid(ingredientOptions, {
+    estimateHeight: 56,
+    renderItem: ({ name: ingredient, alias }) => {
+      const node = ingredientNode(ingredient);
+      node.classList.toggle('selected', selectedIngredients.includes(ingredient));
+      setAliasHint(node, alias);
+      return node;
+    }
+  }) : null;
+
+  function renderIngredients(filterText = '') {
+    if (!ingredientGrid) return;
+    
+    ingredientMatches = ingredientIndex.search(filterText, { exclude: blockedIngredients });
+    ingredientGrid.setItems(ingredientMatches);
   }
 
   function toggleIngredient(ingredient) {
-    if (selectedIngredients.includes(ingredient)) {
-      selectedIngredients = selectedIngredients.filter(i => i !== ingredient);
+    const position = selectedIngredients.indexOf(ingredient);
+    if (position !== -1) {
+      selectedIngredients.splice(position, 1);
+      removePill(ingredient);
     } else {
       selectedIngredients.push(ingredient);
+      addPill(ingredient);
     }
-    renderIngredients(searchInput ? searchInput.value : '');
-    renderSelectedPills();
+    const node = ingredientNodes.get(ingredient);
+    if (node) node.classList.toggle('selected', position === -1);
+    localEngine.cancel();
     saveUserPreferences();
   }
 
+  function pillNode(ingredient) {
+    let pill = pillNodes.get(ingredient);
+    if (!pill) {
+      pill = document.createElement('div');
+      pill.className = 'pill';
+      pill.dataset.ingredient = ingredient;
+      pill.appendChild(document.createTextNode(ingredient + ' '));
+      const removeBtn = document.createElement('span');
+      removeBtn.className = 'remove-btn';
+      removeBtn.innerHTML = '&times;';
+      pill.appendChild(removeBtn);
+      pillNodes.set(ingredient, pill);
+    }
+    return pill;
+  }
+
+  function showEmptyPillsMessage(show) {
+    if (!emptyPillsMessage) {
+      emptyPillsMessage = document.createElement('p');
+      emptyPillsMessage.style.cssText = 'color: #666; font-style: italic; text-align: center; padding: 2rem;';
+      emptyPillsMessage.textContent = 'No ingredients selected yet. Click on ingredients above to start!';
+    }
+    if (show && !emptyPillsMessage.parentNode) {
+      selectedPills.appendChild(emptyPillsMessage);
+    } else if (!show && emptyPillsMessage.parentNode) {
+      emptyPillsMessage.remove();
+    }
+  }
+
+  function addPill(ingredient) {
+    if (!selectedPills) return;
+    showEmptyPillsMessage(false);
+    selectedPills.appendChild(pillNode(ingredient));
+  }
+
+  function removePill(ingredient) {
+    if (!selectedPills) return;
+    const pill = pillNodes.get(ingredient);
+    if (pill) {
+      pill.remove();
+      pillNodes.delete(ingredient);
+    }
+    if (selectedIngredients.length === 0) showEmptyPillsMessage(true);
+  }
+
+  // Full sync of the pills with selectedIngredients (load and clear)
   function renderSelectedPills() {
     if (!selectedPills) return;
     
-    selectedPills.innerHTML = '';
-    
     if (selectedIngredients.length === 0) {
-      selectedPills.innerHTML = '<p style="color: #666; font-style: italic; text-align: center; padding: 2rem;">No ingredients selected yet. Click on ingredients above to start!</p>';
+      pillNodes.clear();
+      reconcileChildren(selectedPills, []);
+      showEmptyPillsMessage(true);
       return;
     }
     
-    selectedIngredients.forEach(ingredient => {
-      const pill = document.createElement('div');
-      pill.className = 'pill';
-      pill.innerHTML = `
-        ${ingredient}
-        <span class="remove-btn" onclick="removeIngredient('${ingredient}')">&times;</span>
-      `;
-      selectedPills.appendChild(pill);
+    const selected = new Set(selectedIngredients);
+    [...pillNodes.keys()].forEach(ingredient => {
+      if (!selected.has(ingredient)) pillNodes.delete(ingredient);
+    });
+    reconcileChildren(selectedPills, selectedIngredients.map(pillNode));
+  }
+
+  // One delegated listener per container instead of one per element
+  if (ingredientOptions) {
+    ingredientOptions.addEventListener('click', (e) => {
+      const option = e.target.closest('.ingredient-option');
+      if (option && ingredientOptions.contains(option)) {
+        toggleIngredient(option.dataset.ingredient);
+      }
+    });
+  }
+
+  if (selectedPills) {
+    selectedPills.addEventListener('click', (e) => {
+      const removeBtn = e.target.closest('.remove-btn');
+      const pill = removeBtn && removeBtn.closest('.pill');
+      if (pill && selectedPills.contains(pill)) {
+        toggleIngredient(pill.dataset.ingredient);
+      }
     });
   }
 
@@ -170,8 +629,24 @@ document.addEventListener('DOMContentLoaded', () => {
   };
 
   if (searchInput) {
+    // Re-rank once typing pauses rather than on every keystroke
+    const renderSearch = debounce(value => renderIngredients(value), 120);
     searchInput.addEventListener('input', (e) => {
-      renderIngredients(e.target.value);
+      renderSearch(e.target.value);
+    });
+
+    // Enter picks the top suggestion and clears the box for the next one
+    searchInput.addEventListener('keydown', (e) => {
+      if (e.key !== 'Enter') return;
+      e.preventDefault();
+      renderSearch.cancel();
+      const [top] = ingredientIndex.search(searchInput.value, { exclude: blockedIngredients, limit: 1 });
+      if (!top) return;
+      searchInput.value = '';
+      if (!selectedIngredients.includes(top.name)) {
+        toggleIngredient(top.name);
+      }
+      renderIngredients();
     });
   }
 
@@ -282,6 +757,277 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   ];
 
+  // Local recipe engine (recipe-engine.js), loaded and indexed on first offline
+  // search. It runs in a Web Worker that fetches and indexes the corpus once and
+  // answers queries by message, so ranking a large corpus never blocks the
+  // page; without Worker support it runs here instead.
+  const RECIPE_ENGINE_URL = 'recipe-engine.js';
+  let localIndexPromise = null;
+
+  // Corpus prebuilt by build_corpus.py, if the deployment ships one
+  async function loadPackedIndex(engine) {
+    const [indexResponse, recipesResponse] = await Promise.all([
+      fetch('recipe-index.json'),
+      fetch('local-recipes.json')
+    ]);
+    if (!indexResponse.ok || !recipesResponse.ok) {
+      throw new Error('No prebuilt recipe corpus');
+    }
+    return engine.RecipeIndex.fromPacked(await indexResponse.json(), await recipesResponse.json());
+  }
+
+  function getLocalIndex() {
+    if (!localIndexPromise) {
+      localIndexPromise = new Promise((resolve, reject) => {
+        if (window.RecipeEngine) return resolve(window.RecipeEngine);
+        const script = document.createElement('script');
+        script.src = RECIPE_ENGINE_URL;
+        script.onload = () => resolve(window.RecipeEngine);
+        script.onerror = () => reject(new Error('recipe-engine.js failed to load'));
+        document.head.appendChild(script);
+      })
+        .then(engine => loadPackedIndex(engine).catch(() => engine.RecipeIndex.build(demoRecipes)))
+        .catch(error => {
+          localIndexPromise = null;
+          throw error;
+        });
+    }
+    return localIndexPromise;
+  }
+
+  function cancelledError() {
+    const error = new Error('Local search cancelled');
+    error.name = 'AbortError';
+    return error;
+  }
+
+  // Main-thread end of the worker protocol (see serveWorker in recipe-engine.js).
+  // One query is in flight at a time; starting another, or cancel(), rejects
+  // the previous one with an AbortError and tells the worker to drop it.
+  class LocalEngine {
+    constructor() {
+      this.worker = null;
+      this.pending = new Map();
+      this.current = 0;
+      this.nextId = 0;
+    }
+
+    startWorker() {
+      if (this.worker || typeof Worker === 'undefined') return this.worker;
+      try {
+        this.worker = new Worker(RECIPE_ENGINE_URL);
+      } catch (error) {
+        console.log('❌ Recipe worker unavailable:', error.message);
+        return null;
+      }
+      this.worker.onmessage = ({ data }) => this.receive(data);
+      this.worker.onerror = (event) => {
+        console.log('❌ Recipe worker failed:', event.message);
+        this.stopWorker(new Error('Recipe worker failed'));
+      };
+      this.worker.postMessage({ type: 'load', fallback: demoRecipes });
+      return this.worker;
+    }
+
+    stopWorker(error) {
+      if (this.worker) this.worker.terminate();
+      this.worker = null;
+      this.pending.forEach(({ reject }) => reject(error));
+      this.pending.clear();
+    }
+
+    receive(message) {
+      const request = this.pending.get(message.id);
+      if (!request) return;
+      this.pending.delete(message.id);
+      if (message.type === 'result') {
+        request.resolve(message.result);
+      } else if (message.type === 'cancelled') {
+        request.reject(cancelledError());
+      } else {
+        request.reject(new Error(message.message || 'Local search failed'));
+      }
+    }
+
+    // {matched, recipes} for {selections, diet, allergies, limit}
+    async search(query) {
+      this.cancel();
+      const id = ++this.nextId;
+      this.current = id;
+      if (!this.startWorker()) {
+        const localIndex = await getLocalIndex();
+        if (id !== this.current) throw cancelledError();
+        return window.RecipeEngine.runQuery(localIndex, query, demoRecipes);
+      }
+      return new Promise((resolve, reject) => {
+        this.pending.set(id, { resolve, reject });
+        this.worker.postMessage({ type: 'search', id, query });
+      });
+    }
+
+    cancel() {
+      const id = this.current;
+      this.current = 0;
+      const request = this.pending.get(id);
+      if (!request) return;
+      this.pending.delete(id);
+      this.worker.postMessage({ type: 'cancel', id });
+      request.reject(cancelledError());
+    }
+  }
+
+  const localEngine = new LocalEngine();
+
+  // POST /generate-recipe and read the NDJSON stream, handing each recipe to
+  // onRecipe as soon as it arrives. A plain JSON reply (older server, or no
+  // stream support in the browser) is handled the same way, all at once.
+  async function fetchRecipePage(body, onRecipe, onResponse = () => {}) {
+    const response = await fetch('/generate-recipe', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'application/x-ndjson, application/json'
+      },
+      body: JSON.stringify(body)
+    });
+    onResponse(response);
+    if (!response.ok) {
+      throw new Error(`API response status: ${response.status}`);
+    }
+
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!contentType.includes('ndjson') || !response.body || typeof TextDecoder === 'undefined') {
+      const data = await response.json();
+      (data.recipes || []).forEach(onRecipe);
+      return data;
+    }
+
+    const page = { recipes: [] };
+    const handleLine = line => {
+      if (!line.trim()) return;
+      const { type, recipe, ...meta } = JSON.parse(line);
+      if (type === 'recipe') {
+        page.recipes.push(recipe);
+        onRecipe(recipe);
+      } else if (type === 'done') {
+        Object.assign(page, meta);
+      }
+    };
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffered += decoder.decode(value || new Uint8Array(0), { stream: !done });
+      const lines = buffered.split('\\n');
+      buffered = lines.pop();
+      lines.forEach(handleLine);
+      if (done) break;
+    }
+    handleLine(buffered);
+    return page;
+  }
+
+  // Timing of one search with the User Timing API: marks at request start,
+  // first byte, first card painted and render done, each also measured from
+  // the start. The durations are beaconed to POST /perf when rendering is done.
+  const TIMING_STEPS = { 'first-byte': 'ttfb', 'first-card': 'firstCard', 'render-done': 'renderDone' };
+  const hasUserTiming = typeof performance !== 'undefined' &&
+    typeof performance.mark === 'function' && typeof performance.measure === 'function';
+
+  class SearchTiming {
+    constructor(id) {
+      this.prefix = `smarty-chef:search-${id}`;
+      this.source = 'api';
+      this.durations = {};
+      this.startedAt = this.mark('start');
+    }
+
+    mark(step) {
+      if (!hasUserTiming) return Date.now();
+      performance.mark(`${this.prefix}:${step}`);
+      return performance.now();
+    }
+
+    // Each step is recorded once, the first time it happens
+    step(step) {
+      const metric = TIMING_STEPS[step];
+      if (this.durations[metric] !== undefined) return;
+      this.durations[metric] = Math.round(this.mark(step) - this.startedAt);
+      if (hasUserTiming) {
+        performance.measure(`smarty-chef:${step}`, `${this.prefix}:start`, `${this.prefix}:${step}`);
+      }
+    }
+
+    // A frame callback runs before that frame paints; the task after it runs once it has
+    afterPaint(step, then = () => {}) {
+      requestAnimationFrame(() => setTimeout(() => {
+        this.step(step);
+        then();
+      }, 0));
+    }
+
+    finish() {
+      this.afterPaint('render-done', () => this.send());
+    }
+
+    send() {
+      if (hasUserTiming) {
+        ['start', ...Object.keys(TIMING_STEPS)].forEach(step => performance.clearMarks(`${this.prefix}:${step}`));
+        Object.keys(TIMING_STEPS).forEach(step => performance.clearMeasures(`smarty-chef:${step}`));
+      }
+      if (typeof navigator === 'undefined' || typeof navigator.sendBeacon !== 'function') return;
+      const report = JSON.stringify({ source: this.source, timings: this.durations });
+      navigator.sendBeacon('/perf', new Blob([report], { type: 'application/json' }));
+    }
+  }
+
+  function showSearchProgress(title, detail) {
+    showRecipesMessage(`<div class="loading">🔍 <br><h3>${title}</h3><p>${detail}</p></div>`);
+  }
+
+  // Bumped per search so a slower, older stream never writes into newer results
+  let searchGeneration = 0;
+  let nextPageRequest = null;
+  let loadMoreBtn = null;
+
+  // "More recipes" asks for the next page at the cursor the server returned
+  function setNextPage(request) {
+    nextPageRequest = request;
+    if (!request) {
+      if (loadMoreBtn) loadMoreBtn.remove();
+      return;
+    }
+    if (!loadMoreBtn) {
+      loadMoreBtn = document.createElement('button');
+      loadMoreBtn.className = 'btn-secondary load-more';
+      loadMoreBtn.addEventListener('click', loadMoreRecipes);
+    }
+    loadMoreBtn.disabled = false;
+    loadMoreBtn.textContent = '🍽️ More recipes';
+    if (recipesDiv) recipesDiv.appendChild(loadMoreBtn);
+  }
+
+  async function loadMoreRecipes() {
+    const request = nextPageRequest;
+    if (!request) return;
+    const generation = searchGeneration;
+    loadMoreBtn.disabled = true;
+    loadMoreBtn.textContent = '⏳ Loading more recipes...';
+    try {
+      const page = await fetchRecipePage(request, recipe => {
+        if (generation === searchGeneration) appendRecipes([recipe]);
+      });
+      if (generation !== searchGeneration) return;
+      setNextPage(page.hasMore ? { ...request, offset: page.nextOffset } : null);
+    } catch (error) {
+      if (generation !== searchGeneration) return;
+      showNotification('❌ Could not load more recipes, try again', 'error');
+      setNextPage(request);
+    }
+  }
+
   // Recipe generation with Spoonacular API integration
   const generateBtn = document.getElementById('generateBtn');
   const saveAllBtn = document.getElementById('saveAllBtn');
@@ -300,185 +1046,690 @@ document.addEventListener('DOMContentLoaded', () => {
       const diet = dietSelect ? dietSelect.value : '';
       const allergies = allergiesInput ? allergiesInput.value : '';
       
-      if (recipesDiv) {
-        recipesDiv.innerHTML = '<div class="loading">🔍 <br><h3>Searching for delicious recipes...</h3><p>Using your selected ingredients with Spoonacular API</p></div>';
-      }
+      showSearchProgress('Searching for delicious recipes...', 'Sending your ingredients to the recipe server');
 
       console.log('Generating recipes for:', selectedIngredients, 'Diet:', diet, 'Allergies:', allergies);
 
+      // Summary cards only; the rest is fetched when a card is expanded
+      const request = { ingredients: [...selectedIngredients], dietaryPreference: diet, allergies: allergies, fields: 'summary' };
+      const generation = ++searchGeneration;
+      const timing = new SearchTiming(generation);
       let recipes = [];
       let apiSuccess = false;
 
-      // Try Spoonacular API first
+      // Try Spoonacular API first; cards appear as the server streams them
       try {
-        const response = await fetch('/generate-recipe', {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify({
-            ingredients: selectedIngredients,
-            dietaryPreference: diet,
-            allergies: allergies
-          })
+        const page = await fetchRecipePage({ ...request, offset: 0 }, recipe => {
+          if (generation !== searchGeneration) return;
+          if (recipes.length === 0) {
+            displayRecipes([recipe], true);
+            timing.afterPaint('first-card');
+          } else {
+            appendRecipes([recipe]);
+          }
+          recipes.push(recipe);
+        }, response => {
+          timing.step('first-byte');
+          if (generation === searchGeneration && response.ok && recipes.length === 0) {
+            showSearchProgress('Recipes are on their way...', 'Matching recipes to your ingredients and preferences');
+          }
         });
+        if (generation !== searchGeneration) return;
 
-        if (response.ok) {
-          const data = await response.json();
-          recipes = data.recipes || [];
-          if (recipes.length > 0) {
-            apiSuccess = true;
-            console.log('✅ Spoonacular API recipes received:', recipes.length);
-          }
-        } else {
-          throw new Error(`API response status: ${response.status}`);
+        if (recipes.length > 0) {
+          apiSuccess = true;
+          console.log('✅ Spoonacular API recipes received:', recipes.length);
+          setNextPage(page.hasMore ? { ...request, offset: page.nextOffset } : null);
         }
         
       } catch (error) {
-        console.log('❌ API call failed, using demo recipes:', error.message);
-        apiSuccess = false;
-        
-        // Smart recipe matching for demo recipes
-        recipes = demoRecipes.filter(recipe => {
-          return selectedIngredients.some(selected => 
-            recipe.ingredients.some(ingredient => 
-              ingredient.toLowerCase().includes(selected.toLowerCase()) ||
-              selected.toLowerCase().includes(ingredient.toLowerCase()) ||
-              recipe.title.toLowerCase().includes(selected.toLowerCase())
-            )
-          );
-        });
-
-        // If no matches, show all demo recipes
-        if (recipes.length === 0) {
-          recipes = demoRecipes;
-        }
+        if (generation !== searchGeneration) return;
+        console.log('❌ API call failed:', error.message);
+        // Keep whatever already streamed in before the connection dropped
+        apiSuccess = recipes.length > 0;
+      }
 
-        // Apply dietary filter
-        if (diet && recipes.length > 0) {
-          const filteredRecipes = recipes.filter(recipe => 
-            recipe.dietary_labels.some(label => 
-              label.toLowerCase().includes(diet.toLowerCase().replace('-', ' '))
-            )
-          );
-          if (filteredRecipes.length > 0) {
-            recipes = filteredRecipes;
+      if (!apiSuccess) {
+        console.log('❌ API call failed, using demo recipes');
+        timing.source = 'offline';
+        showSearchProgress('Searching offline recipes...', 'No live results right now, so recipes on this device are used');
+        
+        // Ranked matching through the local ingredient index, with the diet and
+        // allergy filters applied as bitmask tests inside the index scan; demo
+        // recipes (diet-filtered) when nothing matches
+        try {
+          const result = await localEngine.search({
+            selections: [...selectedIngredients], diet, allergies, limit: 3
+          });
+          recipes = result.recipes;
+        } catch (engineError) {
+          if (engineError.name === 'AbortError') {
+            // The selection changed while the worker was busy
+            if (generation === searchGeneration) {
+              showRecipesMessage('<div class="loading"><h3>Selection changed</h3><p>Generate again to search with it</p></div>');
+            }
+            return;
           }
+          console.log('❌ Local recipe engine unavailable:', engineError.message);
+          recipes = demoRecipes.slice(0, 3);
         }
+        if (generation !== searchGeneration) return;
 
-        recipes = recipes.slice(0, 3); // Limit to 3 demo recipes
+        displayRecipes(recipes, false);
+        timing.afterPaint('first-card');
       }
 
-      // Display recipes after a short delay for better UX
-      setTimeout(() => {
-        displayRecipes(recipes, apiSuccess);
-        if (apiSuccess) {
-          showNotification('🎉 Fresh recipes from Spoonacular!', 'success');
-        } else {
-          showNotification('📱 Showing demo recipes - Start server for live API!', 'info');
-        }
-      }, 1500);
+      timing.finish();
+      if (apiSuccess) {
+        showNotification('🎉 Fresh recipes from Spoonacular!', 'success');
+      } else {
+        showNotification('📱 Showing demo recipes - Start server for live API!', 'info');
+      }
     });
   }
 
-  if (saveAllBtn) {
-    saveAllBtn.addEventListener('click', () => {
-      const recipeCards = document.querySelectorAll('.recipe-card');
-      if (recipeCards.length === 0) {
-        showNotification('📋 No recipes to save! Generate some first.', 'warning');
-        return;
-      }
+  // Saved recipes live in IndexedDB, one record per recipe keyed by its ID (or
+  // title, for recipes without one), so saving writes only those recipes and
+  // saving the same recipe twice keeps one copy. Indexed by save date,
+  // ingredient term and dietary label.
+  const COOKBOOK_DB = 'smarty-chef-cookbook';
+  const COOKBOOK_DB_VERSION = 1;
+  const COOKBOOK_STORE = 'recipes';
+  const LEGACY_SAVED_KEY = 'smarty_chef_saved_recipes';
+
+  function cookbookKey(recipe) {
+    const hasId = recipe.id !== undefined && recipe.id !== null && recipe.id !== '';
+    return hasId ? `id:${recipe.id}` : `title:${foldText(recipe.title || '')}`;
+  }
 
-      const recipes = [];
-      recipeCards.forEach(card => {
-        const title = card.querySelector('h3')?.textContent || '';
-        const description = card.querySelector('p')?.textContent || '';
-        const ingredients = Array.from(card.querySelectorAll('ul li')).map(li => li.textContent);
-        const instructions = Array.from(card.querySelectorAll('ol li')).map(li => li.textContent);
-        
-        if (title) {
-          recipes.push({ 
-            title, 
-            description, 
-            ingredients, 
-            instructions, 
-            savedAt: new Date().toISOString(),
-            savedIngredients: [...selectedIngredients]
-          });
+  // Stemmed words of a text, without numbers, units and preparation words
+  function textTerms(text) {
+    return foldText(text).split(' ')
+      .filter(word => word.length > 2 && !/[0-9]/.test(word) && !STOP_WORDS.has(word))
+      .map(stemWord);
+  }
+
+  // Words of the ingredient lines plus the picker names the recipe was found with
+  function ingredientTerms(ingredients, savedIngredients) {
+    const terms = new Set(savedIngredients.map(name => stemWord(foldText(name))));
+    ingredients.forEach(line => textTerms(line).forEach(term => terms.add(term)));
+    return [...terms];
+  }
+
+  function cookbookRecord(recipe, savedIngredients = [], savedAt = new Date().toISOString()) {
+    const ingredients = [...(recipe.ingredients || [])];
+    const dietaryLabels = [...(recipe.dietary_labels || [])];
+    return {
+      key: cookbookKey(recipe),
+      id: recipe.id !== undefined ? recipe.id : null,
+      title: recipe.title,
+      description: recipe.description || '',
+      ingredients,
+      instructions: [...(recipe.instructions || [])],
+      time: recipe.time || '',
+      servings: recipe.servings || '',
+      image: recipe.image || '',
+      sourceUrl: recipe.sourceUrl || '',
+      dietary_labels: dietaryLabels,
+      savedAt,
+      savedIngredients: [...savedIngredients],
+      // Index fields
+      labels: [...new Set(dietaryLabels.map(label => foldText(label)))],
+      ingredientTerms: ingredientTerms(ingredients, savedIngredients),
+      searchTerms: searchTermsFor(recipe)
+    };
+  }
+
+  // Weighted search terms of a recipe: a word in the title counts most, then
+  // ingredients, then instructions
+  function searchTermsFor(recipe) {
+    const terms = {};
+    const addTerms = (texts, weight) => texts.forEach(text => textTerms(text).forEach(term => {
+      terms[term] = Math.max(terms[term] || 0, weight);
+    }));
+    addTerms(recipe.instructions || [], 1);
+    addTerms(recipe.ingredients || [], 2);
+    addTerms([recipe.title || ''], 3);
+    return terms;
+  }
+
+  // Full-text index over the saved cookbook, built once from the terms stored
+  // with each record and patched as recipes are saved or removed. Each term
+  // maps to the recipes containing it, so a query costs one lookup per word
+  // (a prefix range for the word still being typed) instead of a scan.
+  class CookbookIndex {
+    constructor() {
+      this.records = new Map();
+      this.postings = new Map();
+      this.terms = null;
+    }
+
+    add(record) {
+      this.remove(record.key);
+      const terms = record.searchTerms || searchTermsFor(record);
+      this.records.set(record.key, { record, terms });
+      Object.keys(terms).forEach(term => {
+        let list = this.postings.get(term);
+        if (!list) {
+          list = new Map();
+          this.postings.set(term, list);
+          this.terms = null;
         }
+        list.set(record.key, terms[term]);
       });
+    }
 
-      if (recipes.length > 0) {
-        const existingSaved = JSON.parse(localStorage.getItem('smarty_chef_saved_recipes') || '[]');
-        const allRecipes = [...existingSaved, ...recipes];
-        
-        localStorage.setItem('smarty_chef_saved_recipes', JSON.stringify(allRecipes));
-        showNotification(`💾 Saved ${recipes.length} recipe(s) to your cookbook!`, 'success');
+    remove(key) {
+      const entry = this.records.get(key);
+      if (!entry) return;
+      this.records.delete(key);
+      Object.keys(entry.terms).forEach(term => {
+        const list = this.postings.get(term);
+        list.delete(key);
+        if (list.size === 0) {
+          this.postings.delete(term);
+          this.terms = null;
+        }
+      });
+    }
+
+    get size() {
+      return this.records.size;
+    }
+
+    // Recipes with a term starting with prefix, each with its best weight. The
+    // sorted term list is kept until the vocabulary changes.
+    prefixMatches(prefix) {
+      if (!this.terms) this.terms = [...this.postings.keys()].sort();
+      let low = 0;
+      let high = this.terms.length;
+      while (low < high) {
+        const middle = (low + high) >> 1;
+        if (this.terms[middle] < prefix) low = middle + 1; else high = middle;
       }
-    });
+      const matches = new Map();
+      for (let i = low; i < this.terms.length && this.terms[i].startsWith(prefix); i++) {
+        this.postings.get(this.terms[i]).forEach((weight, key) => {
+          matches.set(key, Math.max(matches.get(key) || 0, weight));
+        });
+      }
+      return matches;
+    }
+
+    // Recipes containing every query word, best matches first (newest first on
+    // ties). The last word matches as a prefix. An empty query lists the newest.
+    search(query, limit = 20) {
+      const words = textTerms(query || '');
+      let ranked;
+      if (words.length === 0) {
+        ranked = [...this.records.values()].map(entry => ({ record: entry.record, score: 0 }));
+      } else {
+        const lists = words.map((word, i) => i === words.length - 1
+          ? this.prefixMatches(word)
+          : this.postings.get(word) || new Map());
+        lists.sort((a, b) => a.size - b.size);
+        ranked = [];
+        lists[0].forEach((weight, key) => {
+          let score = weight;
+          for (let i = 1; i < lists.length; i++) {
+            const other = lists[i].get(key);
+            if (other === undefined) return;
+            score += other;
+          }
+          ranked.push({ record: this.records.get(key).record, score });
+        });
+      }
+      const newer = (a, b) => (a.savedAt < b.savedAt ? 1 : a.savedAt > b.savedAt ? -1 : 0);
+      ranked.sort((a, b) => b.score - a.score || newer(a.record, b.record));
+      return { total: ranked.length, recipes: ranked.slice(0, limit).map(match => match.record) };
+    }
   }
 
-  if (clearBtn) {
-    clearBtn.addEventListener('click', () => {
-      selectedIngredients = [];
-      renderIngredients();
-      renderSelectedPills();
-      if (recipesDiv) recipesDiv.innerHTML = '';
-      if (searchInput) searchInput.value = '';
-      showNotification('🗑️ Selection cleared!', 'info');
+  function idbResult(request) {
+    return new Promise((resolve, reject) => {
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
     });
   }
 
+  class Cookbook {
+    constructor(name = COOKBOOK_DB) {
+      this.name = name;
+      this.dbPromise = null;
+      this.indexPromise = null;
+    }
+
+    open() {
+      if (!this.dbPromise) {
+        this.dbPromise = new Promise((resolve, reject) => {
+          if (typeof indexedDB === 'undefined') {
+            throw new Error('IndexedDB is not available');
+          }
+          const request = indexedDB.open(this.name, COOKBOOK_DB_VERSION);
+          request.onupgradeneeded = () => {
+            const store = request.result.createObjectStore(COOKBOOK_STORE, { keyPath: 'key' });
+            store.createIndex('savedAt', 'savedAt');
+            store.createIndex('ingredient', 'ingredientTerms', { multiEntry: true });
+            store.createIndex('label', 'labels', { multiEntry: true });
+          };
+          request.onsuccess = () => resolve(request.result);
+          request.onerror = () => reject(request.error);
+        })
+          .then(db => this.migrate(db).then(() => db))
+          .catch(error => {
+            this.dbPromise = null;
+            throw error;
+          });
+      }
+      return this.dbPromise;
+    }
+
+    // One-time move of the old localStorage array; the key is removed once
+    // its recipes are committed
+    async migrate(db) {
+      const legacy = localStorage.getItem(LEGACY_SAVED_KEY);
+      if (legacy === null) return;
+      let recipes = [];
+      try {
+        recipes = JSON.parse(legacy);
+      } catch (error) {
+        console.warn('⚠️ Dropping unreadable saved recipes:', error.message);
+      }
+      const records = (Array.isArray(recipes) ? recipes : [])
+        .filter(recipe => recipe && recipe.title)
+        .map(recipe => cookbookRecord(recipe, recipe.savedIngredients || [], recipe.savedAt || new Date().toISOString()));
+      const added = await this.write(db, records);
+      localStorage.removeItem(LEGACY_SAVED_KEY);
+      console.log(`📦 Moved ${added} saved recipe(s) to IndexedDB`);
+    }
+
+    // Insert or update records in one transaction; a recipe saved before keeps
+    // its first save date. Resolves with the number of new recipes.
+    write(db, records) {
+      const unique = new Map();
+      records.forEach(record => {
+        const first = unique.get(record.key);
+        unique.set(record.key, first ? { ...record, savedAt: first.savedAt } : record);
+      });
+      return new Promise((resolve, reject) => {
+        const transaction = db.transaction(COOKBOOK_STORE, 'readwrite');
+        const store = transaction.objectStore(COOKBOOK_STORE);
+        let added = 0;
+        unique.forEach(record => {
+          const existing = store.get(record.key);
+          existing.onsuccess = () => {
+            if (existing.result) {
+              record.savedAt = existing.result.savedAt;
+            } else {
+              added++;
+            }
+            store.put(record);
+          };
+        });
+        transaction.oncomplete = () => {
+          this.updateIndex(index => unique.forEach(record => index.add(record)));
+          resolve(added);
+        };
+        transaction.onerror = () => reject(transaction.error);
+        transaction.onabort = () => reject(transaction.error);
+      });
+    }
+
+    // Full-text index, loaded with the first search and then kept in step
+    // with every write instead of being rebuilt
+    searchIndex() {
+      if (!this.indexPromise) {
+        this.indexPromise = this.all()
+          .then(records => {
+            const index = new CookbookIndex();
+            records.forEach(record => index.add(record));
+            return index;
+          })
+          .catch(error => {
+            this.indexPromise = null;
+            throw error;
+          });
+      }
+      return this.indexPromise;
+    }
+
+    updateIndex(update) {
+      if (this.indexPromise) this.indexPromise.then(update, () => {});
+    }
+
+    async search(query, limit) {
+      const index = await this.searchIndex();
+      return index.search(query, limit);
+    }
+
+    async save(recipes, savedIngredients = []) {
+      const db = await this.open();
+      return this.write(db, recipes.map(recipe => cookbookRecord(recipe, savedIngredients)));
+    }
+
+    async query(indexName, range, { direction = 'next', limit = Infinity } = {}) {
+      const db = await this.open();
+      return new Promise((resolve, reject) => {
+        const source = db.transaction(COOKBOOK_STORE).objectStore(COOKBOOK_STORE);
+        const request = (indexName ? source.index(indexName) : source).openCursor(range, direction);
+        const results = [];
+        request.onsuccess = () => {
+          const cursor = request.result;
+          if (!cursor || results.length >= limit) return resolve(results);
+          results.push(cursor.value);
+          cursor.continue();
+        };
+        request.onerror = () => reject(request.error);
+      });
+    }
+
+    all() {
+      return this.query(null);
+    }
+
+    recent(limit = 20) {
+      return this.query('savedAt', null, { direction: 'prev', limit });
+    }
+
+    withIngredient(name) {
+      return this.query('ingredient', IDBKeyRange.only(stemWord(foldText(name))));
+    }
+
+    withLabel(label) {
+      return this.query('label', IDBKeyRange.only(foldText(label)));
+    }
+
+    async count() {
+      const db = await this.open();
+      return idbResult(db.transaction(COOKBOOK_STORE).objectStore(COOKBOOK_STORE).count());
+    }
+
+    async remove(key) {
+      const db = await this.open();
+      const transaction = db.transaction(COOKBOOK_STORE, 'readwrite');
+      transaction.objectStore(COOKBOOK_STORE).delete(key);
+      return new Promise((resolve, reject) => {
+        transaction.oncomplete = () => {
+          this.updateIndex(index => index.remove(key));
+          resolve();
+        };
+        transaction.onerror = () => reject(transaction.error);
+      });
+    }
+  }
+
+  const cookbook = new Cookbook();
+
+  if (saveAllBtn) {
+    saveAllBtn.addEventListener('click', async () => {
+      // Saved from the data, since off-screen cards are not in the DOM
+      if (displayedRecipes.length === 0) {
+        showNotification('📋 No recipes to save! Generate some first.', 'warning');
+        return;
+      }
+
+      // Summary results need their ingredients and instructions first
+      const loaded = await Promise.all(displayedRecipes.map(recipe =>
+        loadRecipeDetails(recipe).catch(() => recipe)
+      ));
+      const recipes = loaded.filter(recipe => recipe.title);
+      if (recipes.length === 0) return;
+
+      try {
+        const added = await cookbook.save(recipes, selectedIngredients);
+        if (added > 0) {
+          showNotification(`💾 Saved ${added} recipe(s) to your cookbook!`, 'success');
+        } else {
+          showNotification('📖 These recipes are already in your cookbook', 'info');
+        }
+        renderCookbook();
+      } catch (error) {
+        console.error('Error saving recipes:', error);
+        showNotification('❌ Could not save to your cookbook', 'error');
+      }
+    });
+  }
+
+  if (clearBtn) {
+    clearBtn.addEventListener('click', () => {
+      localEngine.cancel();
+      selectedIngredients = [];
+      renderIngredients();
+      renderSelectedPills();
+      showRecipesMessage('');
+      if (searchInput) searchInput.value = '';
+      showNotification('🗑️ Selection cleared!', 'info');
+    });
+  }
+
+  // Results are windowed like the ingredient grid; cards are built on first view
+  let recipeGrid = null;
+  let displayedRecipes = [];
+
+  function showRecipesMessage(html) {
+    if (recipeGrid) {
+      recipeGrid.destroy();
+      recipeGrid = null;
+    }
+    displayedRecipes = [];
+    nextPageRequest = null;
+    if (recipesDiv) recipesDiv.innerHTML = html;
+  }
+
+  function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, char => ({
+      '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[char]);
+  }
+
+  // Spoonacular serves every recipe image in fixed sizes ("…/716429-556x370.jpg"),
+  // so the browser can pick the smallest one that fills the thumbnail
+  const RECIPE_IMAGE_SIZES = ['240x150', '312x231', '480x360', '636x393'];
+
+  function recipeImageHtml(recipe) {
+    if (!recipe.image) return '';
+    const src = String(recipe.image);
+    const sized = /spoonacular\\.com\\//.test(src) && src.match(/^(.+-)\\d+x\\d+(\\.\\w+)$/);
+    const srcset = sized
+      ? RECIPE_IMAGE_SIZES.map(size => `${sized[1]}${size}${sized[2]} ${size.split('x')[0]}w`).join(', ')
+      : '';
+    return `<img class="recipe-thumb" src="${escapeHtml(sized ? `${sized[1]}312x231${sized[2]}` : src)}"
+      ${srcset ? `srcset="${escapeHtml(srcset)}" sizes="(max-width: 768px) calc(100vw - 4rem), 400px"` : ''}
+      width="312" height="231" loading="lazy" decoding="async" alt="${escapeHtml(recipe.title || 'Recipe photo')}">`;
+  }
+
+  // Summary first: photo, title and meta. Description, ingredients and
+  // instructions are only rendered when the card is expanded.
+  function createRecipeCard(recipe, index) {
+    const card = document.createElement('div');
+    card.className = 'recipe-card';
+    card.dataset.index = index;
+    card.style.animationDelay = `${index * 0.1}s`;
+    
+    const dietaryLabels = Array.isArray(recipe.dietary_labels) 
+      ? recipe.dietary_labels.join(' • ') 
+      : '';
+    
+    const metaInfo = [dietaryLabels, recipe.servings ? `Serves ${recipe.servings}` : '', recipe.time || ''].filter(Boolean).join(' • ');
+    
+    card.innerHTML = `
+      ${recipeImageHtml(recipe)}
+      <h3>${escapeHtml(recipe.title || 'Delicious Recipe')}</h3>
+      ${metaInfo ? `<div class="meta">${escapeHtml(metaInfo)}</div>` : ''}
+      <button type="button" class="recipe-toggle" aria-expanded="false">📖 Show recipe</button>
+      <div class="recipe-details" hidden></div>
+    `;
+    return card;
+  }
+
+  function recipeDetailsHtml(recipe) {
+    return `
+      <p>${escapeHtml(recipe.description || 'A wonderful recipe made with your selected ingredients.')}</p>
+      
+      <h4>🥘 Ingredients:</h4>
+      <ul>${(recipe.ingredients || []).map(ing => `<li>${escapeHtml(ing)}</li>`).join('')}</ul>
+      
+      <h4>👨‍🍳 Instructions:</h4>
+      <ol>${(recipe.instructions || []).map(inst => `<li>${escapeHtml(inst)}</li>`).join('')}</ol>
+      
+      ${recipe.sourceUrl ? `<div style="margin-top: 1rem;"><a href="${escapeHtml(recipe.sourceUrl)}" target="_blank" rel="noopener" style="color: var(--primary-color);">🔗 View Original Recipe</a></div>` : ''}
+    `;
+  }
+
+  // Summary recipes from /generate-recipe are completed in place from GET /recipe/:id
+  const detailRequests = new Map();
+
+  function loadRecipeDetails(recipe) {
+    if (Array.isArray(recipe.ingredients) || recipe.id === undefined) {
+      return Promise.resolve(recipe);
+    }
+    const key = String(recipe.id);
+    if (!detailRequests.has(key)) {
+      const request = fetch(`/recipe/${encodeURIComponent(key)}`)
+        .then(response => {
+          if (!response.ok) throw new Error(`API response status: ${response.status}`);
+          return response.json();
+        })
+        .finally(() => detailRequests.delete(key));
+      detailRequests.set(key, request);
+    }
+    return detailRequests.get(key).then(details => Object.assign(recipe, details));
+  }
+
+  async function toggleRecipeCard(card, recipes = displayedRecipes) {
+    const details = card.querySelector('.recipe-details');
+    const button = card.querySelector('.recipe-toggle');
+    const expand = details.hidden;
+    details.hidden = !expand;
+    button.setAttribute('aria-expanded', String(expand));
+    button.textContent = expand ? '🔼 Hide recipe' : '📖 Show recipe';
+    if (!expand || details.dataset.rendered) return;
+
+    details.innerHTML = '<p class="loading">⏳ Loading recipe...</p>';
+    try {
+      const recipe = await loadRecipeDetails(recipes[Number(card.dataset.index)]);
+      details.innerHTML = recipeDetailsHtml(recipe);
+      details.dataset.rendered = 'true';
+    } catch (error) {
+      details.innerHTML = '<p>❌ Could not load this recipe. Close and try again.</p>';
+    }
+  }
+
+  if (recipesDiv) {
+    recipesDiv.addEventListener('click', (e) => {
+      const button = e.target.closest('.recipe-toggle');
+      if (button && recipesDiv.contains(button)) {
+        toggleRecipeCard(button.closest('.recipe-card'));
+      }
+    });
+  }
+
+  // Cookbook search, below the generated recipes
+  const COOKBOOK_RESULT_LIMIT = 20;
+  let cookbookSearch = null;
+  let cookbookStatus = null;
+  let cookbookResults = null;
+  let cookbookMatches = [];
+  let cookbookQuery = 0;
+
+  if (recipesDiv && recipesDiv.parentNode && typeof indexedDB !== 'undefined') {
+    const panel = document.createElement('div');
+    panel.className = 'cookbook';
+    const heading = document.createElement('h3');
+    heading.textContent = '📖 My Cookbook';
+    cookbookSearch = document.createElement('input');
+    cookbookSearch.type = 'search';
+    cookbookSearch.id = 'cookbookSearch';
+    cookbookSearch.placeholder = 'Search saved recipes by title, ingredient or step...';
+    cookbookStatus = document.createElement('p');
+    cookbookStatus.className = 'cookbook-status';
+    cookbookResults = document.createElement('div');
+    cookbookResults.className = 'recipes-grid';
+    [heading, cookbookSearch, cookbookStatus, cookbookResults].forEach(el => panel.appendChild(el));
+    recipesDiv.parentNode.insertBefore(panel, recipesDiv.nextSibling);
+
+    cookbookSearch.addEventListener('input', debounce(() => renderCookbook(), 120));
+    cookbookResults.addEventListener('click', (e) => {
+      const button = e.target.closest('.recipe-toggle');
+      if (button && cookbookResults.contains(button)) {
+        toggleRecipeCard(button.closest('.recipe-card'), cookbookMatches);
+      }
+    });
+  }
+
+  async function renderCookbook() {
+    if (!cookbookResults) return;
+    const query = cookbookSearch.value.trim();
+    const current = ++cookbookQuery;
+    try {
+      const { total, recipes } = await cookbook.search(query, COOKBOOK_RESULT_LIMIT);
+      // A newer keystroke already rendered its results
+      if (current !== cookbookQuery) return;
+
+      cookbookMatches = recipes;
+      const shown = total > recipes.length ? ` (showing ${recipes.length})` : '';
+      cookbookStatus.textContent = query
+        ? `${total} saved recipe(s) match "${query}"${shown}`
+        : total ? `${total} saved recipe(s)${shown}` : 'No saved recipes yet. Save some to search them here.';
+      const fragment = document.createDocumentFragment();
+      recipes.forEach((recipe, index) => {
+        const card = createRecipeCard(recipe, index);
+        card.style.animationDelay = '0s';
+        fragment.appendChild(card);
+      });
+      cookbookResults.innerHTML = '';
+      cookbookResults.appendChild(fragment);
+    } catch (error) {
+      console.error('Error searching cookbook:', error);
+      cookbookStatus.textContent = '❌ Your cookbook could not be opened';
+    }
+  }
+
   function displayRecipes(recipes, fromAPI = false) {
     if (!recipesDiv) return;
     
     if (!recipes || recipes.length === 0) {
-      recipesDiv.innerHTML = '<div class="loading">😔 <br><h3>No recipes found</h3><p>Try different ingredients or dietary preferences!</p></div>';
+      showRecipesMessage('<div class="loading">😔 <br><h3>No recipes found</h3><p>Try different ingredients or dietary preferences!</p></div>');
       return;
     }
 
     let headerMessage = fromAPI ? 
-      '<div style="background: linear-gradient(45deg, #d4edda, #a8e6a3); color: #155724; padding: 2rem; border-radius: 20px; margin-bottom: 2rem; text-align: center;">🎉 <h3>Live Spoonacular Recipes Generated!</h3><p>Fresh from our recipe database</p></div>' :
-      '<div style="background: linear-gradient(45deg, #fff3cd, #ffeaa7); color: #d68910; padding: 2rem; border-radius: 20px; margin-bottom: 2rem; text-align: center;">📱 <h3>Demo Mode Active</h3><p>Showing curated recipes. Start server for live API results!</p></div>';
+      '<div style="grid-column: 1 / -1; background: linear-gradient(45deg, #d4edda, #a8e6a3); color: #155724; padding: 2rem; border-radius: 20px; margin-bottom: 2rem; text-align: center;">🎉 <h3>Live Spoonacular Recipes Generated!</h3><p>Fresh from our recipe database</p></div>' :
+      '<div style="grid-column: 1 / -1; background: linear-gradient(45deg, #fff3cd, #ffeaa7); color: #d68910; padding: 2rem; border-radius: 20px; margin-bottom: 2rem; text-align: center;">📱 <h3>Demo Mode Active</h3><p>Showing curated recipes. Start server for live API results!</p></div>';
 
-    recipesDiv.innerHTML = headerMessage;
+    showRecipesMessage(headerMessage);
+    displayedRecipes = [...recipes];
     
-    recipes.forEach((recipe, index) => {
-      const card = document.createElement('div');
-      card.className = 'recipe-card';
-      card.style.animationDelay = `${index * 0.1}s`;
-      
-      const dietaryLabels = Array.isArray(recipe.dietary_labels) 
-        ? recipe.dietary_labels.join(' • ') 
-        : '';
-      
-      const metaInfo = [dietaryLabels, recipe.servings ? `Serves ${recipe.servings}` : '', recipe.time || ''].filter(Boolean).join(' • ');
-      
-      card.innerHTML = `
-        <h3>${recipe.title || 'Delicious Recipe'}</h3>
-        ${metaInfo ? `<div class="meta">${metaInfo}</div>` : ''}
-        <p>${recipe.description || 'A wonderful recipe made with your selected ingredients.'}</p>
-        
-        <h4>🥘 Ingredients:</h4>
-        <ul>${(recipe.ingredients || []).map(ing => `<li>${ing}</li>`).join('')}</ul>
-        
-        <h4>👨‍🍳 Instructions:</h4>
-        <ol>${(recipe.instructions || []).map(inst => `<li>${inst}</li>`).join('')}</ol>
-        
-        ${recipe.sourceUrl ? `<div style="margin-top: 1rem;"><a href="${recipe.sourceUrl}" target="_blank" style="color: var(--primary-color);">🔗 View Original Recipe</a></div>` : ''}
-      `;
-      
-      recipesDiv.appendChild(card);
+    const list = document.createElement('div');
+    list.className = 'recipe-list';
+    recipesDiv.appendChild(list);
+    
+    const cards = new Map();
+    recipeGrid = new VirtualGrid(list, {
+      estimateHeight: 360,
+      renderItem: (recipe, index) => {
+        if (!cards.has(index)) cards.set(index, createRecipeCard(recipe, index));
+        return cards.get(index);
+      }
     });
+    recipeGrid.setItems(displayedRecipes);
     
     recipesDiv.scrollIntoView({ behavior: 'smooth', block: 'start' });
   }
 
+  // Cards for recipes that arrive after the first ones (streaming, next pages)
+  function appendRecipes(recipes) {
+    if (!recipeGrid) return;
+    displayedRecipes.push(...recipes);
+    recipeGrid.appendItems(recipes);
+  }
+
   // User preferences and allergies
   const allergiesInput = document.getElementById('allergies');
   if (allergiesInput) {
     allergiesInput.addEventListener('input', (e) => {
       userAllergies = e.target.value.split(',').map(a => a.trim()).filter(a => a);
+      blockedIngredients = ingredientIndex.blockedBy(userAllergies);
       renderIngredients(searchInput ? searchInput.value : '');
       saveUserPreferences();
     });
@@ -500,6 +1751,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const preferences = JSON.parse(saved);
         selectedIngredients = preferences.selectedIngredients || [];
         userAllergies = preferences.allergies || [];
+        blockedIngredients = ingredientIndex.blockedBy(userAllergies);
         
         if (allergiesInput && userAllergies.length > 0) {
           allergiesInput.value = userAllergies.join(', ');
@@ -579,6 +1831,7 @@ document.addEventListener('DOMContentLoaded', () => {
   loadUserPreferences();
   renderIngredients();
   renderSelectedPills();
+  renderCookbook();
   
   console.log('✅ Smarty-Chef.PCS fully initialized!');
 });
@@ -603,6 +1856,57 @@ style.textContent = `
     from { transform: translateX(0); opacity: 1; }
     to { transform: translateX(100%); opacity: 0; }
   }
+  .ingredient-alias {
+    display: block;
+    font-size: 0.75em;
+    opacity: 0.7;
+  }
+  .recipe-list {
+    grid-column: 1 / -1;
+    display: grid;
+    grid-template-columns: inherit;
+    gap: inherit;
+  }
+  .load-more {
+    grid-column: 1 / -1;
+    justify-self: center;
+  }
+  .recipe-thumb {
+    display: block;
+    width: 100%;
+    height: auto;
+    aspect-ratio: 312 / 231;
+    object-fit: cover;
+    border-radius: 12px;
+    margin-bottom: 1rem;
+    background: #f3f4f6;
+  }
+  .recipe-toggle {
+    margin-top: 1rem;
+    background: none;
+    border: 2px solid var(--border-color);
+    border-radius: 999px;
+    padding: 0.5rem 1.25rem;
+    cursor: pointer;
+    font: inherit;
+  }
+  .recipe-details[hidden] {
+    display: none;
+  }
+  .cookbook {
+    margin-top: 3rem;
+  }
+  .cookbook input[type="search"] {
+    width: 100%;
+    padding: 0.75rem 1rem;
+    border: 2px solid var(--border-color);
+    border-radius: 10px;
+    font: inherit;
+  }
+  .cookbook-status {
+    margin: 0.75rem 0 1.5rem;
+    opacity: 0.75;
+  }
 `;
 document.head.appendChild(style);'''
 
@@ -611,215 +1915,1538 @@ enhanced_server = '''const express = require('express');
 const bodyParser = require('body-parser');
 const cors = require('cors');
 const path = require('path');
+const fs = require('fs');
+const https = require('https');
+const fetch = require('node-fetch');
+const { monitorEventLoopDelay, performance } = require('perf_hooks');
+const {
+  RecipeIndex,
+  tokenize,
+  normalizeLabel,
+  dietMaskFor,
+  allergenMaskFor,
+  dietQueryMask,
+  parseAllergies
+} = require('./recipe-engine');
 
 const app = express();
 
-// Middleware
-app.use(cors());
-app.use(bodyParser.json());
-app.use(express.static(path.join(__dirname)));
-
-const PORT = process.env.PORT || 3000;
-const SPOONACULAR_API_KEY = process.env.SPOONACULAR_API_KEY || '7800762921d34589b4b49897b5c09778';
-
-console.log('🍳 Starting Smarty-Chef.PCS Server...');
-console.log('🗝️ API Key:', SPOONACULAR_API_KEY ? '✅ Configured' : '❌ Missing');
+// Prometheus metrics for GET /metrics (text exposition format 0.0.4).
+// Counters and histograms are updated as things happen; collected metrics
+// read their value from the component that owns it at scrape time.
+const LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
 
-// Helper to transform Spoonacular recipe data
-function transformRecipe(recipe) {
-  const ingredients = recipe.extendedIngredients 
-    ? recipe.extendedIngredients.map(ingredient => ingredient.original)
-    : [];
+function formatLabels(labels) {
+  const pairs = Object.keys(labels).map(name => `${name}=${JSON.stringify(String(labels[name]))}`);
+  return pairs.length > 0 ? `{${pairs.join(',')}}` : '';
+}
 
-  let instructions = [];
-  if (recipe.analyzedInstructions && recipe.analyzedInstructions.length > 0) {
-    instructions = recipe.analyzedInstructions[0].steps.map(step => step.step);
-  } else if (recipe.instructions) {
-    instructions = recipe.instructions
-      .split(/[\\r\\n]+/)
-      .filter(instruction => instruction.trim().length > 0)
-      .map(instruction => instruction.trim());
+class Counter {
+  constructor(name, help) {
+    this.name = name;
+    this.help = help;
+    this.type = 'counter';
+    this.values = new Map();
   }
 
-  const description = recipe.summary 
-    ? recipe.summary.replace(/<[^>]*>/g, '').substring(0, 200) + '...'
-    : 'A delicious recipe made with your selected ingredients.';
+  inc(labels = {}, amount = 1) {
+    const key = formatLabels(labels);
+    this.values.set(key, (this.values.get(key) || 0) + amount);
+  }
 
-  return {
-    title: recipe.title || "Delicious Recipe",
-    description: description,
-    ingredients: ingredients,
-    instructions: instructions,
-    time: recipe.readyInMinutes ? `${recipe.readyInMinutes} minutes` : '',
-    dietary_labels: [
-      recipe.vegetarian ? 'Vegetarian' : null,
-      recipe.vegan ? 'Vegan' : null,
-      recipe.glutenFree ? 'Gluten-Free' : null,
-      recipe.dairyFree ? 'Dairy-Free' : null,
-      recipe.veryHealthy ? 'Healthy' : null,
-      ...(recipe.dishTypes || []),
-      ...(recipe.cuisines || [])
-    ].filter(Boolean),
-    category: recipe.dishTypes ? recipe.dishTypes[0] : 'Main Course',
-    servings: recipe.servings ? recipe.servings.toString() : '',
-    image: recipe.image || '',
-    sourceUrl: recipe.sourceUrl || '',
-    spoonacularScore: recipe.spoonacularScore || 0,
-    healthScore: recipe.healthScore || 0
-  };
+  lines() {
+    return [...this.values].map(([labels, value]) => `${this.name}${labels} ${value}`);
+  }
 }
 
-// Fallback recipe generator
-function createFallbackRecipe(ingredients, dietaryPreference) {
-  const mainIngredient = ingredients[0] || 'ingredients';
-  const cuisineHint = dietaryPreference === 'indian' ? 'Indian-Style ' : '';
-  
-  return {
-    title: `${cuisineHint}${mainIngredient.charAt(0).toUpperCase() + mainIngredient.slice(1)} Delight`,
-    description: `A delicious homemade ${cuisineHint.toLowerCase()}dish featuring ${ingredients.slice(0, 3).join(', ')} and more fresh ingredients.`,
-    ingredients: [
-      ...ingredients.map(ing => `1-2 portions ${ing}`),
-      "Salt and pepper to taste",
-      "2 tbsp cooking oil",
-      "Fresh herbs (optional)",
-      "Spices as needed"
-    ],
-    instructions: [
-      "Wash and prepare all your fresh ingredients",
-      `Heat oil in a large pan or pot over medium heat`,
-      `Add ${ingredients[0]} and cook until lightly golden`,
-      ingredients.length > 1 ? `Add ${ingredients.slice(1).join(', ')} and cook for 5-7 minutes` : "Continue cooking for 5-7 minutes",
-      "Season with salt, pepper, and your favorite spices",
-      dietaryPreference === 'indian' ? "Add Indian spices like turmeric, cumin, or garam masala" : "Add herbs and spices to taste",
-      "Cook until all ingredients are tender and well combined",
-      "Taste and adjust seasoning as needed",
-      "Serve hot and enjoy your homemade creation!"
-    ],
-    time: "25-30 minutes",
-    dietary_labels: dietaryPreference ? [dietaryPreference] : ["Homemade"],
-    category: "Main Course",
-    servings: "2-4",
-    image: '',
-    sourceUrl: '',
-    spoonacularScore: 0,
-    healthScore: 0
-  };
-}
+// Cumulative buckets in seconds, one series per label set
+class Histogram {
+  constructor(name, help, buckets) {
+    this.name = name;
+    this.help = help;
+    this.type = 'histogram';
+    this.buckets = buckets;
+    this.series = new Map();
+  }
 
-// Enhanced /generate-recipe endpoint with Spoonacular integration
-app.post('/generate-recipe', async (req, res) => {
-  try {
-    const { ingredients = [], dietaryPreference = '', allergies = '' } = req.body;
-    
-    if (!ingredients || ingredients.length === 0) {
-      return res.status(400).json({ 
-        error: 'Please provide at least one ingredient', 
-        recipes: [] 
-      });
+  observe(labels, seconds) {
+    const key = formatLabels(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { labels, counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
     }
+    const bucket = this.buckets.findIndex(bound => seconds <= bound);
+    if (bucket !== -1) series.counts[bucket]++;
+    series.sum += seconds;
+    series.count++;
+  }
 
-    console.log('🔍 Searching recipes for ingredients:', ingredients);
-    console.log('🥗 Dietary preference:', dietaryPreference);
-    console.log('⚠️ Allergies:', allergies);
-
-    // Dynamic import for node-fetch compatibility
-    const fetch = (await import('node-fetch')).default;
+  lines() {
+    const lines = [];
+    this.series.forEach(({ labels, counts, sum, count }, key) => {
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += counts[i];
+        lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: bound })} ${cumulative}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: '+Inf' })} ${count}`);
+      lines.push(`${this.name}_sum${key} ${Number(sum.toFixed(6))}`);
+      lines.push(`${this.name}_count${key} ${count}`);
+    });
+    return lines;
+  }
+}
 
-    const ingredientsString = ingredients.join(',+');
-    const searchUrl = `https://api.spoonacular.com/recipes/findByIngredients?ingredients=${encodeURIComponent(ingredientsString)}&number=8&ranking=2&ignorePantry=true&apiKey=${SPOONACULAR_API_KEY}`;
-    
-    console.log('🌐 Calling Spoonacular API...');
-    
-    const searchResponse = await fetch(searchUrl);
-    if (!searchResponse.ok) {
-      throw new Error(`Spoonacular search failed: ${searchResponse.status} ${searchResponse.statusText}`);
-    }
+// Value owned elsewhere; collect() returns [labels, value] pairs
+class CollectedMetric {
+  constructor(name, help, type, collect) {
+    this.name = name;
+    this.help = help;
+    this.type = type;
+    this.collect = collect;
+  }
 
-    const foundRecipes = await searchResponse.json();
-    console.log(`📋 Found ${foundRecipes.length} recipe matches`);
+  lines() {
+    return this.collect().map(([labels, value]) => `${this.name}${formatLabels(labels)} ${value}`);
+  }
+}
 
-    if (!foundRecipes || foundRecipes.length === 0) {
-      const fallbackRecipe = createFallbackRecipe(ingredients, dietaryPreference);
-      return res.json({ 
-        recipes: [fallbackRecipe],
-        apiSource: 'Fallback',
-        message: 'No matches found, showing custom recipe'
-      });
-    }
+class MetricsRegistry {
+  constructor() {
+    this.metrics = [];
+  }
 
-    // Get detailed information for recipes
-    const detailedRecipes = await Promise.all(
-      foundRecipes.slice(0, 5).map(async (recipe) => {
-        try {
-          const detailUrl = `https://api.spoonacular.com/recipes/${recipe.id}/information?includeNutrition=false&apiKey=${SPOONACULAR_API_KEY}`;
-          const detailResponse = await fetch(detailUrl);
-          
-          if (!detailResponse.ok) {
-            console.warn(`Failed to get details for recipe ${recipe.id}`);
-            return null;
-          }
-          
-          const detailData = await detailResponse.json();
-          return transformRecipe(detailData);
-        } catch (error) {
-          console.error(`Error fetching recipe ${recipe.id}:`, error.message);
-          return null;
-        }
-      })
-    );
+  register(metric) {
+    this.metrics.push(metric);
+    return metric;
+  }
 
-    let validRecipes = detailedRecipes.filter(recipe => recipe !== null);
+  counter(name, help) {
+    return this.register(new Counter(name, help));
+  }
 
-    // Apply dietary preferences filtering
-    if (dietaryPreference && validRecipes.length > 0) {
-      const filteredByDiet = validRecipes.filter(recipe => {
-        const labels = recipe.dietary_labels.map(label => label.toLowerCase());
-        const preference = dietaryPreference.toLowerCase().replace('-', ' ');
-        return labels.some(label => label.includes(preference));
-      });
-      
-      if (filteredByDiet.length > 0) {
-        validRecipes = filteredByDiet;
-      }
-    }
+  histogram(name, help, buckets = LATENCY_BUCKETS) {
+    return this.register(new Histogram(name, help, buckets));
+  }
 
-    // Filter out recipes with allergens
-    if (allergies && validRecipes.length > 0) {
-      const allergensList = allergies.split(',').map(a => a.trim().toLowerCase());
-      validRecipes = validRecipes.filter(recipe => {
-        const recipeText = (recipe.title + ' ' + recipe.ingredients.join(' ')).toLowerCase();
-        return !allergensList.some(allergen => recipeText.includes(allergen));
-      });
-    }
+  collected(name, help, type, collect) {
+    return this.register(new CollectedMetric(name, help, type, collect));
+  }
 
-    // Ensure we have at least one recipe
-    if (validRecipes.length === 0) {
-      const fallbackRecipe = createFallbackRecipe(ingredients, dietaryPreference);
-      validRecipes = [fallbackRecipe];
-    }
+  render() {
+    return this.metrics
+      .map(metric => [`# HELP ${metric.name} ${metric.help}`, `# TYPE ${metric.name} ${metric.type}`, ...metric.lines()].join('\\n'))
+      .join('\\n') + '\\n';
+  }
+}
 
-    console.log(`✅ Returning ${validRecipes.length} recipes`);
+const metrics = new MetricsRegistry();
+const httpDuration = metrics.histogram('smarty_http_request_duration_seconds',
+  'HTTP request latency by method, route and status; _count is the request rate');
+const upstreamDuration = metrics.histogram('smarty_upstream_request_duration_seconds',
+  'Spoonacular call latency by endpoint');
+const upstreamRequests = metrics.counter('smarty_upstream_requests_total',
+  'Spoonacular calls by endpoint and outcome (HTTP status or error code)');
+const recipeResults = metrics.counter('smarty_recipe_results_total',
+  'Recipe searches answered, by source (Spoonacular, Local, Fallback) and whether the result cache served them');
+const fallbackRecipes = metrics.counter('smarty_fallback_recipes_total',
+  'Recipes made up by createFallbackRecipe because nothing matched');
+fallbackRecipes.inc({}, 0);
+
+// Event-loop delay sampled every EVENT_LOOP_RESOLUTION_MS. The histogram is
+// summarised and reset on a fixed EVENT_LOOP_WINDOW_MS timer, never by a scrape,
+// so every scraper reads the same last full window. Samples include the
+// sampling interval itself.
+const EVENT_LOOP_RESOLUTION_MS = 20;
+const EVENT_LOOP_WINDOW_MS = 60 * 1000;
+const eventLoopDelay = monitorEventLoopDelay({ resolution: EVENT_LOOP_RESOLUTION_MS });
+eventLoopDelay.enable();
+
+function eventLoopLagSeconds(nanoseconds) {
+  return Number((Math.max(0, nanoseconds / 1e6 - EVENT_LOOP_RESOLUTION_MS) / 1000).toFixed(6));
+}
 
-    res.json({ 
-      recipes: validRecipes,
-      apiSource: 'Spoonacular',
-      totalFound: foundRecipes.length,
-      afterFiltering: validRecipes.length
+// [labels, seconds] per quantile of the histogram as it stands
+function eventLoopQuantiles() {
+  return [
+    ...[50, 90, 99].map(p => [{ quantile: p / 100 }, eventLoopLagSeconds(eventLoopDelay.percentile(p))]),
+    [{ quantile: 'max' }, eventLoopLagSeconds(eventLoopDelay.max)]
+  ];
+}
+
+// Until the first window closes, scrapes see the partial one
+let eventLoopWindow = null;
+setInterval(() => {
+  eventLoopWindow = eventLoopQuantiles();
+  eventLoopDelay.reset();
+}, EVENT_LOOP_WINDOW_MS).unref();
+
+// Middleware
+// Time every request by its route pattern (/recipe/:id, not each id)
+app.use((req, res, next) => {
+  const startedAt = performance.now();
+  res.on('finish', () => {
+    const route = req.route ? req.baseUrl + req.route.path : res.statusCode === 404 ? 'unmatched' : 'static';
+    httpDuration.observe({ method: req.method, route, status: res.statusCode }, (performance.now() - startedAt) / 1000);
+  });
+  next();
+});
+app.use(cors());
+// Timing beacons get a small body limit before the app-wide parser reads them.
+// They arrive as application/json or, from older sendBeacon callers, text/plain
+app.use('/perf', bodyParser.json({ type: ['application/json', 'text/plain'], limit: '4kb' }));
+app.use(bodyParser.json());
+
+// Static assets built by build_assets.py: content-hashed names that never
+// change, with .br/.gz siblings sent as-is, so nothing is compressed per
+// request. Without a build the app directory is served directly.
+const STATIC_DIR = process.env.STATIC_DIR || path.join(__dirname, 'dist');
+
+function loadAssetManifest() {
+  try {
+    return JSON.parse(fs.readFileSync(path.join(STATIC_DIR, 'asset-manifest.json'), 'utf8'));
+  } catch (error) {
+    if (error.code !== 'ENOENT') {
+      console.warn(`⚠️ Ignoring asset manifest in ${STATIC_DIR}:`, error.message);
+    }
+    return null;
+  }
+}
+
+const assetManifest = loadAssetManifest();
+const PUBLIC_DIR = assetManifest ? STATIC_DIR : __dirname;
+const immutableAssets = new Set(assetManifest ? assetManifest.immutable : []);
+const precompressedAssets = new Map(Object.entries(assetManifest ? assetManifest.encodings : {}));
+const ENCODING_SUFFIXES = { br: '.br', gzip: '.gz' };
+
+function staticCacheOptions(name) {
+  // Hashed files change name when their content changes; everything else revalidates
+  return immutableAssets.has(name) ? { maxAge: '1y', immutable: true } : { maxAge: 0 };
+}
+
+function servePrecompressed(req, res, next) {
+  if (req.method !== 'GET' && req.method !== 'HEAD') return next();
+  const name = req.path === '/' ? 'index.html' : req.path.slice(1);
+  const encodings = precompressedAssets.get(name);
+  if (!encodings) return next();
+
+  res.vary('Accept-Encoding');
+  const encoding = req.acceptsEncodings(encodings);
+  if (!encoding) return next();
+
+  res.type(path.extname(name));
+  res.set('Content-Encoding', encoding);
+  res.sendFile(name + ENCODING_SUFFIXES[encoding], { root: PUBLIC_DIR, ...staticCacheOptions(name) }, error => {
+    if (error && !res.headersSent) {
+      res.removeHeader('Content-Encoding');
+      next();
+    }
+  });
+}
+
+app.use(servePrecompressed);
+app.use(express.static(PUBLIC_DIR, {
+  setHeaders(res, filePath) {
+    if (immutableAssets.has(path.basename(filePath))) {
+      res.set('Cache-Control', 'public, max-age=31536000, immutable');
+    }
+  }
+}));
+
+const PORT = process.env.PORT || 3000;
+const SPOONACULAR_API_KEY = process.env.SPOONACULAR_API_KEY || '7800762921d34589b4b49897b5c09778';
+
+// Upstream connection pool and timeouts
+const UPSTREAM_MAX_SOCKETS = parseInt(process.env.UPSTREAM_MAX_SOCKETS, 10) || 16;
+const UPSTREAM_TIMEOUT_MS = parseInt(process.env.UPSTREAM_TIMEOUT_MS, 10) || 8000;
+const UPSTREAM_BULK_TIMEOUT_MS = parseInt(process.env.UPSTREAM_BULK_TIMEOUT_MS, 10) || 12000;
+
+// Upstream rate limiting and Spoonacular quota handling
+const UPSTREAM_RATE_PER_SEC = parseFloat(process.env.UPSTREAM_RATE_PER_SEC) || 5;
+const UPSTREAM_BURST = parseInt(process.env.UPSTREAM_BURST, 10) || 10;
+const UPSTREAM_MAX_QUEUE_MS = parseInt(process.env.UPSTREAM_MAX_QUEUE_MS, 10) || 3000;
+const QUOTA_RESERVE_POINTS = parseFloat(process.env.QUOTA_RESERVE_POINTS) || 10;
+
+// Circuit breaker around Spoonacular
+const BREAKER_FAILURE_THRESHOLD = parseInt(process.env.BREAKER_FAILURE_THRESHOLD, 10) || 5;
+const BREAKER_COOLDOWN_MS = parseInt(process.env.BREAKER_COOLDOWN_MS, 10) || 30000;
+const BREAKER_MAX_COOLDOWN_MS = parseInt(process.env.BREAKER_MAX_COOLDOWN_MS, 10) || 5 * 60 * 1000;
+const API_STATUS_TTL_MS = parseInt(process.env.API_STATUS_TTL_MS, 10) || 60000;
+
+// Local recipe corpus: used whenever Spoonacular can't answer, or exclusively with RECIPE_SOURCE=local
+const RECIPE_SOURCE = (process.env.RECIPE_SOURCE || 'spoonacular').toLowerCase();
+// Read from the served directory, so a dist/ build ships the corpus only once
+const LOCAL_RECIPES_FILE = process.env.LOCAL_RECIPES_FILE || path.join(PUBLIC_DIR, 'local-recipes.json');
+const LOCAL_INDEX_FILE = process.env.LOCAL_INDEX_FILE || path.join(PUBLIC_DIR, 'recipe-index.json');
+
+// Result cache configuration
+const RESULT_CACHE_TTL_MS = parseInt(process.env.RESULT_CACHE_TTL_MS, 10) || 30 * 60 * 1000;
+const RESULT_CACHE_MAX_ENTRIES = parseInt(process.env.RESULT_CACHE_MAX_ENTRIES, 10) || 500;
+const RESULT_CACHE_FILE = process.env.RESULT_CACHE_FILE || '';
+const CANDIDATE_CACHE_MAX_ENTRIES = parseInt(process.env.CANDIDATE_CACHE_MAX_ENTRIES, 10) || 500;
+const RECIPE_STORE_TTL_MS = parseInt(process.env.RECIPE_STORE_TTL_MS, 10) || 24 * 60 * 60 * 1000;
+const RECIPE_STORE_MAX_ENTRIES = parseInt(process.env.RECIPE_STORE_MAX_ENTRIES, 10) || 5000;
+const RECIPE_STORE_FILE = process.env.RECIPE_STORE_FILE || '';
+
+// Detail lookups arriving within this window share one informationBulk call
+const DETAIL_BATCH_WINDOW_MS = parseInt(process.env.DETAIL_BATCH_WINDOW_MS, 10) || 20;
+const DETAIL_BATCH_MAX_IDS = parseInt(process.env.DETAIL_BATCH_MAX_IDS, 10) || 50;
+
+// Result pages: ranked candidates fetched per search, default and maximum page size
+const SEARCH_CANDIDATES = parseInt(process.env.SEARCH_CANDIDATES, 10) || 30;
+const PAGE_SIZE = parseInt(process.env.PAGE_SIZE, 10) || 5;
+const MAX_PAGE_SIZE = parseInt(process.env.MAX_PAGE_SIZE, 10) || 20;
+
+// Client search timings beaconed by app.js, kept for the last PERF_SAMPLE_SIZE searches
+const PERF_BEACON_ENABLED = (process.env.PERF_BEACON || 'on').toLowerCase() !== 'off';
+const PERF_SAMPLE_SIZE = parseInt(process.env.PERF_SAMPLE_SIZE, 10) || 500;
+
+console.log('🍳 Starting Smarty-Chef.PCS Server...');
+console.log('🗝️ API Key:', SPOONACULAR_API_KEY ? '✅ Configured' : '❌ Missing');
+
+class UpstreamError extends Error {
+  constructor(message, code) {
+    super(message);
+    this.name = 'UpstreamError';
+    this.code = code;
+  }
+}
+
+function nextUtcMidnight() {
+  const now = new Date();
+  return Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate() + 1);
+}
+
+// Token bucket in front of every Spoonacular call. User traffic is always
+// dequeued before background work (cache refills), background work is refused
+// once the daily quota drops to the reserve, and everything is refused once
+// Spoonacular reports the quota as spent, so callers fall back immediately.
+class UpstreamScheduler {
+  constructor({ ratePerSec, burst, maxQueueMs, reservePoints }) {
+    this.ratePerSec = ratePerSec;
+    this.burst = burst;
+    this.maxQueueMs = maxQueueMs;
+    this.reservePoints = reservePoints;
+    this.tokens = burst;
+    this.lastRefill = Date.now();
+    this.queues = { user: [], background: [] };
+    this.timer = null;
+    this.pausedUntil = 0;
+    this.quota = { used: null, left: null, lastRequestCost: null, updatedAt: null, exhaustedUntil: 0 };
+    this.counters = { scheduled: 0, rejected: 0, expired: 0, rateLimited: 0, quotaExceeded: 0 };
+  }
+
+  // Each queued job has a deadline of its own, so a long 429 pause rejects
+  // waiting callers after maxQueueMs instead of when the pause ends
+  schedule(task, priority = 'user', { isProbe = false } = {}) {
+    const refusal = this.admissionError(priority, isProbe);
+    if (refusal) {
+      this.counters.rejected++;
+      return Promise.reject(new UpstreamError(refusal, 'QUOTA'));
+    }
+    if (this.pausedUntil - Date.now() > this.maxQueueMs) {
+      this.counters.rejected++;
+      return Promise.reject(new UpstreamError('Spoonacular rate limit pause outlasts the queue timeout', 'RATE_LIMITED'));
+    }
+    return new Promise((resolve, reject) => {
+      const queue = this.queues[priority];
+      const job = { task, resolve, reject };
+      job.deadline = setTimeout(() => {
+        queue.splice(queue.indexOf(job), 1);
+        this.counters.expired++;
+        reject(new UpstreamError('Timed out waiting for an upstream slot', 'QUEUE_TIMEOUT'));
+      }, this.maxQueueMs);
+      queue.push(job);
+      this.counters.scheduled++;
+      this.drain();
+    });
+  }
+
+  // Circuit probes skip the reserve check: the quota figure only moves when a
+  // response arrives, so refusing them would keep the circuit open all day
+  admissionError(priority, isProbe = false) {
+    if (this.quota.exhaustedUntil > Date.now()) {
+      return 'Spoonacular daily quota exhausted';
+    }
+    if (priority === 'background' && !isProbe && this.quota.left !== null && this.quota.left <= this.reservePoints) {
+      return 'Spoonacular quota reserved for user traffic';
+    }
+    return null;
+  }
+
+  refill() {
+    const now = Date.now();
+    this.tokens = Math.min(this.burst, this.tokens + ((now - this.lastRefill) / 1000) * this.ratePerSec);
+    this.lastRefill = now;
+  }
+
+  nextJob() {
+    for (const priority of ['user', 'background']) {
+      const job = this.queues[priority].shift();
+      if (job) {
+        clearTimeout(job.deadline);
+        return job;
+      }
+    }
+    return null;
+  }
+
+  drain() {
+    if (this.timer) return;
+    this.refill();
+    const now = Date.now();
+    while (this.pausedUntil <= now && this.tokens >= 1) {
+      const job = this.nextJob();
+      if (!job) return;
+      this.tokens -= 1;
+      Promise.resolve().then(job.task).then(job.resolve, job.reject);
+    }
+    if (this.queues.user.length + this.queues.background.length > 0) {
+      const waitMs = Math.max(this.pausedUntil - now, ((1 - this.tokens) / this.ratePerSec) * 1000, 1);
+      this.timer = setTimeout(() => {
+        this.timer = null;
+        this.drain();
+      }, waitMs);
+    }
+  }
+
+  // Spoonacular reports quota points on every response
+  recordResponse(response) {
+    const used = parseFloat(response.headers.get('X-API-Quota-Used'));
+    const left = parseFloat(response.headers.get('X-API-Quota-Left'));
+    const cost = parseFloat(response.headers.get('X-API-Quota-Request'));
+    if (!Number.isNaN(used)) this.quota.used = used;
+    if (!Number.isNaN(left)) this.quota.left = left;
+    if (!Number.isNaN(cost)) this.quota.lastRequestCost = cost;
+    if (!Number.isNaN(used) || !Number.isNaN(left)) this.quota.updatedAt = new Date().toISOString();
+
+    if (response.status === 402 || (this.quota.left !== null && this.quota.left <= 0)) {
+      this.quota.exhaustedUntil = nextUtcMidnight();
+      this.counters.quotaExceeded++;
+    }
+    if (response.status === 429) {
+      const retryAfter = parseFloat(response.headers.get('Retry-After'));
+      this.pausedUntil = Date.now() + (retryAfter > 0 ? retryAfter * 1000 : 1000);
+      this.tokens = 0;
+      this.counters.rateLimited++;
+    }
+  }
+
+  stats() {
+    this.refill();
+    const now = Date.now();
+    return {
+      ratePerSecond: this.ratePerSec,
+      burst: this.burst,
+      tokens: Number(this.tokens.toFixed(2)),
+      queued: { user: this.queues.user.length, background: this.queues.background.length },
+      pausedForMs: Math.max(0, this.pausedUntil - now),
+      quota: {
+        pointsUsedToday: this.quota.used,
+        pointsLeft: this.quota.left,
+        lastRequestCost: this.quota.lastRequestCost,
+        reservePoints: this.reservePoints,
+        exhausted: this.quota.exhaustedUntil > now,
+        resetsAt: this.quota.exhaustedUntil > now ? new Date(this.quota.exhaustedUntil).toISOString() : null,
+        updatedAt: this.quota.updatedAt
+      },
+      ...this.counters
+    };
+  }
+}
+
+const upstreamScheduler = new UpstreamScheduler({
+  ratePerSec: UPSTREAM_RATE_PER_SEC,
+  burst: UPSTREAM_BURST,
+  maxQueueMs: UPSTREAM_MAX_QUEUE_MS,
+  reservePoints: QUOTA_RESERVE_POINTS
+});
+
+// Circuit breaker: after enough consecutive failures the circuit opens and
+// upstream calls fail immediately. A background probe half-opens it after a
+// cooldown; a successful probe closes it, a failed one reopens it with a
+// longer cooldown.
+class CircuitBreaker {
+  constructor({ failureThreshold, cooldownMs, maxCooldownMs, probe }) {
+    this.failureThreshold = failureThreshold;
+    this.baseCooldownMs = cooldownMs;
+    this.maxCooldownMs = maxCooldownMs;
+    this.cooldownMs = cooldownMs;
+    this.probe = probe;
+    this.state = 'closed';
+    this.consecutiveFailures = 0;
+    this.openedAt = null;
+    this.probeTimer = null;
+    this.lastError = null;
+    this.counters = { opened: 0, shortCircuited: 0, probes: 0 };
+  }
+
+  allowRequest(isProbe = false) {
+    if (this.state === 'closed' || (this.state === 'half-open' && isProbe)) {
+      return true;
+    }
+    this.counters.shortCircuited++;
+    return false;
+  }
+
+  recordSuccess() {
+    this.consecutiveFailures = 0;
+    if (this.state !== 'closed') {
+      console.log('✅ Spoonacular circuit closed');
+    }
+    this.state = 'closed';
+    this.cooldownMs = this.baseCooldownMs;
+    this.openedAt = null;
+  }
+
+  recordFailure(error) {
+    this.consecutiveFailures++;
+    this.lastError = error.message;
+    if (this.state === 'half-open') {
+      this.cooldownMs = Math.min(this.cooldownMs * 2, this.maxCooldownMs);
+      this.open();
+    } else if (this.state === 'closed' && this.consecutiveFailures >= this.failureThreshold) {
+      this.open();
+    }
+  }
+
+  open() {
+    this.state = 'open';
+    this.openedAt = Date.now();
+    this.counters.opened++;
+    console.warn(`🔌 Spoonacular circuit open for ${Math.round(this.cooldownMs / 1000)}s: ${this.lastError}`);
+    clearTimeout(this.probeTimer);
+    this.probeTimer = setTimeout(() => this.runProbe(), this.cooldownMs);
+    this.probeTimer.unref();
+  }
+
+  async runProbe() {
+    this.state = 'half-open';
+    this.counters.probes++;
+    try {
+      await this.probe();
+    } catch (error) {
+      // A probe the scheduler turned away (quota exhausted, queue timeout) never
+      // reached Spoonacular, so nothing recorded its outcome: count it as a
+      // failed probe so the circuit reopens and another probe is scheduled
+      if (this.state === 'half-open') this.recordFailure(error);
+    }
+  }
+
+  stats() {
+    return {
+      state: this.state,
+      consecutiveFailures: this.consecutiveFailures,
+      failureThreshold: this.failureThreshold,
+      cooldownMs: this.cooldownMs,
+      openedAt: this.openedAt ? new Date(this.openedAt).toISOString() : null,
+      nextProbeInMs: this.state === 'open' ? Math.max(0, this.openedAt + this.cooldownMs - Date.now()) : null,
+      lastError: this.lastError,
+      ...this.counters
+    };
+  }
+}
+
+const circuitBreaker = new CircuitBreaker({
+  failureThreshold: BREAKER_FAILURE_THRESHOLD,
+  cooldownMs: BREAKER_COOLDOWN_MS,
+  maxCooldownMs: BREAKER_MAX_COOLDOWN_MS,
+  // Cheapest Spoonacular endpoint, used only to test whether the API is back
+  probe: () => upstreamFetch(
+    `https://api.spoonacular.com/food/ingredients/autocomplete?query=apple&number=1&apiKey=${SPOONACULAR_API_KEY}`,
+    { priority: 'background', isProbe: true }
+  )
+});
+
+// Shared keep-alive agent so upstream calls reuse TLS connections
+const upstreamAgent = new https.Agent({
+  keepAlive: true,
+  keepAliveMsecs: 30000,
+  maxSockets: UPSTREAM_MAX_SOCKETS,
+  maxFreeSockets: UPSTREAM_MAX_SOCKETS
+});
+
+// Metrics label for a Spoonacular URL: its path with recipe ids collapsed
+function upstreamEndpoint(url) {
+  try {
+    return new URL(url).pathname.split('/').map(part => (/^[0-9]+$/.test(part) ? ':id' : part)).join('/');
+  } catch (error) {
+    return 'unknown';
+  }
+}
+
+// Every Spoonacular call goes through here: circuit breaker, rate limit,
+// pooled connections and a hard timeout
+function upstreamFetch(url, { timeoutMs = UPSTREAM_TIMEOUT_MS, priority = 'user', isProbe = false } = {}) {
+  const endpoint = upstreamEndpoint(url);
+  if (!circuitBreaker.allowRequest(isProbe)) {
+    upstreamRequests.inc({ endpoint, code: 'CIRCUIT_OPEN' });
+    return Promise.reject(new UpstreamError('Spoonacular circuit open, using local fallback', 'CIRCUIT_OPEN'));
+  }
+  return upstreamScheduler.schedule(async () => {
+    const startedAt = performance.now();
+    let response;
+    try {
+      response = await fetch(url, { agent: upstreamAgent, timeout: timeoutMs });
+    } catch (error) {
+      upstreamDuration.observe({ endpoint }, (performance.now() - startedAt) / 1000);
+      upstreamRequests.inc({ endpoint, code: error.type === 'request-timeout' ? 'TIMEOUT' : error.code || 'NETWORK' });
+      circuitBreaker.recordFailure(error);
+      throw error;
+    }
+    upstreamDuration.observe({ endpoint }, (performance.now() - startedAt) / 1000);
+    upstreamRequests.inc({ endpoint, code: response.status });
+    upstreamScheduler.recordResponse(response);
+    if (response.status >= 500) {
+      circuitBreaker.recordFailure(new Error(`Spoonacular responded ${response.status}`));
+    } else {
+      circuitBreaker.recordSuccess();
+    }
+    return response;
+  }, priority, { isProbe }).catch(error => {
+    // Turned away by the scheduler (quota, queue timeout) before reaching Spoonacular
+    if (error instanceof UpstreamError) upstreamRequests.inc({ endpoint, code: error.code });
+    throw error;
+  });
+}
+
+function countSockets(socketsByHost) {
+  return Object.values(socketsByHost).reduce((total, sockets) => total + sockets.length, 0);
+}
+
+function upstreamPoolStats() {
+  return {
+    maxSockets: UPSTREAM_MAX_SOCKETS,
+    activeSockets: countSockets(upstreamAgent.sockets),
+    idleSockets: countSockets(upstreamAgent.freeSockets),
+    queuedRequests: countSockets(upstreamAgent.requests),
+    timeoutMs: UPSTREAM_TIMEOUT_MS
+  };
+}
+
+// In-memory cache with a TTL and an LRU size bound, optionally persisted to disk.
+// A Map keeps insertion order, so re-inserting on every hit leaves the least
+// recently used entry first in line for eviction.
+class TTLCache {
+  constructor({ name, ttlMs, maxEntries, file = '' }) {
+    this.name = name;
+    this.ttlMs = ttlMs;
+    this.maxEntries = maxEntries;
+    this.file = file;
+    this.entries = new Map();
+    this.hits = 0;
+    this.misses = 0;
+    this.evictions = 0;
+    this.saveTimer = null;
+    this.load();
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      this.misses++;
+      return undefined;
+    }
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) {
+      this.misses++;
+      this.scheduleSave();
+      return undefined;
+    }
+    this.entries.set(key, entry);
+    this.hits++;
+    return entry.value;
+  }
+
+  set(key, value) {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + this.ttlMs });
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.evictions++;
+    }
+    this.scheduleSave();
+  }
+
+  delete(key) {
+    if (this.entries.delete(key)) this.scheduleSave();
+  }
+
+  remainingTtl(key) {
+    const entry = this.entries.get(key);
+    return entry ? Math.max(0, entry.expiresAt - Date.now()) : 0;
+  }
+
+  stats() {
+    const lookups = this.hits + this.misses;
+    return {
+      entries: this.entries.size,
+      maxEntries: this.maxEntries,
+      ttlSeconds: Math.round(this.ttlMs / 1000),
+      hits: this.hits,
+      misses: this.misses,
+      hitRate: lookups > 0 ? Number((this.hits / lookups).toFixed(3)) : 0,
+      evictions: this.evictions,
+      persistedTo: this.file || null
+    };
+  }
+
+  load() {
+    if (!this.file) return;
+    try {
+      fs.mkdirSync(path.dirname(this.file), { recursive: true });
+      const saved = JSON.parse(fs.readFileSync(this.file, 'utf8'));
+      const now = Date.now();
+      (saved.entries || []).forEach(([key, entry]) => {
+        if (entry && entry.expiresAt > now) {
+          this.entries.set(key, entry);
+        }
+      });
+      while (this.entries.size > this.maxEntries) {
+        this.entries.delete(this.entries.keys().next().value);
+      }
+      console.log(`💾 ${this.name}: loaded ${this.entries.size} entries from ${this.file}`);
+    } catch (error) {
+      if (error.code !== 'ENOENT') {
+        console.warn(`⚠️ ${this.name}: could not load ${this.file}:`, error.message);
+      }
+    }
+  }
+
+  serialize() {
+    return JSON.stringify({ savedAt: new Date().toISOString(), entries: [...this.entries] });
+  }
+
+  // Debounced background write so a burst of misses costs one disk write
+  scheduleSave() {
+    if (!this.file || this.saveTimer) return;
+    this.saveTimer = setTimeout(() => {
+      this.saveTimer = null;
+      const tmpFile = `${this.file}.tmp`;
+      fs.promises.writeFile(tmpFile, this.serialize())
+        .then(() => fs.promises.rename(tmpFile, this.file))
+        .catch(error => console.warn(`⚠️ ${this.name}: could not save ${this.file}:`, error.message));
+    }, 5000);
+    this.saveTimer.unref();
+  }
+
+  // Synchronous flush used on shutdown
+  saveNow() {
+    if (!this.file) return;
+    if (this.saveTimer) {
+      clearTimeout(this.saveTimer);
+      this.saveTimer = null;
+    }
+    try {
+      fs.writeFileSync(this.file, this.serialize());
+    } catch (error) {
+      console.warn(`⚠️ ${this.name}: could not save ${this.file}:`, error.message);
+    }
+  }
+}
+
+const resultCache = new TTLCache({
+  name: 'Result cache',
+  ttlMs: RESULT_CACHE_TTL_MS,
+  maxEntries: RESULT_CACHE_MAX_ENTRIES,
+  file: RESULT_CACHE_FILE
+});
+
+// Ranked candidate IDs per basket, kept apart from the results so they
+// neither skew the result hit rate nor crowd pages out of its LRU. They
+// share the result TTL, so a page refresh also finds its candidates stale.
+const candidateCache = new TTLCache({
+  name: 'Candidate cache',
+  ttlMs: RESULT_CACHE_TTL_MS,
+  maxEntries: CANDIDATE_CACHE_MAX_ENTRIES
+});
+
+// Transformed recipes by Spoonacular ID, shared across all searches
+const recipeStore = new TTLCache({
+  name: 'Recipe store',
+  ttlMs: RECIPE_STORE_TTL_MS,
+  maxEntries: RECIPE_STORE_MAX_ENTRIES,
+  file: RECIPE_STORE_FILE
+});
+
+function normalizeList(values) {
+  const list = Array.isArray(values) ? values : String(values || '').split(',');
+  return [...new Set(list.map(value => String(value).trim().toLowerCase()).filter(Boolean))].sort();
+}
+
+// Cache key: the same basket in any order or casing maps to the same entry
+function buildSearchKey(ingredients, dietaryPreference, allergies, page = { offset: 0, limit: PAGE_SIZE }) {
+  return JSON.stringify([
+    normalizeList(ingredients),
+    String(dietaryPreference || '').trim().toLowerCase(),
+    normalizeList(allergies),
+    page.offset,
+    page.limit
+  ]);
+}
+
+// Ranked candidate IDs depend on the basket alone, so every page and filter shares them
+function buildCandidateKey(ingredients) {
+  return JSON.stringify(['candidates', normalizeList(ingredients)]);
+}
+
+// offset/limit cursor from the request body, clamped to sane values
+function parsePage(body) {
+  const offset = Math.max(0, parseInt(body.offset, 10) || 0);
+  const limit = Math.min(MAX_PAGE_SIZE, Math.max(1, parseInt(body.limit, 10) || PAGE_SIZE));
+  return { offset, limit };
+}
+
+// Fields a client can ask for with fields=; "summary" is the compact card view,
+// the rest comes from GET /recipe/:id when a card is expanded
+const RECIPE_FIELDS = [
+  'id', 'title', 'description', 'ingredients', 'instructions', 'time', 'dietary_labels',
+  'category', 'servings', 'image', 'sourceUrl', 'spoonacularScore', 'healthScore'
+];
+const SUMMARY_FIELDS = ['id', 'title', 'time', 'dietary_labels', 'category', 'servings', 'image'];
+
+// fields=summary or a comma-separated list (body or query string); null sends whole recipes
+function parseFields(value) {
+  if (!value) return null;
+  const requested = normalizeList(value);
+  if (requested.includes('summary')) return SUMMARY_FIELDS;
+  const fields = RECIPE_FIELDS.filter(field => requested.includes(field.toLowerCase()));
+  return fields.length > 0 ? [...new Set(['id', ...fields])] : null;
+}
+
+// Recipes without an id (fallback recipes) cannot be fetched later, so they go out whole
+function projectRecipe(recipe, fields) {
+  if (!fields || recipe.id === undefined || recipe.id === null || recipe.id === '') return recipe;
+  const projected = {};
+  fields.forEach(field => {
+    if (recipe[field] !== undefined) projected[field] = recipe[field];
+  });
+  return projected;
+}
+
+function projectResult(result, fields) {
+  if (!fields) return result;
+  return { ...result, recipes: (result.recipes || []).map(recipe => projectRecipe(recipe, fields)) };
+}
+
+// Helper to transform Spoonacular recipe data
+function transformRecipe(recipe) {
+  const ingredients = recipe.extendedIngredients 
+    ? recipe.extendedIngredients.map(ingredient => ingredient.original)
+    : [];
+
+  let instructions = [];
+  if (recipe.analyzedInstructions && recipe.analyzedInstructions.length > 0) {
+    instructions = recipe.analyzedInstructions[0].steps.map(step => step.step);
+  } else if (recipe.instructions) {
+    instructions = recipe.instructions
+      .split(/[\\r\\n]+/)
+      .filter(instruction => instruction.trim().length > 0)
+      .map(instruction => instruction.trim());
+  }
+
+  const description = recipe.summary 
+    ? recipe.summary.replace(/<[^>]*>/g, '').substring(0, 200) + '...'
+    : 'A delicious recipe made with your selected ingredients.';
+
+  const dietaryLabels = [
+    recipe.vegetarian ? 'Vegetarian' : null,
+    recipe.vegan ? 'Vegan' : null,
+    recipe.glutenFree ? 'Gluten-Free' : null,
+    recipe.dairyFree ? 'Dairy-Free' : null,
+    recipe.veryHealthy ? 'Healthy' : null,
+    ...(recipe.dishTypes || []),
+    ...(recipe.cuisines || [])
+  ].filter(Boolean);
+
+  return {
+    id: recipe.id,
+    title: recipe.title || "Delicious Recipe",
+    description: description,
+    ingredients: ingredients,
+    instructions: instructions,
+    time: recipe.readyInMinutes ? `${recipe.readyInMinutes} minutes` : '',
+    dietary_labels: dietaryLabels,
+    // Diet/allergen bitmasks, computed once here so filtering is a bitwise test
+    dietMask: dietMaskFor([...dietaryLabels, ...(recipe.diets || [])]),
+    allergenMask: allergenMaskFor(ingredients),
+    category: recipe.dishTypes ? recipe.dishTypes[0] : 'Main Course',
+    servings: recipe.servings ? recipe.servings.toString() : '',
+    image: recipe.image || '',
+    sourceUrl: recipe.sourceUrl || '',
+    spoonacularScore: recipe.spoonacularScore || 0,
+    healthScore: recipe.healthScore || 0
+  };
+}
+
+// Single-flight: concurrent callers with the same key share one in-flight promise
+class SingleFlight {
+  constructor() {
+    this.inFlight = new Map();
+    this.executed = 0;
+    this.coalesced = 0;
+  }
+
+  run(key, fn) {
+    if (this.inFlight.has(key)) {
+      this.coalesced++;
+      return this.inFlight.get(key);
+    }
+    this.executed++;
+    const promise = Promise.resolve()
+      .then(fn)
+      .finally(() => this.inFlight.delete(key));
+    this.inFlight.set(key, promise);
+    return promise;
+  }
+
+  stats() {
+    return {
+      inFlight: this.inFlight.size,
+      executed: this.executed,
+      coalesced: this.coalesced
+    };
+  }
+}
+
+const searchFlight = new SingleFlight();
+const detailFlight = new SingleFlight();
+const statusFlight = new SingleFlight();
+
+// Collects detail lookups from concurrent requests and resolves them with a
+// single bulk call once the batch window closes or the batch is full. A recipe
+// Spoonacular doesn't know resolves to null; a lookup that never got an answer
+// (circuit open, quota, timeout, 5xx) rejects, so callers can tell them apart.
+class DetailBatcher {
+  constructor({ windowMs, maxBatchSize, fetchBulk, fetchOne }) {
+    this.windowMs = windowMs;
+    this.maxBatchSize = maxBatchSize;
+    this.fetchBulk = fetchBulk;
+    this.fetchOne = fetchOne;
+    this.pending = new Map();
+    this.pendingPriority = 'background';
+    this.timer = null;
+    this.batches = 0;
+    this.idsRequested = 0;
+    this.bulkFailures = 0;
+  }
+
+  load(recipeId, priority = 'user') {
+    return new Promise((resolve, reject) => {
+      const key = String(recipeId);
+      if (priority === 'user') {
+        this.pendingPriority = 'user';
+      }
+      if (!this.pending.has(key)) {
+        this.pending.set(key, []);
+        this.idsRequested++;
+      }
+      this.pending.get(key).push({ resolve, reject });
+
+      if (this.pending.size >= this.maxBatchSize) {
+        this.flush();
+      } else if (!this.timer) {
+        this.timer = setTimeout(() => this.flush(), this.windowMs);
+      }
+    });
+  }
+
+  async flush() {
+    clearTimeout(this.timer);
+    this.timer = null;
+    const batch = this.pending;
+    const priority = this.pendingPriority;
+    this.pending = new Map();
+    this.pendingPriority = 'background';
+    if (batch.size === 0) return;
+
+    const ids = [...batch.keys()];
+    this.batches++;
+    // id -> recipe, null (not found) or the Error that kept it from an answer
+    const outcomes = new Map();
+    try {
+      const results = await this.fetchBulk(ids, priority);
+      ids.forEach(id => outcomes.set(id, results.get(id) || null));
+    } catch (error) {
+      this.bulkFailures++;
+      if (error instanceof UpstreamError) {
+        // Circuit open or quota refused: per-ID calls would be refused too
+        console.warn(`⚠️ Bulk lookup for ${ids.length} recipes skipped:`, error.message);
+        ids.forEach(id => outcomes.set(id, error));
+      } else {
+        console.warn(`⚠️ Bulk lookup for ${ids.length} recipes failed, falling back to per-ID calls:`, error.message);
+        const single = await Promise.allSettled(ids.map(id => this.fetchOne(id, priority)));
+        single.forEach((settled, index) =>
+          outcomes.set(ids[index], settled.status === 'fulfilled' ? settled.value : settled.reason));
+      }
+    }
+
+    batch.forEach((waiters, id) => {
+      const outcome = outcomes.get(id);
+      waiters.forEach(({ resolve, reject }) => (outcome instanceof Error ? reject(outcome) : resolve(outcome)));
+    });
+  }
+
+  stats() {
+    return {
+      batches: this.batches,
+      idsRequested: this.idsRequested,
+      averageBatchSize: this.batches > 0 ? Number((this.idsRequested / this.batches).toFixed(2)) : 0,
+      bulkFailures: this.bulkFailures
+    };
+  }
+}
+
+async function fetchRecipeBulk(ids, priority) {
+  const bulkUrl = `https://api.spoonacular.com/recipes/informationBulk?ids=${ids.join(',')}&includeNutrition=false&apiKey=${SPOONACULAR_API_KEY}`;
+  const bulkResponse = await upstreamFetch(bulkUrl, { timeoutMs: UPSTREAM_BULK_TIMEOUT_MS, priority });
+
+  if (!bulkResponse.ok) {
+    throw new Error(`Spoonacular bulk lookup failed: ${bulkResponse.status} ${bulkResponse.statusText}`);
+  }
+
+  const detailList = await bulkResponse.json();
+  const results = new Map();
+  detailList.forEach(detailData => {
+    const recipe = transformRecipe(detailData);
+    recipeStore.set(String(recipe.id), recipe);
+    results.set(String(recipe.id), recipe);
+  });
+  return results;
+}
+
+// null when Spoonacular has no such recipe; throws when it couldn't answer
+async function fetchRecipeDetail(recipeId, priority) {
+  try {
+    const detailUrl = `https://api.spoonacular.com/recipes/${recipeId}/information?includeNutrition=false&apiKey=${SPOONACULAR_API_KEY}`;
+    const detailResponse = await upstreamFetch(detailUrl, { priority });
+
+    if (detailResponse.status === 404) {
+      console.warn(`Recipe ${recipeId} not found on Spoonacular`);
+      return null;
+    }
+    if (!detailResponse.ok) {
+      throw new Error(`Spoonacular detail lookup failed: ${detailResponse.status} ${detailResponse.statusText}`);
+    }
+
+    const detailData = await detailResponse.json();
+    const recipe = transformRecipe(detailData);
+    recipeStore.set(String(recipeId), recipe);
+    return recipe;
+  } catch (error) {
+    console.error(`Error fetching recipe ${recipeId}:`, error.message);
+    throw error;
+  }
+}
+
+const detailBatcher = new DetailBatcher({
+  windowMs: DETAIL_BATCH_WINDOW_MS,
+  maxBatchSize: DETAIL_BATCH_MAX_IDS,
+  fetchBulk: fetchRecipeBulk,
+  fetchOne: fetchRecipeDetail
+});
+
+// Recipe details come from the shared store; only unseen or expired IDs hit the API.
+// Resolves null for an unknown recipe, rejects when Spoonacular couldn't answer.
+async function getRecipeDetails(recipeId, priority = 'user') {
+  const stored = recipeStore.get(String(recipeId));
+  if (stored) return stored;
+  return detailFlight.run(String(recipeId), () => detailBatcher.load(recipeId, priority));
+}
+
+// Inverted ingredient index over the local corpus, loaded once at startup.
+// The precomputed recipe-index.json from build_corpus.py is used when it
+// matches the recipes file; otherwise the index is built in memory.
+function loadLocalIndex() {
+  try {
+    const recipes = JSON.parse(fs.readFileSync(LOCAL_RECIPES_FILE, 'utf8'));
+    const startedAt = Date.now();
+    let index = null;
+    try {
+      const packed = JSON.parse(fs.readFileSync(LOCAL_INDEX_FILE, 'utf8'));
+      if (packed.count === recipes.length) {
+        index = RecipeIndex.fromPacked(packed, recipes);
+      }
+    } catch (error) {
+      if (error.code !== 'ENOENT') {
+        console.warn(`⚠️ Ignoring ${LOCAL_INDEX_FILE}:`, error.message);
+      }
+    }
+    if (!index) {
+      index = RecipeIndex.build(recipes);
+    }
+    console.log(`📚 Local recipe index: ${index.size} recipes in ${Date.now() - startedAt}ms`);
+    return index;
+  } catch (error) {
+    if (error.code !== 'ENOENT') {
+      console.warn(`⚠️ Could not load local recipes from ${LOCAL_RECIPES_FILE}:`, error.message);
+    }
+    return RecipeIndex.build([]);
+  }
+}
+
+const localIndex = loadLocalIndex();
+const localRecipesById = new Map(
+  localIndex.recipes.filter(recipe => recipe.id !== undefined && recipe.id !== null).map(recipe => [String(recipe.id), recipe])
+);
+
+// Per-recipe diet and allergy tests on the recipes' bitmasks. Recipes cached
+// before the masks existed (and fallback recipes) get them computed on the spot.
+function buildPreferenceTests(dietaryPreference, allergies) {
+  const dietMask = dietQueryMask(dietaryPreference);
+  const preference = normalizeLabel(dietaryPreference || '');
+  const { mask, unknown } = parseAllergies(allergies);
+  const excluded = unknown.map(term => tokenize(term)).filter(tokens => tokens.length > 0);
+
+  return {
+    matchesDiet(recipe) {
+      if (!preference) return true;
+      if (!dietMask) {
+        return (recipe.dietary_labels || []).some(label => normalizeLabel(label) === preference);
+      }
+      const recipeMask = recipe.dietMask !== undefined ? recipe.dietMask : dietMaskFor(recipe.dietary_labels);
+      return (recipeMask & dietMask) === dietMask;
+    },
+
+    isAllergySafe(recipe) {
+      const recipeMask = recipe.allergenMask !== undefined ? recipe.allergenMask : allergenMaskFor(recipe.ingredients);
+      if ((recipeMask & mask) !== 0) return false;
+      if (excluded.length === 0) return true;
+      const tokens = new Set([recipe.title, ...(recipe.ingredients || [])].flatMap(text => tokenize(text)));
+      return !excluded.some(termTokens => termTokens.every(token => tokens.has(token)));
+    }
+  };
+}
+
+// Best local matches for the basket; createFallbackRecipe only when the corpus has nothing.
+// Filtering happens inside the index scan, so it never runs out of candidates.
+function buildLocalResult(ingredients, dietaryPreference, allergies, details = {}, page = { offset: 0, limit: PAGE_SIZE }) {
+  const { mask, unknown } = parseAllergies(allergies);
+  // One extra match tells whether another page exists
+  const options = { limit: page.offset + page.limit + 1, allergenMask: mask, excludeTerms: unknown };
+  const dietMask = dietQueryMask(dietaryPreference);
+  // The diet is a preference: other diets beat no recipe at all
+  let matches = dietMask ? localIndex.search(ingredients, { ...options, dietMask }) : [];
+  if (matches.length === 0) {
+    matches = localIndex.search(ingredients, options);
+  }
+  const recipes = matches.slice(page.offset, page.offset + page.limit).map(match => match.recipe);
+  const hasMore = matches.length > page.offset + page.limit;
+  const cursor = { offset: page.offset, limit: page.limit, nextOffset: hasMore ? page.offset + page.limit : null, hasMore };
+
+  if (recipes.length > 0 || page.offset > 0) {
+    return { recipes, apiSource: 'Local', ...cursor, ...details };
+  }
+  return {
+    recipes: [createFallbackRecipe(ingredients, dietaryPreference)],
+    apiSource: 'Fallback',
+    ...cursor,
+    ...details
+  };
+}
+
+// Fallback recipe generator
+function createFallbackRecipe(ingredients, dietaryPreference) {
+  fallbackRecipes.inc();
+  const mainIngredient = ingredients[0] || 'ingredients';
+  const cuisineHint = dietaryPreference === 'indian' ? 'Indian-Style ' : '';
+  
+  return {
+    title: `${cuisineHint}${mainIngredient.charAt(0).toUpperCase() + mainIngredient.slice(1)} Delight`,
+    description: `A delicious homemade ${cuisineHint.toLowerCase()}dish featuring ${ingredients.slice(0, 3).join(', ')} and more fresh ingredients.`,
+    ingredients: [
+      ...ingredients.map(ing => `1-2 portions ${ing}`),
+      "Salt and pepper to taste",
+      "2 tbsp cooking oil",
+      "Fresh herbs (optional)",
+      "Spices as needed"
+    ],
+    instructions: [
+      "Wash and prepare all your fresh ingredients",
+      `Heat oil in a large pan or pot over medium heat`,
+      `Add ${ingredients[0]} and cook until lightly golden`,
+      ingredients.length > 1 ? `Add ${ingredients.slice(1).join(', ')} and cook for 5-7 minutes` : "Continue cooking for 5-7 minutes",
+      "Season with salt, pepper, and your favorite spices",
+      dietaryPreference === 'indian' ? "Add Indian spices like turmeric, cumin, or garam masala" : "Add herbs and spices to taste",
+      "Cook until all ingredients are tender and well combined",
+      "Taste and adjust seasoning as needed",
+      "Serve hot and enjoy your homemade creation!"
+    ],
+    time: "25-30 minutes",
+    dietary_labels: dietaryPreference ? [dietaryPreference] : ["Homemade"],
+    category: "Main Course",
+    servings: "2-4",
+    image: '',
+    sourceUrl: '',
+    spoonacularScore: 0,
+    healthScore: 0
+  };
+}
+
+// Ranked recipe IDs for a basket from one findByIngredients call
+async function fetchCandidates(ingredients, candidateKey, priority) {
+  const ingredientsString = ingredients.join(',+');
+  const searchUrl = `https://api.spoonacular.com/recipes/findByIngredients?ingredients=${encodeURIComponent(ingredientsString)}&number=${SEARCH_CANDIDATES}&ranking=2&ignorePantry=true&apiKey=${SPOONACULAR_API_KEY}`;
+  
+  console.log('🌐 Calling Spoonacular API...');
+  
+  const searchResponse = await upstreamFetch(searchUrl, { priority });
+  if (!searchResponse.ok) {
+    throw new Error(`Spoonacular search failed: ${searchResponse.status} ${searchResponse.statusText}`);
+  }
+
+  const foundRecipes = await searchResponse.json();
+  console.log(`📋 Found ${foundRecipes.length} recipe matches`);
+
+  const candidates = (foundRecipes || []).map(recipe => recipe.id);
+  candidateCache.set(candidateKey, candidates);
+  return candidates;
+}
+
+// Search Spoonacular and build one page of results for a normalized query.
+// Candidates are walked from page.offset until the page is full; each recipe
+// that passes the filters goes to onRecipe as soon as its details arrive.
+// Allergies always filter. The diet only ranks: recipes of other diets are
+// held back and fill the page only when none of the diet was found.
+async function searchRecipes(ingredients, dietaryPreference, allergies, cacheKey, priority = 'user', page = { offset: 0, limit: PAGE_SIZE }, onRecipe = null) {
+  const candidateKey = buildCandidateKey(ingredients);
+  const candidates = candidateCache.get(candidateKey) ||
+    await searchFlight.run(candidateKey, () => fetchCandidates(ingredients, candidateKey, priority));
+
+  if (candidates.length === 0) {
+    return buildLocalResult(ingredients, dietaryPreference, allergies, {
+      message: 'No matches found, showing local recipes'
+    }, page);
+  }
+
+  const { matchesDiet, isAllergySafe } = buildPreferenceTests(dietaryPreference, allergies);
+  const recipes = [];
+  const heldBack = [];
+  // Set when a lookup failed upstream rather than being filtered out: such a
+  // page may be missing recipes, so it is served but never cached
+  let lookupFailed = false;
+  const scanLimit = Math.min(candidates.length, page.offset + page.limit * 3);
+  let cursor = page.offset;
+
+  while (recipes.length < page.limit && cursor < scanLimit) {
+    const ids = candidates.slice(cursor, Math.min(scanLimit, cursor + page.limit - recipes.length));
+    cursor += ids.length;
+    // Get detailed information for recipes; slots keep Spoonacular's ranking
+    const slots = await Promise.all(ids.map(id =>
+      getRecipeDetails(id, priority).catch(() => {
+        lookupFailed = true;
+        return null;
+      }).then(recipe => {
+        if (!recipe || !isAllergySafe(recipe)) return null;
+        if (!matchesDiet(recipe)) {
+          heldBack.push(recipe);
+          return null;
+        }
+        if (onRecipe) onRecipe(recipe);
+        return recipe;
+      })
+    ));
+    slots.forEach(recipe => {
+      if (recipe) recipes.push(recipe);
+    });
+  }
+
+  if (recipes.length === 0 && heldBack.length > 0) {
+    recipes.push(...heldBack.slice(0, page.limit));
+    if (onRecipe) recipes.forEach(onRecipe);
+  }
+
+  // Ensure the first page has at least one recipe
+  if (recipes.length === 0 && page.offset === 0) {
+    return buildLocalResult(ingredients, dietaryPreference, allergies, lookupFailed ? {
+      error: 'Spoonacular recipe details unavailable',
+      message: 'API unavailable, showing local recipes'
+    } : {}, page);
+  }
+  // A later page emptied by failures is an outage, not the end of the results
+  if (recipes.length === 0 && lookupFailed) {
+    throw new UpstreamError('Spoonacular recipe details unavailable', 'DETAILS_UNAVAILABLE');
+  }
+
+  console.log(`✅ Returning ${recipes.length} recipes`);
+
+  const hasMore = cursor < candidates.length;
+  const result = {
+    recipes,
+    apiSource: 'Spoonacular',
+    totalFound: candidates.length,
+    afterFiltering: recipes.length,
+    offset: page.offset,
+    limit: page.limit,
+    nextOffset: hasMore ? cursor : null,
+    hasMore
+  };
+  if (!lookupFailed) resultCache.set(cacheKey, result);
+  return result;
+}
+
+// NDJSON reply for /generate-recipe: one {"type":"recipe"} line per recipe as
+// soon as it is ready, then a {"type":"done"} line with the page metadata.
+// Clients opt in with "Accept: application/x-ndjson".
+class RecipeStream {
+  constructor(res, fields = null) {
+    this.res = res;
+    this.fields = fields;
+    this.sent = new Set();
+    res.status(200);
+    res.set({
+      'Content-Type': 'application/x-ndjson; charset=utf-8',
+      'Cache-Control': 'no-cache',
+      'X-Accel-Buffering': 'no'
     });
+    res.flushHeaders();
+  }
+
+  static wanted(req) {
+    return String(req.get('Accept') || '').includes('application/x-ndjson');
+  }
+
+  write(event) {
+    if (!this.res.writableEnded && !this.res.destroyed) {
+      this.res.write(JSON.stringify(event) + '\\n');
+    }
+  }
+
+  recipe(recipe) {
+    if (this.sent.has(recipe)) return;
+    this.sent.add(recipe);
+    this.write({ type: 'recipe', recipe: projectRecipe(recipe, this.fields) });
+  }
+
+  // Recipes not streamed yet (cache hits, coalesced or local results) go out first
+  finish(result) {
+    const { recipes = [], ...meta } = result;
+    recipes.forEach(recipe => this.recipe(recipe));
+    this.write({ type: 'done', ...meta });
+    this.res.end();
+  }
+}
+
+// Refill a cache entry that is about to expire without making the user wait;
+// runs at background priority so it never competes with live searches
+function refreshSearchInBackground(ingredients, dietaryPreference, allergies, cacheKey, page) {
+  // Refresh the candidate list too, not just this page
+  candidateCache.delete(buildCandidateKey(ingredients));
+  searchFlight.run(cacheKey, () =>
+    searchRecipes(ingredients, dietaryPreference, allergies, cacheKey, 'background', page)
+  ).catch(error => console.warn('⚠️ Background cache refresh skipped:', error.message));
+}
+
+// Enhanced /generate-recipe endpoint with Spoonacular integration.
+// Pages with offset/limit; streams NDJSON when the client asks for it;
+// fields= trims each recipe (the cache always keeps whole recipes).
+app.post('/generate-recipe', async (req, res) => {
+  const { ingredients = [], dietaryPreference = '', allergies = '' } = req.body;
+  const page = parsePage(req.body);
+  const fields = parseFields(req.body.fields || req.query.fields);
+  let stream = null;
+
+  // JSON in one piece, or the rest of the stream
+  const reply = result => {
+    recipeResults.inc({ source: result.apiSource || 'unknown', cached: Boolean(result.cached) });
+    return stream ? stream.finish(result) : res.json(projectResult(result, fields));
+  };
+
+  try {
+    if (!ingredients || ingredients.length === 0) {
+      return res.status(400).json({ 
+        error: 'Please provide at least one ingredient', 
+        recipes: [] 
+      });
+    }
+
+    console.log('🔍 Searching recipes for ingredients:', ingredients);
+    console.log('🥗 Dietary preference:', dietaryPreference);
+    console.log('⚠️ Allergies:', allergies);
+
+    const cacheKey = buildSearchKey(ingredients, dietaryPreference, allergies, page);
+    const cachedResult = resultCache.get(cacheKey);
+    res.set('X-Cache', cachedResult ? 'HIT' : 'MISS');
+    if (RecipeStream.wanted(req)) {
+      stream = new RecipeStream(res, fields);
+    }
+
+    if (cachedResult) {
+      console.log('⚡ Serving cached recipes');
+      if (resultCache.remainingTtl(cacheKey) < RESULT_CACHE_TTL_MS * 0.2) {
+        refreshSearchInBackground(ingredients, dietaryPreference, allergies, cacheKey, page);
+      }
+      return reply({ ...cachedResult, cached: true });
+    }
+
+    if (RECIPE_SOURCE === 'local') {
+      return reply(buildLocalResult(ingredients, dietaryPreference, allergies, {}, page));
+    }
+
+    // Identical searches already in flight share one upstream request
+    const result = await searchFlight.run(cacheKey, () =>
+      searchRecipes(ingredients, dietaryPreference, allergies, cacheKey, 'user', page,
+        stream ? recipe => stream.recipe(recipe) : null)
+    );
+    reply(result);
 
   } catch (error) {
     console.error('❌ Recipe generation error:', error.message);
     
-    const { ingredients = [], dietaryPreference = '' } = req.body;
-    const fallbackRecipe = createFallbackRecipe(ingredients, dietaryPreference);
-    
-    res.json({
-      recipes: [fallbackRecipe],
-      apiSource: 'Fallback',
+    reply(buildLocalResult(ingredients, dietaryPreference, allergies, {
       error: error.message,
-      message: 'API unavailable, showing demo recipe'
+      message: 'API unavailable, showing local recipes'
+    }, page));
+  }
+});
+
+// Seconds until Spoonacular is worth asking again: the next circuit probe or
+// the end of a rate-limit pause, else a short default
+function upstreamRetryAfterSeconds() {
+  const waitMs = Math.max(circuitBreaker.stats().nextProbeInMs || 0, upstreamScheduler.pausedUntil - Date.now());
+  return Math.ceil(waitMs / 1000) || 5;
+}
+
+// Full recipe for an expanded summary card: shared store, local corpus, then Spoonacular
+app.get('/recipe/:id', async (req, res) => {
+  const recipeId = String(req.params.id);
+  try {
+    let recipe = recipeStore.get(recipeId) || localRecipesById.get(recipeId) || null;
+    if (!recipe && RECIPE_SOURCE !== 'local' && /^\\d+$/.test(recipeId)) {
+      try {
+        recipe = await getRecipeDetails(recipeId);
+      } catch (error) {
+        // Spoonacular couldn't answer, which says nothing about whether the recipe exists
+        console.warn(`⚠️ Recipe ${recipeId} unavailable:`, error.message);
+        res.set({ 'Retry-After': String(upstreamRetryAfterSeconds()), 'Cache-Control': 'no-store' });
+        return res.status(503).json({ error: 'Recipe source temporarily unavailable', id: recipeId });
+      }
+    }
+    if (!recipe) {
+      return res.status(404).json({ error: 'Recipe not found', id: recipeId });
+    }
+    res.set('Cache-Control', 'public, max-age=3600');
+    res.json(projectRecipe(recipe, parseFields(req.query.fields)));
+  } catch (error) {
+    console.error(`❌ Recipe ${recipeId} lookup error:`, error.message);
+    res.status(502).json({ error: error.message, id: recipeId });
+  }
+});
+
+// Sliding window of client-reported timings per metric, summarized as percentiles
+class TimingSamples {
+  constructor({ metrics, sources, size }) {
+    this.size = size;
+    this.samples = new Map(metrics.map(metric => [metric, []]));
+    this.sources = Object.fromEntries(sources.map(source => [source, 0]));
+    this.received = 0;
+    this.rejected = 0;
+  }
+
+  // Accepts {source, timings: {metric: ms}}; returns false for a malformed report
+  add(report) {
+    const timings = report && typeof report.timings === 'object' ? report.timings : null;
+    const known = report && Object.prototype.hasOwnProperty.call(this.sources, report.source);
+    const entries = timings && known
+      ? Object.entries(timings).filter(([metric, ms]) =>
+        this.samples.has(metric) && Number.isFinite(ms) && ms >= 0 && ms < 10 * 60 * 1000)
+      : [];
+    if (entries.length === 0) {
+      this.rejected++;
+      return false;
+    }
+    entries.forEach(([metric, ms]) => {
+      const list = this.samples.get(metric);
+      list.push(Math.round(ms));
+      if (list.length > this.size) list.shift();
+    });
+    this.sources[report.source]++;
+    this.received++;
+    return true;
+  }
+
+  // Nearest-rank percentile of a sorted list
+  static percentile(sorted, p) {
+    return sorted[Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1)];
+  }
+
+  stats() {
+    const metrics = {};
+    this.samples.forEach((list, metric) => {
+      if (list.length === 0) return;
+      const sorted = [...list].sort((a, b) => a - b);
+      metrics[metric] = {
+        count: sorted.length,
+        p50: TimingSamples.percentile(sorted, 50),
+        p75: TimingSamples.percentile(sorted, 75),
+        p95: TimingSamples.percentile(sorted, 95),
+        p99: TimingSamples.percentile(sorted, 99),
+        max: sorted[sorted.length - 1]
+      };
     });
+    return {
+      enabled: PERF_BEACON_ENABLED,
+      window: this.size,
+      received: this.received,
+      rejected: this.rejected,
+      sources: this.sources,
+      metrics
+    };
+  }
+}
+
+// ttfb: request start to first byte; firstCard: to the first recipe card
+// painted; renderDone: to the last card painted (all in ms, from app.js).
+// source is 'api' for server searches and 'offline' for local matching.
+const clientTimings = new TimingSamples({
+  metrics: ['ttfb', 'firstCard', 'renderDone'],
+  sources: ['api', 'offline'],
+  size: PERF_SAMPLE_SIZE
+});
+
+app.post('/perf', (req, res) => {
+  if (!PERF_BEACON_ENABLED) {
+    return res.status(404).json({ error: 'Timing beacon disabled' });
   }
+  if (!clientTimings.add(req.body)) {
+    return res.status(400).json({ error: 'Expected {source: api|offline, timings: {ttfb, firstCard, renderDone}}' });
+  }
+  res.status(204).end();
+});
+
+app.get('/perf', (req, res) => {
+  res.set('Cache-Control', 'no-store');
+  res.json(clientTimings.stats());
+});
+
+// Scrape-time metrics: caches, event loop and memory
+const caches = [resultCache, candidateCache, recipeStore];
+metrics.collected('smarty_cache_hits_total', 'Cache lookups that found a fresh entry', 'counter',
+  () => caches.map(cache => [{ cache: cache.name }, cache.hits]));
+metrics.collected('smarty_cache_misses_total', 'Cache lookups that found nothing or an expired entry', 'counter',
+  () => caches.map(cache => [{ cache: cache.name }, cache.misses]));
+metrics.collected('smarty_cache_hit_ratio', 'Hits over lookups since start', 'gauge',
+  () => caches.map(cache => [{ cache: cache.name }, cache.stats().hitRate]));
+metrics.collected('smarty_cache_entries', 'Entries held per cache', 'gauge',
+  () => caches.map(cache => [{ cache: cache.name }, cache.stats().entries]));
+metrics.collected('smarty_circuit_open', '1 while the Spoonacular circuit breaker is open', 'gauge',
+  () => [[{}, circuitBreaker.state === 'open' ? 1 : 0]]);
+metrics.collected('nodejs_eventloop_lag_seconds',
+  `Event-loop delay over the last full ${EVENT_LOOP_WINDOW_MS / 1000}s window`, 'gauge',
+  () => eventLoopWindow || eventLoopQuantiles());
+metrics.collected('nodejs_heap_used_bytes', 'V8 heap in use', 'gauge', () => [[{}, process.memoryUsage().heapUsed]]);
+metrics.collected('nodejs_heap_total_bytes', 'V8 heap reserved', 'gauge', () => [[{}, process.memoryUsage().heapTotal]]);
+metrics.collected('nodejs_external_memory_bytes', 'Memory held by Buffers and other C++ objects', 'gauge',
+  () => [[{}, process.memoryUsage().external]]);
+metrics.collected('process_resident_memory_bytes', 'Resident set size', 'gauge', () => [[{}, process.memoryUsage().rss]]);
+metrics.collected('process_uptime_seconds', 'Seconds since the server started', 'gauge',
+  () => [[{}, Math.round(process.uptime())]]);
+
+app.get('/metrics', (req, res) => {
+  res.set('Content-Type', 'text/plain; version=0.0.4; charset=utf-8');
+  res.set('Cache-Control', 'no-store');
+  res.send(metrics.render());
 });
 
 // Health check endpoint
@@ -829,6 +3456,20 @@ app.get('/health', (req, res) => {
     timestamp: new Date().toISOString(),
     apiKey: SPOONACULAR_API_KEY ? "✅ Configured" : "❌ Missing",
     version: "2.0.0",
+    cache: {
+      results: resultCache.stats(),
+      candidates: candidateCache.stats(),
+      recipes: recipeStore.stats()
+    },
+    upstream: upstreamPoolStats(),
+    circuitBreaker: circuitBreaker.stats(),
+    localRecipes: { source: RECIPE_SOURCE, indexed: localIndex.size },
+    staticAssets: { dir: PUBLIC_DIR, immutable: immutableAssets.size, precompressed: precompressedAssets.size },
+    detailBatching: detailBatcher.stats(),
+    coalescing: {
+      searches: searchFlight.stats(),
+      details: detailFlight.stats()
+    },
     features: [
       "Spoonacular Recipe API Integration",
       "Visual Ingredient Selection", 
@@ -840,31 +3481,54 @@ app.get('/health', (req, res) => {
   });
 });
 
-// API status endpoint
-app.get('/api-status', async (req, res) => {
+// Live upstream check, shared by concurrent polls and reused for API_STATUS_TTL_MS
+let lastApiStatus = null;
+
+async function checkApiStatus() {
   try {
-    const fetch = (await import('node-fetch')).default;
     const testUrl = `https://api.spoonacular.com/recipes/random?number=1&apiKey=${SPOONACULAR_API_KEY}`;
-    const response = await fetch(testUrl);
-    
-    res.json({
+    const response = await upstreamFetch(testUrl, { priority: 'background' });
+    return {
       spoonacularAPI: response.ok ? "✅ Connected" : "❌ Failed",
-      statusCode: response.status,
-      dailyLimit: response.headers.get('X-RateLimit-Requests-Remaining') || 'Unknown',
-      timestamp: new Date().toISOString()
-    });
+      statusCode: response.status
+    };
   } catch (error) {
-    res.json({
-      spoonacularAPI: "❌ Connection Failed",
-      error: error.message,
-      timestamp: new Date().toISOString()
-    });
+    const labels = {
+      QUOTA: "⏸️ Skipped to save quota",
+      CIRCUIT_OPEN: "🔌 Circuit open, using local fallback"
+    };
+    return {
+      spoonacularAPI: labels[error.code] || "❌ Connection Failed",
+      error: error.message
+    };
+  }
+}
+
+// API status endpoint
+app.get('/api-status', async (req, res) => {
+  const stale = !lastApiStatus ||
+    Date.now() - lastApiStatus.checkedAt > API_STATUS_TTL_MS ||
+    lastApiStatus.circuitState !== circuitBreaker.state;
+  if (stale) {
+    const status = await statusFlight.run('api-status', checkApiStatus);
+    lastApiStatus = { status, checkedAt: Date.now(), circuitState: circuitBreaker.state };
   }
+
+  const scheduler = upstreamScheduler.stats();
+  res.json({
+    ...lastApiStatus.status,
+    checkedAt: new Date(lastApiStatus.checkedAt).toISOString(),
+    dailyLimit: scheduler.quota.pointsLeft !== null ? scheduler.quota.pointsLeft : 'Unknown',
+    quota: scheduler.quota,
+    scheduler: scheduler,
+    circuitBreaker: circuitBreaker.stats(),
+    timestamp: new Date().toISOString()
+  });
 });
 
 // Serve static files
 app.get('/', (req, res) => {
-  res.sendFile(path.join(__dirname, 'index.html'));
+  res.sendFile(path.join(PUBLIC_DIR, 'index.html'));
 });
 
 // 404 handler
@@ -874,6 +3538,10 @@ app.use((req, res) => {
     availableEndpoints: [
       'GET / - Main application',
       'POST /generate-recipe - Generate recipes',
+      'GET /recipe/:id - Full recipe details',
+      'POST /perf - Report client search timings',
+      'GET /perf - Client timing percentiles',
+      'GET /metrics - Prometheus metrics',
       'GET /health - Server health check', 
       'GET /api-status - API connection status'
     ]
@@ -886,33 +3554,509 @@ app.listen(PORT, () => {
   console.log(`📱 Web App: http://localhost:${PORT}`);
   console.log(`🔧 Health Check: http://localhost:${PORT}/health`);
   console.log(`📊 API Status: http://localhost:${PORT}/api-status`);
+  console.log(`📈 Metrics: http://localhost:${PORT}/metrics`);
   console.log(`🍳 Made with ❤️ by Clement`);
 });
 
 // Graceful shutdown
-process.on('SIGTERM', () => {
+function shutdown() {
   console.log('🔄 Server shutting down...');
+  resultCache.saveNow();
+  recipeStore.saveNow();
   process.exit(0);
+}
+
+process.on('SIGTERM', shutdown);
+process.on('SIGINT', shutdown);'''
+
+# Local recipe engine shared by server.js (require) and app.js (script tag)
+recipe_engine_js = '''// Smarty-Chef.PCS Local Recipe Engine - inverted ingredient index with ranked matching
+(function (root, factory) {
+  if (typeof module === 'object' && module.exports) {
+    module.exports = factory();
+  } else {
+    root.RecipeEngine = factory();
+  }
+})(typeof self !== 'undefined' ? self : this, function () {
+  'use strict';
+
+  // Quantities, units and preparation words that say nothing about the ingredient
+  // (this and the class tables below are generated from recipe_vocab.py, so
+  // build_corpus.py tokenizes and classifies identically)
+  const STOP_WORDS = new Set(__STOP_WORDS__);
+
+  // Crude but deterministic singular form so "Tomatoes" and "2 tomatoes" meet
+  function normalizeToken(word) {
+    if (word.length > 4 && word.endsWith('ies')) return word.slice(0, -3) + 'y';
+    if (word.length > 4 && /(oes|ches|shes|xes)$/.test(word)) return word.slice(0, -2);
+    if (word.length > 3 && word.endsWith('s') && !/(ss|us|is)$/.test(word)) return word.slice(0, -1);
+    return word;
+  }
+
+  function tokenize(text) {
+    const tokens = [];
+    String(text || '').toLowerCase().split(/[^a-z]+/).forEach(word => {
+      if (word.length < 2 || STOP_WORDS.has(word)) return;
+      const token = normalizeToken(word);
+      if (!STOP_WORDS.has(token) && tokens.indexOf(token) === -1) tokens.push(token);
+    });
+    return tokens;
+  }
+
+  // Tokens in reading order with repeats kept, so phrases can be found in place
+  function tokenSequence(text) {
+    const tokens = [];
+    String(text || '').toLowerCase().split(/[^a-z]+/).forEach(word => {
+      if (word.length < 2 || STOP_WORDS.has(word)) return;
+      const token = normalizeToken(word);
+      if (!STOP_WORDS.has(token)) tokens.push(token);
+    });
+    return tokens;
+  }
+
+  // Diet and allergen classes, one bit each (order is the bit position)
+  const DIET_CLASSES = __DIET_CLASSES__;
+  const ALLERGEN_CLASSES = __ALLERGEN_CLASSES__.map(allergen => ({
+    name: allergen.name,
+    aliases: allergen.aliases.map(alias => tokenize(alias).join(' ')),
+    terms: allergen.terms.map(tokenize),
+    except: allergen.except.map(tokenize)
+  }));
+
+  function normalizeLabel(label) {
+    return String(label).toLowerCase().split(/[\\s_-]+/).join(' ').trim();
+  }
+
+  function phraseAt(tokens, phrase, start) {
+    return phrase.length > 0 && start + phrase.length <= tokens.length &&
+      phrase.every((token, offset) => tokens[start + offset] === token);
+  }
+
+  function containsPhrase(tokens, phrase) {
+    return tokens.some((token, start) => phraseAt(tokens, phrase, start));
+  }
+
+  // Bit per diet class whose labels include one of the recipe's dietary labels
+  function dietMaskFor(labels) {
+    const normalized = new Set((labels || []).map(normalizeLabel));
+    let mask = 0;
+    DIET_CLASSES.forEach((diet, bit) => {
+      if (diet.labels.some(label => normalized.has(label))) mask |= 1 << bit;
+    });
+    return mask >>> 0;
+  }
+
+  // Bit per allergen class found in the ingredient lines. Whole tokens only,
+  // so "nut" never matches "nutmeg"; exception phrases ("peanut butter" for
+  // dairy) are blanked out where they occur, in order, before the class terms
+  // are checked, so "milk, grated coconut" is still dairy.
+  function allergenMaskFor(lines) {
+    let mask = 0;
+    (lines || []).forEach(line => {
+      const lineTokens = tokenSequence(line);
+      ALLERGEN_CLASSES.forEach((allergen, bit) => {
+        if (mask & (1 << bit)) return;
+        const tokens = lineTokens.slice();
+        allergen.except.forEach(phrase => {
+          for (let start = 0; start < tokens.length; start++) {
+            if (phraseAt(tokens, phrase, start)) tokens.fill(null, start, start + phrase.length);
+          }
+        });
+        if (allergen.terms.some(term => containsPhrase(tokens, term))) mask |= 1 << bit;
+      });
+    });
+    return mask >>> 0;
+  }
+
+  // Mask for the diet dropdown value; 0 when it is not a known diet class
+  function dietQueryMask(preference) {
+    const wanted = normalizeLabel(preference || '');
+    if (!wanted) return 0;
+    const byName = DIET_CLASSES.findIndex(diet => normalizeLabel(diet.name) === wanted);
+    if (byName !== -1) return (1 << byName) >>> 0;
+    return dietMaskFor([wanted]);
+  }
+
+  // Split the free-text allergies field into known allergen classes (a mask)
+  // and leftover terms ("kiwi") that have to be matched as ingredients
+  function parseAllergies(allergies) {
+    let mask = 0;
+    const unknown = [];
+    String(allergies || '').split(/[,;\\n]+/).forEach(entry => {
+      const term = tokenize(entry).join(' ');
+      if (!term) return;
+      let known = false;
+      ALLERGEN_CLASSES.forEach((allergen, bit) => {
+        if (allergen.aliases.indexOf(term) !== -1 || normalizeLabel(allergen.name) === term) {
+          mask |= 1 << bit;
+          known = true;
+        }
+      });
+      if (!known) unknown.push(entry.trim());
+    });
+    return { mask: mask >>> 0, unknown };
+  }
+
+  // Intersect two ascending Int32Arrays / arrays of recipe ids
+  function intersect(a, b) {
+    const out = [];
+    let i = 0;
+    let j = 0;
+    while (i < a.length && j < b.length) {
+      if (a[i] === b[j]) {
+        out.push(a[i]);
+        i++;
+        j++;
+      } else if (a[i] < b[j]) {
+        i++;
+      } else {
+        j++;
+      }
+    }
+    return out;
+  }
+
+  class RecipeIndex {
+    constructor() {
+      this.recipes = [];
+      this.tokenIds = new Map();
+      this.postings = [];
+      this.ingredientCounts = new Uint16Array(0);
+      this.dietMasks = new Uint32Array(0);
+      this.allergenMasks = new Uint32Array(0);
+      this.scratch = new Uint16Array(0);
+    }
+
+    // Build once: token -> ascending list of recipe ids containing it
+    static build(recipes) {
+      const index = new RecipeIndex();
+      const lists = [];
+      index.recipes = recipes;
+      index.ingredientCounts = new Uint16Array(recipes.length);
+      index.dietMasks = new Uint32Array(recipes.length);
+      index.allergenMasks = new Uint32Array(recipes.length);
+
+      recipes.forEach((recipe, recipeId) => {
+        const ingredients = recipe.ingredients || [];
+        const seen = new Set();
+        ingredients.forEach(line => tokenize(line).forEach(token => seen.add(token)));
+        tokenize(recipe.title).forEach(token => seen.add(token));
+        seen.forEach(token => {
+          let tokenId = index.tokenIds.get(token);
+          if (tokenId === undefined) {
+            tokenId = lists.length;
+            index.tokenIds.set(token, tokenId);
+            lists.push([]);
+          }
+          lists[tokenId].push(recipeId);
+        });
+        index.ingredientCounts[recipeId] = Math.min(ingredients.length, 65535);
+        index.dietMasks[recipeId] = dietMaskFor(recipe.dietary_labels);
+        index.allergenMasks[recipeId] = allergenMaskFor(ingredients);
+      });
+
+      index.postings = lists.map(list => Int32Array.from(list));
+      index.scratch = new Uint16Array(recipes.length);
+      return index;
+    }
+
+    // Load an index precomputed by build_corpus.py; recipes are in the same order
+    static fromPacked(packed, recipes) {
+      if (packed.format !== 'smarty-chef-recipe-index' || packed.version !== 2) {
+        throw new Error('Unsupported recipe index format');
+      }
+      const index = new RecipeIndex();
+      index.recipes = recipes || packed.ids.map(id => ({ id }));
+      index.ingredientCounts = Uint16Array.from(packed.ingredientCounts);
+      // Masks built against other class tables are recomputed from the recipes
+      index.dietMasks = sameClasses(packed.diets, DIET_CLASSES)
+        ? Uint32Array.from(packed.dietMasks)
+        : Uint32Array.from(index.recipes, recipe => dietMaskFor(recipe.dietary_labels));
+      index.allergenMasks = sameClasses(packed.allergens, ALLERGEN_CLASSES)
+        ? Uint32Array.from(packed.allergenMasks)
+        : Uint32Array.from(index.recipes, recipe => allergenMaskFor(recipe.ingredients));
+      packed.tokens.forEach((token, tokenId) => index.tokenIds.set(token, tokenId));
+      index.postings = packed.postings.map(deltas => {
+        const list = new Int32Array(deltas.length);
+        let recipeId = 0;
+        for (let i = 0; i < deltas.length; i++) {
+          recipeId += deltas[i];
+          list[i] = recipeId;
+        }
+        return list;
+      });
+      index.scratch = new Uint16Array(packed.count);
+      return index;
+    }
+
+    get size() {
+      return this.recipes.length;
+    }
+
+    // Recipes containing every token of one selection ("Chicken Breast" needs both words)
+    matchSelection(selection) {
+      const lists = [];
+      for (const token of tokenize(selection)) {
+        const tokenId = this.tokenIds.get(token);
+        if (tokenId === undefined) return [];
+        lists.push(this.postings[tokenId]);
+      }
+      if (lists.length === 0) return [];
+      lists.sort((a, b) => a.length - b.length);
+      return lists.slice(1).reduce((acc, list) => intersect(acc, list), lists[0]);
+    }
+
+    // Rank by how much of the basket a recipe uses, then by how few extra
+    // ingredients it needs. Only recipes that match something are touched, and
+    // a bounded heap keeps the top results without sorting every match.
+    // dietMask keeps recipes carrying every requested diet bit, allergenMask
+    // drops recipes carrying any of those allergen bits, and excludeTerms drops
+    // recipes containing an ingredient outside the allergen classes.
+    search(selections, { limit = 10, filter = null, dietMask = 0, allergenMask = 0, excludeTerms = [] } = {}) {
+      const basket = [...new Set((selections || []).map(selection => String(selection).toLowerCase()))];
+      const counts = this.scratch;
+      const touched = [];
+      let excluded = null;
+      if (excludeTerms.length > 0) {
+        excluded = new Uint8Array(this.recipes.length);
+        excludeTerms.forEach(term => this.matchSelection(term).forEach(recipeId => { excluded[recipeId] = 1; }));
+      }
+
+      basket.forEach(selection => {
+        const matches = this.matchSelection(selection);
+        for (let i = 0; i < matches.length; i++) {
+          const recipeId = matches[i];
+          if (counts[recipeId] === 0) touched.push(recipeId);
+          counts[recipeId]++;
+        }
+      });
+
+      const heap = new TopK(limit);
+      for (let i = 0; i < touched.length; i++) {
+        const recipeId = touched[i];
+        const matched = counts[recipeId];
+        counts[recipeId] = 0;
+        if (dietMask && (this.dietMasks[recipeId] & dietMask) !== dietMask) continue;
+        if (allergenMask && (this.allergenMasks[recipeId] & allergenMask) !== 0) continue;
+        if (excluded && excluded[recipeId]) continue;
+        if (filter && !filter(recipeId)) continue;
+        const missing = Math.max(0, this.ingredientCounts[recipeId] - matched);
+        heap.push(recipeId, matched * 65536 + (65535 - missing));
+      }
+
+      return heap.entries().map(({ id, score }) => {
+        const matched = Math.floor(score / 65536);
+        return {
+          recipeId: id,
+          matched,
+          coverage: matched / basket.length,
+          missing: 65535 - (score % 65536),
+          recipe: this.recipes[id]
+        };
+      });
+    }
+  }
+
+  function sameClasses(names, classes) {
+    return Array.isArray(names) && names.join('|') === classes.map(entry => entry.name).join('|');
+  }
+
+  // Fixed-size min-heap of (id, score) kept in parallel arrays; ties go to the lower id
+  class TopK {
+    constructor(limit) {
+      this.limit = Math.max(0, limit);
+      this.ids = [];
+      this.scores = [];
+    }
+
+    less(i, j) {
+      return this.scores[i] < this.scores[j] || (this.scores[i] === this.scores[j] && this.ids[i] > this.ids[j]);
+    }
+
+    swap(i, j) {
+      const id = this.ids[i];
+      const score = this.scores[i];
+      this.ids[i] = this.ids[j];
+      this.scores[i] = this.scores[j];
+      this.ids[j] = id;
+      this.scores[j] = score;
+    }
+
+    push(id, score) {
+      if (this.limit === 0) return;
+      if (this.ids.length === this.limit) {
+        if (score < this.scores[0] || (score === this.scores[0] && id > this.ids[0])) return;
+        this.ids[0] = id;
+        this.scores[0] = score;
+        this.siftDown(0);
+      } else {
+        this.ids.push(id);
+        this.scores.push(score);
+        this.siftUp(this.ids.length - 1);
+      }
+    }
+
+    siftUp(i) {
+      while (i > 0) {
+        const parent = (i - 1) >> 1;
+        if (!this.less(i, parent)) break;
+        this.swap(i, parent);
+        i = parent;
+      }
+    }
+
+    siftDown(i) {
+      for (;;) {
+        const left = 2 * i + 1;
+        const right = left + 1;
+        let smallest = i;
+        if (left < this.ids.length && this.less(left, smallest)) smallest = left;
+        if (right < this.ids.length && this.less(right, smallest)) smallest = right;
+        if (smallest === i) break;
+        this.swap(i, smallest);
+        i = smallest;
+      }
+    }
+
+    // Best first
+    entries() {
+      return this.ids
+        .map((id, i) => ({ id, score: this.scores[i] }))
+        .sort((a, b) => (b.score - a.score) || (a.id - b.id));
+    }
+  }
+
+  // The offline search: ranked matches under the diet and allergy filters,
+  // retried without the diet when nothing fits it. With no match at all the
+  // fallback recipes are offered instead, narrowed to the diet when possible.
+  function runQuery(index, { selections = [], diet = '', allergies = '', limit = 3 } = {}, fallback = []) {
+    const allergyFilter = parseAllergies(allergies);
+    const options = { limit, allergenMask: allergyFilter.mask, excludeTerms: allergyFilter.unknown };
+    const dietMask = dietQueryMask(diet);
+    let matches = dietMask ? index.search(selections, { ...options, dietMask }) : [];
+    if (matches.length === 0) {
+      matches = index.search(selections, options);
+    }
+    if (matches.length > 0) {
+      return { matched: true, recipes: matches.map(match => match.recipe) };
+    }
+
+    let recipes = fallback;
+    if (dietMask) {
+      const filtered = fallback.filter(recipe => (dietMaskFor(recipe.dietary_labels) & dietMask) === dietMask);
+      if (filtered.length > 0) recipes = filtered;
+    }
+    return { matched: false, recipes: recipes.slice(0, limit) };
+  }
+
+  // Worker side of the protocol used by app.js:
+  //   {type: 'load', fallback}           load the corpus once ('ready' when indexed)
+  //   {type: 'search', id, query}        answer with {type: 'result', id, result}
+  //   {type: 'cancel', id}               drop the query if it has not run yet
+  // Only the newest query waits to run; an older one still waiting is answered
+  // with {type: 'cancelled', id}. Queries run on a later task, so a cancel or a
+  // newer query sent right behind one is seen before the work starts.
+  function serveWorker(scope) {
+    let index = null;
+    let fallback = [];
+    let queued = null;
+    let scheduled = false;
+
+    async function loadIndex() {
+      const [indexResponse, recipesResponse] = await Promise.all([
+        fetch('recipe-index.json'),
+        fetch('local-recipes.json')
+      ]);
+      if (!indexResponse.ok || !recipesResponse.ok) {
+        throw new Error('No prebuilt recipe corpus');
+      }
+      return RecipeIndex.fromPacked(await indexResponse.json(), await recipesResponse.json());
+    }
+
+    function cancel(message) {
+      scope.postMessage({ type: 'cancelled', id: message.id });
+    }
+
+    function schedule() {
+      if (scheduled || !index || !queued) return;
+      scheduled = true;
+      setTimeout(() => {
+        scheduled = false;
+        const message = queued;
+        queued = null;
+        if (!message) return;
+        try {
+          // A page of recipes is small enough that structured clone beats
+          // encoding it here and parsing it again on the main thread
+          scope.postMessage({ type: 'result', id: message.id, result: runQuery(index, message.query, fallback) });
+        } catch (error) {
+          scope.postMessage({ type: 'error', id: message.id, message: error.message });
+        }
+      }, 0);
+    }
+
+    scope.onmessage = ({ data }) => {
+      if (data.type === 'load') {
+        fallback = data.fallback || [];
+        loadIndex()
+          .catch(() => RecipeIndex.build(fallback))
+          .then(loaded => {
+            index = loaded;
+            scope.postMessage({ type: 'ready', size: index.size });
+            schedule();
+          });
+      } else if (data.type === 'search') {
+        if (queued) cancel(queued);
+        queued = data;
+        schedule();
+      } else if (data.type === 'cancel' && queued && queued.id === data.id) {
+        cancel(queued);
+        queued = null;
+      }
+    };
+  }
+
+  return {
+    RecipeIndex,
+    tokenize,
+    normalizeToken,
+    normalizeLabel,
+    dietMaskFor,
+    allergenMaskFor,
+    dietQueryMask,
+    parseAllergies,
+    runQuery,
+    serveWorker
+  };
 });
 
-process.on('SIGINT', () => {
-  console.log('🔄 Server shutting down...');
-  process.exit(0);
-});'''
-
-# Save the enhanced files
-with open('app.js', 'w', encoding='utf-8') as f:
-    f.write(enhanced_app_js)
-
-with open('server.js', 'w', encoding='utf-8') as f:
-    f.write(enhanced_server)
-
-print("✅ Enhanced app.js and server.js created!")
-print("🔥 Combined the best UI interface with Spoonacular API integration!")
-print("🌟 Features:")
-print("- Your beautiful UI design with modern styling")
-print("- Spoonacular API integration with your API key")  
-print("- Enhanced ingredient selection with Indian spices")
-print("- Smart recipe matching and fallback system")
-print("- Notification system and user preferences")
-print("- Complete PWA support")
\ No newline at end of file
+// Started as a Web Worker (new Worker('recipe-engine.js')): answer queries by message
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+  self.RecipeEngine.serveWorker(self);
+}'''
+
+# Generated files, keyed by output name (build.py writes them incrementally)
+def render_outputs():
+    return {
+        'app.js': render_js(enhanced_app_js, INGREDIENT_SYNONYMS=INGREDIENT_SYNONYMS, STOP_WORDS=STOP_WORDS),
+        'server.js': enhanced_server,
+        'recipe-engine.js': render_js(recipe_engine_js, STOP_WORDS=STOP_WORDS,
+                                      DIET_CLASSES=DIET_CLASSES, ALLERGEN_CLASSES=ALLERGEN_CLASSES),
+    }
+
+
+if __name__ == '__main__':
+    # Save the enhanced files
+    for filename, content in render_outputs().items():
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    print("✅ Enhanced app.js, server.js and recipe-engine.js created!")
+    print("🔥 Combined the best UI interface with Spoonacular API integration!")
+    print("🌟 Features:")
+    print("- Your beautiful UI design with modern styling")
+    print("- Spoonacular API integration with your API key")  
+    print("- Enhanced ingredient selection with Indian spices")
+    print("- Smart recipe matching and fallback system")
+    print("- Notification system and user preferences")
+    print("- Complete PWA support")
\ No newline at end of file
@@ -1,6 +1,9 @@
 # Now create the complete deployment package with the best UI and Spoonacular API
 import zipfile
 import os
+import shutil
+
+from build_assets import MANIFEST_NAME, build_assets
 
 # Create enhanced package.json for the best UI version
 enhanced_package_json = '''{
@@ -30,20 +33,121 @@ enhanced_package_json = '''{
 }'''
 
 # Enhanced service worker for the best UI
-enhanced_service_worker = '''const CACHE_NAME = 'smarty-chef-pcs-v2.0.0';
+enhanced_service_worker = '''const CACHE_VERSION = 'v2.1.0';
+const SHELL_CACHE = `smarty-chef-pcs-shell-${CACHE_VERSION}`;
+const IMAGE_CACHE = 'smarty-chef-pcs-images';
+const RECIPE_CACHE = 'smarty-chef-pcs-recipes';
 const urlsToCache = [
   './',
   './index.html',
   './style.css',
   './app.js',
+  './recipe-engine.js',
   './manifest.json'
 ];
 
+// Recipe photos: cache-first, kept for a week
+const IMAGE_MAX_ENTRIES = 120;
+const IMAGE_MAX_AGE_MS = 7 * 24 * 60 * 60 * 1000;
+// Recipe searches and details: instant repeats, and the last results work offline
+const RECIPE_MAX_ENTRIES = 50;
+const RECIPE_MAX_AGE_MS = 30 * 60 * 1000;
+// Live status endpoints always go to the network
+const NETWORK_ONLY = ['/health', '/api-status', '/perf', '/metrics'];
+// Recency updates from cache hits are batched into one index write
+const INDEX_SAVE_DELAY_MS = 2000;
+
+// A Cache with a least-recently-used index stored next to its entries, since
+// the Cache API keeps no timestamps or access order
+class ExpiringCache {
+  constructor(name, { maxEntries, maxAgeMs }) {
+    this.name = name;
+    this.maxEntries = maxEntries;
+    this.maxAgeMs = maxAgeMs;
+    this.indexUrl = new URL(`__index__/${name}`, self.registration.scope).href;
+    this.ready = null;
+    this.saveTimer = null;
+  }
+
+  // entries: url -> time stored, oldest use first (Map keeps insertion order)
+  open() {
+    if (!this.ready) {
+      this.ready = caches.open(this.name).then(async cache => {
+        const saved = await cache.match(this.indexUrl);
+        const entries = new Map(saved ? await saved.json() : []);
+        // Entries written by a worker that stopped before saving its index
+        const requests = await cache.keys();
+        await Promise.all(requests
+          .filter(request => request.url !== this.indexUrl && !entries.has(request.url))
+          .map(request => cache.delete(request)));
+        return { cache, entries };
+      });
+    }
+    return this.ready;
+  }
+
+  // { response, fresh } or null; a stale entry is still returned for offline use
+  async get(url) {
+    const { cache, entries } = await this.open();
+    if (!entries.has(url)) return null;
+    const response = await cache.match(url);
+    const storedAt = entries.get(url);
+    entries.delete(url);
+    if (!response) {
+      await this.saveIndex();
+      return null;
+    }
+    entries.set(url, storedAt);
+    this.scheduleSave();
+    return { response, fresh: Date.now() - storedAt < this.maxAgeMs };
+  }
+
+  async put(url, response) {
+    const { cache, entries } = await this.open();
+    await cache.put(url, response);
+    entries.delete(url);
+    entries.set(url, Date.now());
+
+    const now = Date.now();
+    const evicted = [...entries].filter(([, storedAt]) => now - storedAt > this.maxAgeMs).map(([key]) => key);
+    let overflow = entries.size - evicted.length - this.maxEntries;
+    for (const key of entries.keys()) {
+      if (overflow <= 0) break;
+      if (!evicted.includes(key)) {
+        evicted.push(key);
+        overflow--;
+      }
+    }
+    evicted.forEach(key => entries.delete(key));
+    await Promise.all(evicted.map(key => cache.delete(key)));
+    await this.saveIndex();
+  }
+
+  // Hits only reorder the index, so a burst of them (a page of photos) is
+  // written once; if the worker stops first, only the recency order is lost
+  scheduleSave() {
+    if (this.saveTimer) return;
+    this.saveTimer = setTimeout(() => this.saveIndex(), INDEX_SAVE_DELAY_MS);
+  }
+
+  async saveIndex() {
+    clearTimeout(this.saveTimer);
+    this.saveTimer = null;
+    const { cache, entries } = await this.open();
+    await cache.put(this.indexUrl, new Response(JSON.stringify([...entries]), {
+      headers: { 'Content-Type': 'application/json' }
+    }));
+  }
+}
+
+const imageCache = new ExpiringCache(IMAGE_CACHE, { maxEntries: IMAGE_MAX_ENTRIES, maxAgeMs: IMAGE_MAX_AGE_MS });
+const recipeCache = new ExpiringCache(RECIPE_CACHE, { maxEntries: RECIPE_MAX_ENTRIES, maxAgeMs: RECIPE_MAX_AGE_MS });
+
 // Install event - cache resources
 self.addEventListener('install', event => {
   console.log('🔧 Service Worker: Installing...');
   event.waitUntil(
-    caches.open(CACHE_NAME)
+    caches.open(SHELL_CACHE)
       .then(cache => {
         console.log('📦 Service Worker: Caching app resources');
         return cache.addAll(urlsToCache);
@@ -58,11 +162,12 @@ self.addEventListener('install', event => {
 // Activate event - clean up old caches
 self.addEventListener('activate', event => {
   console.log('🚀 Service Worker: Activating...');
+  const current = [SHELL_CACHE, IMAGE_CACHE, RECIPE_CACHE];
   event.waitUntil(
     caches.keys().then(cacheNames => {
       return Promise.all(
         cacheNames.map(cacheName => {
-          if (cacheName !== CACHE_NAME) {
+          if (!current.includes(cacheName)) {
             console.log('🗑️ Service Worker: Deleting old cache', cacheName);
             return caches.delete(cacheName);
           }
@@ -75,40 +180,132 @@ self.addEventListener('activate', event => {
   );
 });
 
-// Fetch event - serve from cache when offline
-self.addEventListener('fetch', event => {
-  if (event.request.method !== 'GET') return;
-  
-  if (event.request.url.includes('/generate-recipe') || 
-      event.request.url.includes('spoonacular.com')) {
+// App shell: answer from the cache at once and refresh the copy in the background
+function staleWhileRevalidate(event) {
+  const { request } = event;
+  const network = fetch(request).then(response => {
+    if (response && response.ok && response.type === 'basic') {
+      const copy = response.clone();
+      event.waitUntil(caches.open(SHELL_CACHE).then(cache => cache.put(request, copy)));
+    }
+    return response;
+  });
+  event.waitUntil(network.catch(() => {}));
+
+  return caches.open(SHELL_CACHE)
+    .then(cache => cache.match(request))
+    .then(cached => cached || network)
+    .catch(() => {
+      if (request.mode === 'navigate' || request.destination === 'document') {
+        return caches.match('./index.html');
+      }
+      return Response.error();
+    });
+}
+
+// Images and recipe details: the cached copy while it is fresh, else the
+// network, else (offline) the expired copy
+async function cacheFirst(event, store) {
+  const { request } = event;
+  const hit = await store.get(request.url);
+  if (hit && hit.fresh) return hit.response;
+  try {
+    const response = await fetch(request);
+    // Opaque (no-cors) responses are never stored: Chromium counts each one
+    // as several MB against the origin quota, whatever its real size
+    if (response.ok) {
+      event.waitUntil(store.put(request.url, response.clone()));
+    }
+    return response;
+  } catch (error) {
+    if (hit) return hit.response;
+    throw error;
+  }
+}
+
+// Same normalization as buildSearchKey() in server.js, so the same basket in
+// any order or casing shares an entry. The Cache API only keys GET requests,
+// so the search is stored under a synthetic URL.
+function normalizeList(values) {
+  const list = Array.isArray(values) ? values : String(values || '').split(',');
+  return [...new Set(list.map(value => String(value).trim().toLowerCase()).filter(Boolean))].sort();
+}
+
+function recipeSearchUrl(body, accept) {
+  const key = JSON.stringify([
+    normalizeList(body.ingredients),
+    String(body.dietaryPreference || '').trim().toLowerCase(),
+    normalizeList(body.allergies),
+    parseInt(body.offset, 10) || 0,
+    parseInt(body.limit, 10) || 0,
+    normalizeList(body.fields),
+    accept.includes('application/x-ndjson')
+  ]);
+  return new URL(`__recipes__?search=${encodeURIComponent(key)}`, self.registration.scope).href;
+}
+
+// Kept once the whole reply has streamed in, and only when Spoonacular answered:
+// Local and Fallback replies stand in for an outage or an empty search, and
+// served cache-first they would hide live results
+async function storeRecipeSearch(url, response) {
+  const text = await response.text();
+  const lines = text.trim().split('\\n');
+  let meta;
+  try {
+    meta = JSON.parse(lines[lines.length - 1]);
+  } catch (error) {
     return;
   }
+  if (meta.apiSource !== 'Spoonacular' || meta.error) return;
+  await recipeCache.put(url, new Response(text, {
+    headers: { 'Content-Type': response.headers.get('Content-Type') || 'application/json' }
+  }));
+}
+
+async function recipeSearch(event) {
+  const { request } = event;
+  let url;
+  try {
+    url = recipeSearchUrl(await request.clone().json(), request.headers.get('Accept') || '');
+  } catch (error) {
+    return fetch(request);
+  }
 
-  event.respondWith(
-    caches.match(event.request)
-      .then(response => {
-        if (response) return response;
-        
-        return fetch(event.request).then(response => {
-          if (!response || response.status !== 200 || response.type !== 'basic') {
-            return response;
-          }
+  const hit = await recipeCache.get(url);
+  if (hit && hit.fresh) return hit.response;
+  try {
+    const response = await fetch(request);
+    if (response.ok) {
+      event.waitUntil(storeRecipeSearch(url, response.clone()));
+    }
+    return response;
+  } catch (error) {
+    if (hit) return hit.response;
+    throw error;
+  }
+}
 
-          const responseToCache = response.clone();
-          caches.open(CACHE_NAME)
-            .then(cache => {
-              cache.put(event.request, responseToCache);
-            });
+// Fetch event - route by request type
+self.addEventListener('fetch', event => {
+  const { request } = event;
+  const url = new URL(request.url);
+  const sameOrigin = url.origin === self.location.origin;
 
-          return response;
-        });
-      })
-      .catch(() => {
-        if (event.request.destination === 'document') {
-          return caches.match('./index.html');
-        }
-      })
-  );
+  if (request.method === 'POST' && sameOrigin && url.pathname.endsWith('/generate-recipe')) {
+    event.respondWith(recipeSearch(event));
+    return;
+  }
+  if (request.method !== 'GET') return;
+
+  if (request.destination === 'image') {
+    event.respondWith(cacheFirst(event, imageCache));
+  } else if (!sameOrigin || NETWORK_ONLY.some(path => url.pathname.endsWith(path))) {
+    return;
+  } else if (url.pathname.includes('/recipe/')) {
+    event.respondWith(cacheFirst(event, recipeCache));
+  } else {
+    event.respondWith(staleWhileRevalidate(event));
+  }
 });
 
 console.log('🍳 Smarty-Chef.PCS Service Worker - Made by Clement');'''
@@ -216,8 +413,11 @@ Add in Render dashboard:
 
 ### 🌟 **Smart Features:**
 - **Visual Ingredient Selection** - Click, don't type!
+- **Typo-Tolerant Ingredient Search** - "tumeric", "jeera" and "brinjal" all find their match
+- **Compact Recipe Cards** - photo, title and cooking time first; tap "Show recipe" for ingredients and steps
 - **Indian Cuisine Specialization** with authentic spices
-- **Local Recipe Saving** to build your cookbook
+- **Local Recipe Saving** to build your cookbook, stored in IndexedDB so saving the same recipe twice keeps one copy
+- **Cookbook Search** - find saved recipes by title, ingredient or instruction as you type; the search index is built once and updated with every save
 - **Intelligent Fallbacks** when API is unavailable
 - **Real-time Notifications** for user feedback
 - **User Preferences Storage** remembers your choices
@@ -229,6 +429,7 @@ smarty-chef-pcs/
 ├── style.css          # Modern responsive styling  
 ├── app.js             # Enhanced with Spoonacular API
 ├── server.js          # Express backend with API integration
+├── recipe-engine.js   # Local ingredient index (offline & fallback search; also the app's Web Worker)
 ├── package.json       # Dependencies and scripts
 ├── manifest.json      # PWA configuration
 ├── service-worker.js  # Offline support
@@ -242,12 +443,35 @@ npm start
 # Open http://localhost:3000
 ```
 
+## 📚 Offline Recipe Corpus
+```bash
+# JSON Lines or CSV; re-runs only reprocess changed records
+python build_corpus.py recipes.jsonl
+```
+Writes `local-recipes.json` and `recipe-index.json`, which the server and app load for offline and fallback search.
+
+## 🏗️ Building
+```bash
+# Regenerates only what changed; minification, compression and indexing run in parallel
+python build.py --corpus recipes.jsonl --zip
+# Rebuild on every save
+python build.py --watch
+```
+Build state is kept in `.build-cache/`; delete it to force a full rebuild.
+The ZIP holds `server.js` and the built `dist/` (or the plain sources when nothing is built), is byte-for-byte reproducible, and the build prints a per-file size report; it fails when the archive is over 5 MB (`--budget-kb` to change).
+
 ## 🌍 Live Features
 - **Live Recipe Generation** from Spoonacular API
 - **Smart Ingredient Matching** finds perfect recipes
 - **Dietary Filtering** works with real recipe data
 - **Rich Recipe Details** including prep time, servings, images
 - **Fallback System** shows demo recipes if API unavailable
+- **Streaming Results** - `POST /generate-recipe` with `Accept: application/x-ndjson` sends each recipe as soon as it is ready; `offset`/`limit` in the body page through results (`nextOffset`/`hasMore` in the reply)
+- **Offline Results** - the service worker keeps your last 50 searches (same basket in any order hits the same entry) and a week of recipe photos served with CORS (opaque cross-origin images are left to the HTTP cache); the app shell loads from cache and refreshes in the background
+- **Precompressed Assets** - `python build_assets.py` writes minified, content-hashed files with `.br`/`.gz` versions to `dist/`; the server sends them as-is with year-long immutable caching
+- **Slim Responses** - `fields=summary` (or a list such as `fields=id,title,image`) trims each recipe; `GET /recipe/:id` returns the full recipe
+- **Prometheus Metrics** - `GET /metrics` exports per-route request latency histograms, Spoonacular call latency and status/error codes, cache hit ratios, fallback recipe counts, event-loop lag and memory use
+- **Search Timings** - each search is marked with `performance.mark`/`measure` (first byte, first card painted, render done) and beaconed to `POST /perf`; `GET /perf` reports p50/p75/p95/p99 over the last `PERF_SAMPLE_SIZE` searches (`PERF_BEACON=off` disables it)
 
 ## 👨‍💻 Made by Clement
 - Complete branding throughout
@@ -274,6 +498,57 @@ env_file = '''# Spoonacular API Configuration
 SPOONACULAR_API_KEY=7800762921d34589b4b49897b5c09778
 PORT=3000
 
+# Upstream keep-alive pool size and per-request timeouts (ms)
+UPSTREAM_MAX_SOCKETS=16
+UPSTREAM_TIMEOUT_MS=8000
+UPSTREAM_BULK_TIMEOUT_MS=12000
+
+# Upstream rate limit (token bucket) and Spoonacular quota reserve kept for user traffic
+UPSTREAM_RATE_PER_SEC=5
+UPSTREAM_BURST=10
+UPSTREAM_MAX_QUEUE_MS=3000
+QUOTA_RESERVE_POINTS=10
+
+# Circuit breaker: failures before opening, cooldown before the background probe (ms)
+BREAKER_FAILURE_THRESHOLD=5
+BREAKER_COOLDOWN_MS=30000
+BREAKER_MAX_COOLDOWN_MS=300000
+API_STATUS_TTL_MS=60000
+
+# Local recipe corpus (JSON array in transformRecipe shape); RECIPE_SOURCE=local skips Spoonacular
+# Files default to dist/ when the assets are built, else the app directory
+RECIPE_SOURCE=spoonacular
+# LOCAL_RECIPES_FILE=./local-recipes.json
+# LOCAL_INDEX_FILE=./recipe-index.json
+
+# Recipe result cache (TTL in ms, max entries, optional file to survive restarts)
+RESULT_CACHE_TTL_MS=1800000
+RESULT_CACHE_MAX_ENTRIES=500
+# RESULT_CACHE_FILE=./cache/results.json
+# Ranked candidate ID lists per ingredient basket (same TTL as results)
+CANDIDATE_CACHE_MAX_ENTRIES=500
+
+# Recipe detail store shared across searches (keyed by Spoonacular recipe ID)
+RECIPE_STORE_TTL_MS=86400000
+RECIPE_STORE_MAX_ENTRIES=5000
+# RECIPE_STORE_FILE=./cache/recipes.json
+
+# Batch recipe detail lookups into one informationBulk call
+DETAIL_BATCH_WINDOW_MS=20
+DETAIL_BATCH_MAX_IDS=50
+
+# Result paging: ranked candidates per search, default and maximum recipes per page
+SEARCH_CANDIDATES=30
+PAGE_SIZE=5
+MAX_PAGE_SIZE=20
+
+# Client search timings beaconed to POST /perf (PERF_BEACON=off to disable); percentiles over the last N
+PERF_BEACON=on
+PERF_SAMPLE_SIZE=500
+
+# Built static assets (python build_assets.py); falls back to the app directory when missing
+# STATIC_DIR=./dist
+
 # App Information  
 APP_NAME=Smarty-Chef.PCS
 APP_VERSION=2.0.0
@@ -284,28 +559,26 @@ AUTHOR=Clement
 # Made with ❤️ by Clement
 '''
 
-# Save all enhanced files
-with open('package.json', 'w', encoding='utf-8') as f:
-    f.write(enhanced_package_json)
-
-with open('service-worker.js', 'w', encoding='utf-8') as f:
-    f.write(enhanced_service_worker)
-
-with open('manifest.json', 'w', encoding='utf-8') as f:
-    f.write(enhanced_manifest)
-
-with open('README.md', 'w', encoding='utf-8') as f:
-    f.write(deployment_readme)
+# Generated files, keyed by output name (build.py writes them incrementally)
+def render_outputs():
+    return {
+        'package.json': enhanced_package_json,
+        'service-worker.js': enhanced_service_worker,
+        'manifest.json': enhanced_manifest,
+        'README.md': deployment_readme,
+        '.env': env_file,
+    }
 
-with open('.env', 'w', encoding='utf-8') as f:
-    f.write(env_file)
 
-# Create ULTIMATE deployment ZIP
+# Everything that goes into the deployment ZIP; missing optional files are skipped
 files_to_zip = [
     'index.html',  # Use the best UI version
     'style.css',   # Use the best UI styling
     'app.js',      # Enhanced with Spoonacular API
     'server.js',   # Enhanced with Spoonacular API
+    'recipe-engine.js',  # Local ingredient index shared by server and app
+    'local-recipes.json',  # Offline corpus from build_corpus.py (optional)
+    'recipe-index.json',   # Precomputed index for the corpus (optional)
     'package.json',
     'manifest.json', 
     'service-worker.js',
@@ -313,30 +586,106 @@ files_to_zip = [
     '.env'
 ]
 
+# With a built dist/ the ZIP carries dist/ in place of the app files and the
+# corpus above, plus only what the server loads from its own directory
+server_files = [
+    'server.js',
+    'recipe-engine.js',  # required by server.js; the browser gets the hashed copy in dist/
+    'package.json',
+    'README.md',
+    '.env'
+]
+
 zip_filename = 'Smarty-Chef-PCS-ULTIMATE-BEST-UI-API.zip'
 
-with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-    for filename in files_to_zip:
-        if os.path.exists(filename):
-            zipf.write(filename)
-            print(f"✅ Added: {filename}")
-
-print(f"\n🎉 ULTIMATE VERSION CREATED!")
-print(f"📦 File: {zip_filename}")
-print(f"\n🔥 FEATURES COMBINED:")
-print("✅ Your beautiful UI interface")
-print("✅ Spoonacular API integration (365K+ recipes)")
-print("✅ Visual ingredient selection with Indian spices")
-print("✅ Smart recipe matching and filtering")
-print("✅ Progressive Web App support")
-print("✅ Made by Clement branding")
-print("✅ Complete login/privacy/about pages")
-print("✅ Mobile responsive design")
-print("✅ Deployment ready for Render")
-
-print(f"\n🚀 READY TO DEPLOY:")
-print("1. Extract and upload to GitHub")
-print("2. Deploy on Render with environment variables")
-print("3. Enjoy your ULTIMATE recipe app!")
-
-zip_filename
\ No newline at end of file
+# Fail the build when the ZIP grows past this (python build.py --budget-kb to override)
+ZIP_BUDGET_KB = 5120
+ZIP_CHUNK_SIZE = 1 << 20
+# Deflating these again only costs time
+STORED_EXTENSIONS = {'.br', '.gz', '.zip', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.woff2'}
+# Fixed entry timestamp (the earliest a ZIP can hold), so equal inputs give an identical archive
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+
+
+def _zip_entry(name):
+    info = zipfile.ZipInfo(name.replace(os.sep, '/'), date_time=ZIP_TIMESTAMP)
+    info.create_system = 3
+    info.external_attr = 0o100644 << 16  # regular file, rw-r--r--
+    if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+        # compress_level since Python 3.13, _compresslevel before
+        setattr(info, 'compress_level' if hasattr(info, 'compress_level') else '_compresslevel', 9)
+    return info
+
+
+def _size(size):
+    return f"{size / 1024:.1f} KB" if size < 1 << 20 else f"{size / (1 << 20):.2f} MB"
+
+
+# Create ULTIMATE deployment ZIP: the server and dist/ when the assets are
+# built, else the sources, never both copies of an asset. Entries are
+# sorted, timestamped and permissioned identically on every build and streamed
+# in ZIP_CHUNK_SIZE pieces. Prints a per-file size report and raises
+# RuntimeError when the archive is bigger than budget_kb.
+def build_zip(zip_filename=zip_filename, dist_dir='dist', budget_kb=ZIP_BUDGET_KB):
+    if os.path.isfile(os.path.join(dist_dir, MANIFEST_NAME)):
+        names = server_files + [os.path.join(dist_dir, name) for name in os.listdir(dist_dir)]
+    else:
+        names = list(files_to_zip)
+    names = sorted(name for name in set(names) if os.path.isfile(name))
+
+    with zipfile.ZipFile(zip_filename + '.tmp', 'w') as zipf:
+        for filename in names:
+            with open(filename, 'rb') as source, zipf.open(_zip_entry(filename), 'w') as target:
+                shutil.copyfileobj(source, target, ZIP_CHUNK_SIZE)
+        entries = zipf.infolist()
+    os.replace(zip_filename + '.tmp', zip_filename)
+
+    print(f"\n📊 {'File':<40} {'Size':>10} {'Zipped':>10} {'Ratio':>6}")
+    for info in entries:
+        ratio = info.compress_size / info.file_size if info.file_size else 1
+        stored = ' (stored)' if info.compress_type == zipfile.ZIP_STORED else ''
+        print(f"   {info.filename:<40} {_size(info.file_size):>10} {_size(info.compress_size):>10} {ratio:>6.0%}{stored}")
+    total = os.path.getsize(zip_filename)
+    print(f"   {'Total (' + str(len(entries)) + ' files)':<40} {_size(sum(i.file_size for i in entries)):>10} {_size(total):>10}")
+
+    budget = budget_kb * 1024
+    if total > budget:
+        raise RuntimeError(f"{zip_filename} is {_size(total)}, over the {_size(budget)} budget")
+    print(f"✅ {zip_filename}: {_size(total)} of {_size(budget)} budget")
+    return zip_filename
+
+
+if __name__ == '__main__':
+    # Save all enhanced files
+    for filename, content in render_outputs().items():
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    # Minified, content-hashed and precompressed copies for the server to send
+    print("🗜️ Building static assets into dist/")
+    build_assets('.', 'dist')
+    try:
+        build_zip()
+    except RuntimeError as error:
+        raise SystemExit(f"❌ {error}")
+
+    print(f"\n🎉 ULTIMATE VERSION CREATED!")
+    print(f"📦 File: {zip_filename}")
+    print(f"\n🔥 FEATURES COMBINED:")
+    print("✅ Your beautiful UI interface")
+    print("✅ Spoonacular API integration (365K+ recipes)")
+    print("✅ Visual ingredient selection with Indian spices")
+    print("✅ Smart recipe matching and filtering")
+    print("✅ Progressive Web App support")
+    print("✅ Made by Clement branding")
+    print("✅ Complete login/privacy/about pages")
+    print("✅ Mobile responsive design")
+    print("✅ Deployment ready for Render")
+
+    print(f"\n🚀 READY TO DEPLOY:")
+    print("1. Extract and upload to GitHub")
+    print("2. Deploy on Render with environment variables")
+    print("3. Enjoy your ULTIMATE recipe app!")